@@ -0,0 +1,82 @@
+"""
+Job analitik E-Library yang dijalankan LibraryAnalytics di process pool.
+
+Fungsi di modul ini murni: tidak menyentuh Streamlit maupun LibraryDatabase.
+Input berupa snapshot read-only (path file Arrow IPC dari snapshot bersama,
+atau DataFrame salinan), output berupa data biasa atau grafik PNG (bytes),
+sehingga aman di-pickle antar proses. Modul terpisah dari app.py karena
+fungsi yang didefinisikan di script Streamlit (__main__) tidak bisa
+di-import ulang oleh proses worker.
+"""
+import io
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from matplotlib.figure import Figure
+
+
+def read_source(source, columns):
+    """Snapshot read-only -> DataFrame berisi kolom tertentu
+
+    source: path file Arrow (di-memory-map, tanpa salinan) atau DataFrame.
+    """
+    if isinstance(source, str):
+        table = pa.ipc.open_file(pa.memory_map(source, 'r')).read_all()
+        return table.select([c for c in columns if c in table.column_names]).to_pandas()
+    return source.reindex(columns=columns)
+
+
+def borrowing_stats(source):
+    """Statistik peminjaman dari kolom book_id dan status transactions"""
+    transactions_df = read_source(source, ['book_id', 'status'])
+    if transactions_df.empty:
+        return None
+
+    # Analisis menggunakan numpy
+    borrow_counts = pd.to_numeric(transactions_df['book_id'], errors='coerce').astype('Int64').value_counts()
+
+    return {
+        'total_transactions': len(transactions_df),
+        'active_borrows': int((transactions_df['status'] == 'borrowed').sum()),
+        'most_borrowed_book': borrow_counts.idxmax() if not borrow_counts.empty else None,
+        'borrow_frequency': dict(borrow_counts),
+        'mean_borrows': np.mean(list(borrow_counts)) if not borrow_counts.empty else 0,
+        'std_borrows': np.std(list(borrow_counts)) if not borrow_counts.empty else 0
+    }
+
+
+def _png(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    return buffer.getvalue()
+
+
+def trend_chart(trend, title, xlabel):
+    """Grafik batang jumlah peminjaman per periode sebagai PNG; None jika kosong"""
+    if trend.empty:
+        return None
+    # Figure tanpa pyplot: tidak ada state global, aman di thread maupun proses lain
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    trend.plot(kind='bar', ax=ax, color='skyblue')
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel('Jumlah Peminjaman')
+    ax.tick_params(axis='x', labelrotation=45)
+    return _png(fig)
+
+
+def category_chart(source):
+    """Grafik pie distribusi kategori buku sebagai PNG; None jika tidak ada buku"""
+    books_df = read_source(source, ['category'])
+    if books_df.empty:
+        return None
+    category_counts = books_df['category'].astype(str).value_counts()
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    category_counts.plot(kind='pie', ax=ax, autopct='%1.1f%%')
+    ax.set_title('Distribusi Kategori Buku')
+    ax.set_ylabel('')
+    return _png(fig)
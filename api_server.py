@@ -0,0 +1,385 @@
+"""
+Headless JSON API untuk kiosk dan barcode scanner.
+
+Menjalankan server:
+    python api_server.py --host 0.0.0.0 --port 8080 --workers 16
+
+Endpoint:
+    POST /login   {"username": ..., "password": ..., "admin": false} -> {"token": ...}
+    GET  /books   ?q=<kata kunci>&available=1
+    POST /borrow  {"book_id": ...}          (header Authorization: Bearer <token>)
+    POST /return  {"transaction_id": ...}   (header Authorization: Bearer <token>)
+    GET  /stats                              (khusus admin)
+    GET  /export/<transactions|books>.<csv|xlsx>?start=YYYY-MM-DD&end=YYYY-MM-DD&status=...
+                                             (khusus admin, CSV dikirim streaming)
+"""
+import argparse
+import json
+import os
+import secrets
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from app import (
+    EXPORT_SOURCES, LibraryDatabase, UserManager, BookManager, LibraryAnalytics, LibraryExporter
+)
+
+
+def _json_default(value):
+    """Konversi tipe numpy/pandas ke tipe JSON"""
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    return str(value)
+
+
+def _records(df):
+    """DataFrame -> list of dict dengan nilai kosong sebagai None"""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+# ===============================
+# CLASS: LIBRARY SERVICE
+# ===============================
+class LibraryService:
+    """Lapisan tipis di atas manager yang dipakai bersama semua worker thread"""
+
+    def __init__(self, db):
+        self.db = db
+        self.users = UserManager(db)
+        self.books = BookManager(db)
+        self.analytics = LibraryAnalytics(db)
+        self.exporter = LibraryExporter(db)
+        self._sessions = {}
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+        # File Excel hanya boleh ditulis satu request pada satu waktu
+        self._write_lock = threading.Lock()
+        db.subscribe(self._on_change)
+
+    def _on_change(self, change):
+        """Menerapkan delta baris books ke cache pencarian tanpa membaca ulang sheet"""
+        if change['sheet'] != 'books':
+            return
+        version = self.db.get_version('books')
+        with self._cache_lock:
+            entry = self._cache.get('books')
+            # Cache dari generasi lain (file diubah tanpa event) tidak bisa ditambal
+            if entry is None or entry[0][0] != version[0]:
+                return
+            self._cache['books'] = (version, self.db.apply_changes('books', entry[1], [change]))
+
+    def _cached(self, name, version, compute):
+        """Hasil query dipakai ulang selama versi data sama"""
+        with self._cache_lock:
+            entry = self._cache.get(name)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+        # Gagal baca dilempar (bukan DataFrame kosong) agar tidak di-cache untuk versi ini
+        with self.db.strict_reads():
+            value = compute()
+        with self._cache_lock:
+            self._cache[name] = (version, value)
+        return value
+
+    def session(self, token):
+        """Mendapatkan (username, is_admin) dari token, None jika tidak valid"""
+        return self._sessions.get(token)
+
+    def login(self, username, password, admin=False):
+        if admin:
+            success, message = self.users.login_admin(username, password)
+        else:
+            success, message = self.users.login_user(username, password)
+        result = {'success': success, 'message': message}
+        if success:
+            token = secrets.token_urlsafe(24)
+            self._sessions[token] = (username, admin)
+            result['token'] = token
+        return result
+
+    def search_books(self, query=None, available_only=False):
+        books_df = self._cached(
+            'books', self.db.get_version('books'), self.books.get_all_books
+        )
+        if books_df.empty:
+            return []
+        mask = pd.Series(True, index=books_df.index)
+        if available_only:
+            mask &= books_df['available'].fillna(False).astype(bool)
+        if query:
+            text = (books_df['title'].astype(str) + ' ' +
+                    books_df['author'].astype(str) + ' ' +
+                    books_df['isbn'].astype(str) + ' ' +
+                    books_df['category'].astype(str))
+            mask &= text.str.contains(query, case=False, regex=False)
+        return _records(books_df[mask])
+
+    def borrow(self, username, book_id):
+        with self._write_lock:
+            success, message = self.books.borrow_book(username, book_id)
+        return {'success': success, 'message': message}
+
+    def return_loan(self, username, is_admin, transaction_id):
+        with self._write_lock:
+            loan = self.db.get_sheet(
+                'transactions',
+                columns=['transaction_id', 'username'],
+                filters=[('transaction_id', '==', transaction_id)]
+            )
+            if loan.empty:
+                return {'success': False, 'message': "Transaksi tidak ditemukan"}
+            if not is_admin and str(loan.iloc[0]['username']) != username:
+                return {'success': False, 'message': "Transaksi bukan milik user ini"}
+            success, message = self.books.return_book(transaction_id)
+        return {'success': success, 'message': message}
+
+    def stats(self):
+        def compute():
+            result = self.analytics.get_borrowing_stats()
+            if result is None:
+                return None
+            result = dict(result)
+            result['borrow_frequency'] = {
+                str(book_id): int(count)
+                for book_id, count in result['borrow_frequency'].items()
+            }
+            return result
+        return self._cached('stats', self.db.get_version('transactions'), compute)
+
+
+# ===============================
+# HTTP HANDLER
+# ===============================
+class LibraryRequestHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 agar koneksi keep-alive dipakai ulang oleh klien
+    protocol_version = "HTTP/1.1"
+    # Koneksi idle dilepas supaya worker kembali ke pool
+    timeout = 30
+    # Header dan body dikirim terpisah; tanpa TCP_NODELAY keep-alive tertahan delayed ACK
+    disable_nagle_algorithm = True
+    service = None
+    verbose = False
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, default=_json_default).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_export(self, name, params):
+        sheet_name, _, fmt = name.partition('.')
+        status = params.get('status', [None])[0]
+        if (sheet_name not in EXPORT_SOURCES or fmt not in ('csv', 'xlsx') or
+                (status is not None and status not in EXPORT_SOURCES[sheet_name]['statuses'])):
+            self._send_json(404, {'success': False, 'message': "Export tidak dikenal"})
+            return
+        start = params.get('start', [None])[0]
+        end = params.get('end', [None])[0]
+
+        if fmt == 'csv':
+            # Chunked transfer: unduhan dimulai begitu potongan pertama siap
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/csv; charset=utf-8')
+            self.send_header('Content-Disposition', f'attachment; filename="{name}"')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for part in self.service.exporter.iter_csv(sheet_name, start, end, status):
+                self.wfile.write(f"{len(part):X}\r\n".encode('ascii') + part + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+            return
+
+        # XLSX baru valid setelah workbook ditutup, jadi ditulis ke file sementara dulu
+        path = self.service.exporter.export_to_file(sheet_name, fmt, start, end, status)
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+            self.send_header('Content-Disposition', f'attachment; filename="{name}"')
+            self.send_header('Content-Length', str(os.path.getsize(path)))
+            self.end_headers()
+            with open(path, 'rb') as data:
+                for block in iter(lambda: data.read(64 * 1024), b''):
+                    self.wfile.write(block)
+        finally:
+            os.remove(path)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length == 0:
+            return {}
+        return json.loads(self.rfile.read(length).decode('utf-8'))
+
+    def _session(self):
+        auth = self.headers.get('Authorization', '')
+        if not auth.startswith('Bearer '):
+            return None
+        return self.service.session(auth[len('Bearer '):].strip())
+
+    def send_response(self, code, message=None):
+        self._response_started = True
+        super().send_response(code, message)
+
+    def _dispatch(self, handle):
+        """Menjalankan handler; error sebelum respons dimulai dijawab 500, bukan koneksi terputus"""
+        self._response_started = False
+        try:
+            handle()
+        except Exception:
+            if self._response_started:
+                # Respons sudah setengah terkirim: satu-satunya sinyal yang sah adalah menutup koneksi
+                self.close_connection = True
+                raise
+            self.log_error("Gagal melayani %s %s:\n%s", self.command, self.path, traceback.format_exc())
+            self._send_json(500, {'success': False, 'message': "Terjadi kesalahan di server"})
+
+    def do_GET(self):
+        self._dispatch(self._handle_get)
+
+    def do_POST(self):
+        self._dispatch(self._handle_post)
+
+    def _handle_get(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+
+        if url.path == '/books':
+            available_only = params.get('available', ['0'])[0] in ('1', 'true')
+            query = params.get('q', [None])[0]
+            books = self.service.search_books(query, available_only)
+            self._send_json(200, {'success': True, 'books': books})
+        elif url.path.startswith('/export/'):
+            session = self._session()
+            if session is None or not session[1]:
+                self._send_json(401, {'success': False, 'message': "Hanya untuk admin"})
+                return
+            self._send_export(url.path[len('/export/'):], params)
+        elif url.path == '/stats':
+            session = self._session()
+            if session is None or not session[1]:
+                self._send_json(401, {'success': False, 'message': "Hanya untuk admin"})
+                return
+            self._send_json(200, {'success': True, 'stats': self.service.stats()})
+        else:
+            self._send_json(404, {'success': False, 'message': "Endpoint tidak ditemukan"})
+
+    def _handle_post(self):
+        url = urlparse(self.path)
+        try:
+            payload = self._read_json()
+        except ValueError:
+            self._send_json(400, {'success': False, 'message': "Body harus JSON"})
+            return
+
+        if url.path == '/login':
+            result = self.service.login(
+                payload.get('username', ''),
+                payload.get('password', ''),
+                bool(payload.get('admin', False))
+            )
+            self._send_json(200 if result['success'] else 401, result)
+            return
+
+        session = self._session()
+        if session is None:
+            self._send_json(401, {'success': False, 'message': "Token tidak valid, silakan login"})
+            return
+        username, is_admin = session
+
+        try:
+            if url.path == '/borrow':
+                result = self.service.borrow(username, int(payload['book_id']))
+            elif url.path == '/return':
+                result = self.service.return_loan(
+                    username, is_admin, int(payload['transaction_id'])
+                )
+            else:
+                self._send_json(404, {'success': False, 'message': "Endpoint tidak ditemukan"})
+                return
+        except (KeyError, TypeError, ValueError):
+            self._send_json(400, {'success': False, 'message': "Parameter tidak lengkap"})
+            return
+        self._send_json(200 if result['success'] else 409, result)
+
+
+# ===============================
+# HTTP SERVER DENGAN WORKER POOL
+# ===============================
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer yang melayani koneksi dengan thread pool berukuran tetap"""
+    daemon_threads = True
+
+    def __init__(self, server_address, handler_class, workers=16):
+        super().__init__(server_address, handler_class)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api-worker')
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
+
+def create_server(host='127.0.0.1', port=8080, workers=16, db_path=None, verbose=False,
+                  snapshot_dir=None, change_feed=None):
+    """Membuat server API siap pakai (belum dijalankan)"""
+    db = LibraryDatabase(db_path, snapshot_dir=snapshot_dir, change_feed=change_feed)
+    handler = type('Handler', (LibraryRequestHandler,), {
+        'service': LibraryService(db),
+        'verbose': verbose,
+    })
+    return PooledHTTPServer((host, port), handler, workers=workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON API E-Library")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--db', default=None, help="Path library_db.xlsx")
+    parser.add_argument('--snapshot-dir', default=os.environ.get('LIBRARY_SNAPSHOT_DIR'),
+                        help="Direktori snapshot bersama dengan worker Streamlit")
+    parser.add_argument('--change-feed', default=os.environ.get('LIBRARY_CHANGE_FEED'),
+                        help="Log perubahan baris yang dibagi dengan worker lain")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.workers, args.db, args.verbose,
+                           args.snapshot_dir, args.change_feed)
+    print(f"E-Library API berjalan di http://{args.host}:{args.port} ({args.workers} worker)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,872 +1,3474 @@
-import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from scipy import stats
-import hashlib
-import os
-from datetime import datetime
-
-# ===============================
-# CLASS: LIBRARY DATABASE MANAGER
-# ===============================
-class LibraryDatabase:
-    def __init__(self, file_path=None):
-        if file_path is None:
-            file_path = os.path.join(os.path.dirname(__file__), 'library_db.xlsx')
-        self.file_path = file_path
-        self._initialize_database()
-    
-    def _initialize_database(self):
-        """Membuat database Excel otomatis jika belum ada"""
-        if not os.path.exists(self.file_path):
-            # 1. DATA ADMIN (default)
-            admin_data = pd.DataFrame({
-                'username': ['admin'],
-                'password': [self._hash_password('12345')],
-                'created_at': [datetime.now().strftime("%Y-%m-%d %H:%M:%S")]
-            })
-
-            # 2. DATA USER (struktur kosong)
-            user_data = pd.DataFrame(columns=[
-                'username', 'password', 'email', 'created_at'
-            ])
-
-            # 3. DATA BUKU (sample data)
-            book_data = pd.DataFrame({
-                'book_id': [1, 2, 3, 4, 5],
-                'title': [
-                    'Python Programming for Beginners',
-                    'Data Science Handbook',
-                    'Machine Learning Basics',
-                    'Web Development with Streamlit',
-                    'Database System Concepts'
-                ],
-                'author': [
-                    'John Smith',
-                    'Jane Doe',
-                    'Robert Johnson',
-                    'Sarah Wilson',
-                    'Michael Brown'
-                ],
-                'year': [2023, 2022, 2023, 2024, 2021],
-                'category': [
-                    'Programming',
-                    'Data Science',
-                    'Artificial Intelligence',
-                    'Web Development',
-                    'Database'
-                ],
-                'isbn': [
-                    '978-1234567890',
-                    '978-0987654321',
-                    '978-1122334455',
-                    '978-5566778899',
-                    '978-9988776655'
-                ],
-                'available': [True, True, True, True, True],
-                'added_date': [
-                    '2024-01-15', '2024-01-10', '2024-01-20',
-                    '2024-01-25', '2024-01-05'
-                ]
-            })
-
-            # 4. DATA TRANSAKSI (struktur kosong)
-            transaction_data = pd.DataFrame(columns=[
-                'transaction_id', 'username', 'book_id', 'book_title',
-                'borrow_date', 'due_date', 'return_date', 'status', 'fine'
-            ])
-
-            # Simpan semua sheet ke Excel
-            with pd.ExcelWriter(self.file_path, engine='openpyxl') as writer:
-                admin_data.to_excel(writer, sheet_name='admin', index=False)
-                user_data.to_excel(writer, sheet_name='users', index=False)
-                book_data.to_excel(writer, sheet_name='books', index=False)
-                transaction_data.to_excel(writer, sheet_name='transactions', index=False)
-    
-    def _hash_password(self, password):
-        """Hash password menggunakan SHA-256"""
-        return hashlib.sha256(password.encode()).hexdigest()
-    
-    def get_sheet(self, sheet_name):
-        """Membaca data dari sheet Excel"""
-        try:
-            return pd.read_excel(self.file_path, sheet_name=sheet_name, engine='openpyxl')
-        except Exception as e:
-            st.error(f"Error membaca sheet {sheet_name}: {e}")
-            return pd.DataFrame()
-    
-    def save_sheet(self, sheet_name, data):
-        """Menyimpan data ke sheet Excel"""
-        try:
-            # Baca semua sheet yang ada
-            existing_sheets = pd.read_excel(self.file_path, sheet_name=None, engine='openpyxl')
-
-            # Update sheet yang diinginkan
-            existing_sheets[sheet_name] = data
-
-            # Simpan kembali semua sheet
-            with pd.ExcelWriter(self.file_path, engine='openpyxl') as writer:
-                for sheet_name_val, sheet_data in existing_sheets.items():
-                    sheet_data.to_excel(writer, sheet_name=sheet_name_val, index=False)
-            return True
-        except Exception as e:
-            st.error(f"Error menyimpan data: {e}")
-            return False
-
-# ===============================
-# CLASS: USER MANAGEMENT
-# ===============================
-class UserManager:
-    def __init__(self, db):
-        self.db = db
-    
-    def register_user(self, username, password, email):
-        """Registrasi user baru"""
-        users_df = self.db.get_sheet('users')
-        
-        # Validasi input
-        if not username or not password or not email:
-            return False, "Semua field harus diisi"
-        
-        # Cek jika username sudah ada
-        if not users_df.empty and username in users_df['username'].values:
-            return False, "Username sudah terdaftar"
-        
-        # Tambah user baru
-        new_user = pd.DataFrame({
-            'username': [username],
-            'password': [self.db._hash_password(password)],
-            'email': [email],
-            'created_at': [datetime.now().strftime("%Y-%m-%d %H:%M:%S")]
-        })
-        
-        users_df = pd.concat([users_df, new_user], ignore_index=True)
-        
-        if self.db.save_sheet('users', users_df):
-            return True, "Registrasi berhasil! Silakan login."
-        else:
-            return False, "Gagal menyimpan data user"
-    
-    def login_user(self, username, password):
-        """Login user biasa"""
-        users_df = self.db.get_sheet('users')
-        
-        if users_df.empty:
-            return False, "Belum ada user terdaftar"
-        
-        hashed_password = self.db._hash_password(password)
-        
-        user = users_df[(users_df['username'] == username) & 
-                       (users_df['password'] == hashed_password)]
-        
-        if not user.empty:
-            return True, "Login berhasil!"
-        return False, "Username atau password salah"
-    
-    def login_admin(self, username, password):
-        """Login admin"""
-        admin_df = self.db.get_sheet('admin')
-        hashed_password = self.db._hash_password(password)
-
-        admin = admin_df[(admin_df['username'] == username) &
-                        (admin_df['password'] == hashed_password)]
-
-        if not admin.empty:
-            return True, "Login admin berhasil!"
-        return False, "Username atau password admin salah"
-
-# ===============================
-# CLASS: BOOK MANAGEMENT
-# ===============================
-class BookManager:
-    def __init__(self, db):
-        self.db = db
-    
-    def get_all_books(self):
-        """Mendapatkan semua buku"""
-        return self.db.get_sheet('books')
-    
-    def get_available_books(self):
-        """Mendapatkan buku yang tersedia"""
-        books_df = self.db.get_sheet('books')
-        if books_df.empty:
-            return books_df
-        return books_df[books_df['available'] == True]
-    
-    def add_book(self, book_data):
-        """Menambah buku baru"""
-        books_df = self.db.get_sheet('books')
-        
-        # Generate book_id
-        if books_df.empty:
-            new_id = 1
-        else:
-            new_id = books_df['book_id'].max() + 1
-        
-        book_data['book_id'] = new_id
-        book_data['available'] = True
-        book_data['added_date'] = datetime.now().strftime("%Y-%m-%d")
-        
-        new_book = pd.DataFrame([book_data])
-        books_df = pd.concat([books_df, new_book], ignore_index=True)
-        
-        if self.db.save_sheet('books', books_df):
-            return True, f"Buku berhasil ditambahkan dengan ID: {new_id}"
-        else:
-            return False, "Gagal menambahkan buku"
-    
-    def borrow_book(self, username, book_id):
-        """Meminjam buku"""
-        books_df = self.db.get_sheet('books')
-        transactions_df = self.db.get_sheet('transactions')
-
-        # Cek ketersediaan buku
-        book = books_df[books_df['book_id'] == book_id]
-        if book.empty:
-            return False, "Buku tidak ditemukan"
-
-        if not book.iloc[0]['available']:
-            return False, "Buku sedang dipinjam"
-
-        # Update status buku
-        books_df.loc[books_df['book_id'] == book_id, 'available'] = False
-
-        # Generate transaction_id
-        if transactions_df.empty:
-            new_transaction_id = 1
-        else:
-            new_transaction_id = transactions_df['transaction_id'].max() + 1
-
-        # Hitung tanggal jatuh tempo (14 hari dari sekarang)
-        borrow_date = datetime.now()
-        due_date = borrow_date + pd.DateOffset(days=14)
-
-        # Tambah transaksi
-        new_transaction = pd.DataFrame({
-            'transaction_id': [new_transaction_id],
-            'username': [username],
-            'book_id': [book_id],
-            'book_title': [book.iloc[0]['title']],
-            'borrow_date': [borrow_date.strftime("%Y-%m-%d")],
-            'due_date': [due_date.strftime("%Y-%m-%d")],
-            'return_date': [""],
-            'status': ['borrowed'],
-            'fine': [0]
-        })
-
-        transactions_df = pd.concat([transactions_df, new_transaction], ignore_index=True)
-
-        # Simpan perubahan
-        if (self.db.save_sheet('books', books_df) and
-            self.db.save_sheet('transactions', transactions_df)):
-            return True, f"Buku '{book.iloc[0]['title']}' berhasil dipinjam. Jatuh tempo: {due_date.strftime('%Y-%m-%d')}"
-        else:
-            return False, "Gagal memproses peminjaman"
-    
-    def return_book(self, transaction_id):
-        """Mengembalikan buku"""
-        print(f"DEBUG: return_book called with transaction_id={transaction_id}")
-
-        transactions_df = self.db.get_sheet('transactions')
-        books_df = self.db.get_sheet('books')
-
-        print(f"DEBUG: Transactions DataFrame shape: {transactions_df.shape}")
-        print(f"DEBUG: Books DataFrame shape: {books_df.shape}")
-
-        # Cek transaksi
-        transaction = transactions_df[transactions_df['transaction_id'] == transaction_id]
-        if transaction.empty:
-            print("DEBUG: Transaction not found")
-            return False, "Transaksi tidak ditemukan"
-
-        if transaction.iloc[0]['status'] == 'returned':
-            print("DEBUG: Book already returned")
-            return False, "Buku sudah dikembalikan"
-
-        book_id = transaction.iloc[0]['book_id']
-        print(f"DEBUG: Book ID to return: {book_id}")
-
-        # Update status buku
-        books_df.loc[books_df['book_id'] == book_id, 'available'] = True
-        print("DEBUG: Book availability updated to True")
-
-        # Update transaksi
-        return_date = datetime.now()
-        transactions_df.loc[transactions_df['transaction_id'] == transaction_id, 'return_date'] = return_date.strftime("%Y-%m-%d")
-        transactions_df.loc[transactions_df['transaction_id'] == transaction_id, 'status'] = 'returned'
-        print(f"DEBUG: Transaction updated with return_date: {return_date.strftime('%Y-%m-%d')}")
-
-        # Hitung denda jika terlambat
-        due_date = pd.to_datetime(transaction.iloc[0]['due_date'])
-        if return_date > due_date:
-            days_late = (return_date - due_date).days
-            fine = days_late * 5000  # Denda Rp 5000/hari
-            transactions_df.loc[transactions_df['transaction_id'] == transaction_id, 'fine'] = fine
-            print(f"DEBUG: Fine calculated: {fine}")
-        else:
-            print("DEBUG: No fine")
-
-        # Simpan perubahan
-        books_saved = self.db.save_sheet('books', books_df)
-        transactions_saved = self.db.save_sheet('transactions', transactions_df)
-
-        print(f"DEBUG: Books saved: {books_saved}")
-        print(f"DEBUG: Transactions saved: {transactions_saved}")
-
-        if books_saved and transactions_saved:
-            print(f"DEBUG: Return successful for transaction {transaction_id}")
-            return True, "Buku berhasil dikembalikan"
-        else:
-            print(f"DEBUG: Return failed for transaction {transaction_id}")
-            return False, "Gagal memproses pengembalian"
-
-# ===============================
-# CLASS: LIBRARY ANALYTICS
-# ===============================
-class LibraryAnalytics:
-    def __init__(self, db):
-        self.db = db
-    
-    def get_borrowing_stats(self):
-        """Analisis statistik peminjaman"""
-        transactions_df = self.db.get_sheet('transactions')
-        books_df = self.db.get_sheet('books')
-        
-        if transactions_df.empty:
-            return None
-        
-        # Analisis menggunakan numpy
-        borrow_counts = transactions_df['book_id'].value_counts()
-        
-        stats_result = {
-            'total_transactions': len(transactions_df),
-            'active_borrows': len(transactions_df[transactions_df['status'] == 'borrowed']),
-            'most_borrowed_book': borrow_counts.idxmax() if not borrow_counts.empty else None,
-            'borrow_frequency': dict(borrow_counts),
-            'mean_borrows': np.mean(list(borrow_counts)) if not borrow_counts.empty else 0,
-            'std_borrows': np.std(list(borrow_counts)) if not borrow_counts.empty else 0
-        }
-        
-        return stats_result
-    
-    def plot_borrowing_trend(self):
-        """Visualisasi trend peminjaman"""
-        transactions_df = self.db.get_sheet('transactions')
-        
-        if transactions_df.empty:
-            st.warning("Tidak ada data transaksi untuk dianalisis")
-            return
-        
-        # Konversi tanggal dan analisis
-        transactions_df['borrow_date'] = pd.to_datetime(transactions_df['borrow_date'])
-        monthly_borrows = transactions_df.groupby(transactions_df['borrow_date'].dt.to_period('M')).size()
-        
-        fig, ax = plt.subplots(figsize=(10, 6))
-        monthly_borrows.plot(kind='bar', ax=ax, color='skyblue')
-        ax.set_title('Trend Peminjaman Bulanan')
-        ax.set_xlabel('Bulan')
-        ax.set_ylabel('Jumlah Peminjaman')
-        plt.xticks(rotation=45)
-        st.pyplot(fig)
-    
-    def plot_category_distribution(self):
-        """Visualisasi distribusi kategori buku"""
-        books_df = self.db.get_sheet('books')
-        
-        if books_df.empty:
-            st.warning("Tidak ada data buku untuk dianalisis")
-            return
-        
-        category_counts = books_df['category'].value_counts()
-        
-        fig, ax = plt.subplots(figsize=(10, 6))
-        category_counts.plot(kind='pie', ax=ax, autopct='%1.1f%%')
-        ax.set_title('Distribusi Kategori Buku')
-        ax.set_ylabel('')
-        st.pyplot(fig)
-
-# ===============================
-# INISIALISASI SISTEM
-# ===============================
-db = LibraryDatabase()
-user_manager = UserManager(db)
-book_manager = BookManager(db)
-analytics = LibraryAnalytics(db)
-
-# ===============================
-# FUNGSI STREAMLIT - AUTH PAGES
-# ===============================
-def show_login_page():
-    """Halaman login user"""
-    st.header("🔐 Login User")
-    
-    with st.form("login_form"):
-        username = st.text_input("Username")
-        password = st.text_input("Password", type="password")
-        submit = st.form_submit_button("Login")
-        
-        if submit:
-            success, message = user_manager.login_user(username, password)
-            if success:
-                st.session_state.logged_in = True
-                st.session_state.username = username
-                st.session_state.is_admin = False
-                st.success(message)
-                st.rerun()
-            else:
-                st.error(message)
-
-def show_register_page():
-    """Halaman registrasi user"""
-    st.header("📝 Register User")
-    
-    with st.form("register_form"):
-        username = st.text_input("Username")
-        email = st.text_input("Email")
-        password = st.text_input("Password", type="password")
-        confirm_password = st.text_input("Confirm Password", type="password")
-        submit = st.form_submit_button("Register")
-        
-        if submit:
-            if password != confirm_password:
-                st.error("Password tidak cocok")
-            elif len(password) < 6:
-                st.error("Password minimal 6 karakter")
-            else:
-                success, message = user_manager.register_user(username, password, email)
-                if success:
-                    st.success(message)
-                else:
-                    st.error(message)
-
-def show_admin_login_page():
-    """Halaman login admin"""
-    st.header("👑 Login Admin")
-    
-    with st.form("admin_login_form"):
-        username = st.text_input("Username Admin")
-        password = st.text_input("Password Admin", type="password")
-        submit = st.form_submit_button("Login sebagai Admin")
-        
-        if submit:
-            success, message = user_manager.login_admin(username, password)
-            if success:
-                st.session_state.logged_in = True
-                st.session_state.username = username
-                st.session_state.is_admin = True
-                st.success(message)
-                st.rerun()
-            else:
-                st.error(message)
-
-# ===============================
-# FUNGSI STREAMLIT - USER DASHBOARD
-# ===============================
-def show_user_dashboard():
-    """Dashboard untuk user biasa"""
-    st.header(f"📚 Selamat datang, {st.session_state.username}!")
-    
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "📖 Semua Buku",
-        "🔍 Buku Tersedia",
-        "📚 Pinjam Buku",
-        "🔄 Kembalikan Buku",
-        "📋 Riwayat Saya"
-    ])
-    
-    with tab1:
-        st.subheader("📖 Katalog Semua Buku")
-        books_df = book_manager.get_all_books()
-        if not books_df.empty:
-            # Tampilkan dengan format yang lebih rapi
-            for _, book in books_df.iterrows():
-                status = "✅ Tersedia" if book['available'] else "❌ Dipinjam"
-                st.write(f"**{book['title']}**")
-                st.write(f"Penulis: {book['author']} | Tahun: {book['year']} | Kategori: {book['category']} | Status: {status}")
-                st.divider()
-        else:
-            st.info("Belum ada buku dalam sistem")
-    
-    with tab2:
-        st.subheader("🔍 Buku yang Tersedia")
-        available_books = book_manager.get_available_books()
-        if not available_books.empty:
-            st.dataframe(
-                available_books[['title', 'author', 'year', 'category']],
-                use_container_width=True,
-                hide_index=True
-            )
-        else:
-            st.info("Tidak ada buku yang tersedia saat ini")
-    
-    with tab3:
-        st.subheader("📚 Pinjam Buku")
-        available_books = book_manager.get_available_books()
-        
-        if not available_books.empty:
-            # Buat pilihan buku dengan format yang informatif
-            book_options = {
-                f"{row['title']} oleh {row['author']} (ID: {row['book_id']})": row['book_id'] 
-                for _, row in available_books.iterrows()
-            }
-            
-            selected_book = st.selectbox(
-                "Pilih buku untuk dipinjam:", 
-                list(book_options.keys())
-            )
-            
-            if st.button("📥 Pinjam Buku", type="primary"):
-                book_id = book_options[selected_book]
-                success, message = book_manager.borrow_book(
-                    st.session_state.username, 
-                    book_id
-                )
-                if success:
-                    st.success(message)
-                    st.rerun()
-                else:
-                    st.error(message)
-        else:
-            st.info("Tidak ada buku yang tersedia untuk dipinjam")
-    
-    with tab4:
-        st.subheader("🔄 Kembalikan Buku")
-        transactions_df = db.get_sheet('transactions')
-
-        if not transactions_df.empty:
-            # Get user's active loans (borrowed but not returned)
-            user_active_loans = transactions_df[
-                (transactions_df['username'] == st.session_state.username) &
-                (transactions_df['status'] == 'borrowed')
-            ]
-
-            if not user_active_loans.empty:
-                st.info("Berikut adalah buku yang sedang Anda pinjam:")
-
-                # Create options for books to return
-                return_options = {}
-                for _, loan in user_active_loans.iterrows():
-                    due_date = pd.to_datetime(loan['due_date'])
-                    today = pd.Timestamp.now()
-                    days_overdue = (today - due_date).days if today > due_date else 0
-
-                    status_text = f"{'⚠️ TERLAMBAT' if days_overdue > 0 else '✅ Masih dalam batas waktu'}"
-                    if days_overdue > 0:
-                        status_text += f" ({days_overdue} hari)"
-
-                    option_text = f"{loan['book_title']} - Dipinjam: {loan['borrow_date']} - Jatuh tempo: {loan['due_date']} - {status_text}"
-                    return_options[option_text] = loan['transaction_id']
-
-                selected_return = st.selectbox(
-                    "Pilih buku yang ingin dikembalikan:",
-                    list(return_options.keys())
-                )
-
-                if st.button("🔄 Kembalikan Buku", type="primary"):
-                    print("DEBUG: Return button clicked!")
-                    print(f"DEBUG: Current user: {st.session_state.username}")
-                    print(f"DEBUG: selected_return: {selected_return}")
-                    print(f"DEBUG: return_options: {return_options}")
-
-                    if selected_return in return_options:
-                        transaction_id = return_options[selected_return]
-                        print(f"DEBUG: Calling return_book with transaction_id: {transaction_id}")
-                        success, message = book_manager.return_book(transaction_id)
-                        print(f"DEBUG: return_book result - success: {success}, message: {message}")
-                        if success:
-                            st.success(message)
-                            st.rerun()
-                        else:
-                            st.error(message)
-                    else:
-                        print("DEBUG: selected_return not in return_options")
-                        st.error("Pilihan tidak valid")
-
-                # Show potential fine calculation
-                if selected_return:
-                    transaction_id = return_options[selected_return]
-                    loan = user_active_loans[user_active_loans['transaction_id'] == transaction_id].iloc[0]
-                    due_date = pd.to_datetime(loan['due_date'])
-                    today = pd.Timestamp.now()
-
-                    if today > due_date:
-                        days_late = (today - due_date).days
-                        fine = days_late * 5000
-                        st.warning(f"⚠️ Buku ini terlambat {days_late} hari. Denda yang harus dibayar: Rp {fine:,}")
-                    else:
-                        st.success("✅ Buku dapat dikembalikan tanpa denda")
-
-            else:
-                st.info("Anda tidak memiliki buku yang sedang dipinjam")
-        else:
-            st.info("Belum ada transaksi peminjaman")
-
-    with tab5:
-        st.subheader("📋 Riwayat Peminjaman Saya")
-        transactions_df = db.get_sheet('transactions')
-        if not transactions_df.empty:
-            user_transactions = transactions_df[
-                transactions_df['username'] == st.session_state.username
-            ]
-            if not user_transactions.empty:
-                st.dataframe(
-                    user_transactions[[
-                        'transaction_id', 'book_title', 'borrow_date',
-                        'due_date', 'return_date', 'status', 'fine'
-                    ]],
-                    use_container_width=True
-                )
-            else:
-                st.info("Anda belum meminjam buku apapun")
-        else:
-            st.info("Belum ada transaksi peminjaman")
-
-# ===============================
-# FUNGSI STREAMLIT - ADMIN DASHBOARD
-# ===============================
-def show_admin_dashboard():
-    """Dashboard untuk admin"""
-    st.header(f"👑 Dashboard Admin - {st.session_state.username}")
-    
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "📚 Kelola Buku", 
-        "👥 Buku Terpinjam", 
-        "📊 Analisis",
-        "➕ Tambah Buku",
-        "⚙️ Admin Tools"
-    ])
-    
-    with tab1:
-        st.subheader("📚 Semua Buku dalam Sistem")
-        books_df = book_manager.get_all_books()
-        if not books_df.empty:
-            st.dataframe(books_df, use_container_width=True)
-            
-            # Statistik cepat
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Total Buku", len(books_df))
-            with col2:
-                st.metric("Buku Tersedia", len(books_df[books_df['available'] == True]))
-            with col3:
-                st.metric("Buku Dipinjam", len(books_df[books_df['available'] == False]))
-        else:
-            st.info("Belum ada buku dalam sistem")
-    
-    with tab2:
-        st.subheader("👥 Buku yang Sedang Dipinjam")
-        transactions_df = db.get_sheet('transactions')
-        books_df = db.get_sheet('books')
-        
-        if not transactions_df.empty:
-            active_loans = transactions_df[transactions_df['status'] == 'borrowed']
-            if not active_loans.empty:
-                # Gabungkan dengan data buku untuk info lengkap
-                loan_details = pd.merge(
-                    active_loans, 
-                    books_df, 
-                    on='book_id', 
-                    how='left'
-                )
-                
-                st.dataframe(
-                    loan_details[[
-                        'transaction_id', 'username', 'title', 'author', 
-                        'borrow_date', 'due_date'
-                    ]],
-                    use_container_width=True
-                )
-                
-                # Fitur pengembalian buku
-                st.subheader("🔄 Proses Pengembalian Buku")
-                transaction_id = st.number_input(
-                    "Masukkan ID Transaksi untuk pengembalian:",
-                    min_value=1,
-                    step=1
-                )
-                
-                if st.button("Proses Pengembalian"):
-                    success, message = book_manager.return_book(transaction_id)
-                    if success:
-                        st.success(message)
-                        st.rerun()
-                    else:
-                        st.error(message)
-            else:
-                st.info("Tidak ada buku yang sedang dipinjam")
-        else:
-            st.info("Belum ada transaksi peminjaman")
-    
-    with tab3:
-        st.subheader("📊 Analisis dan Statistik")
-        
-        stats = analytics.get_borrowing_stats()
-        if stats:
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Total Transaksi", stats['total_transactions'])
-            with col2:
-                st.metric("Sedang Dipinjam", stats['active_borrows'])
-            with col3:
-                st.metric("Rata-rata Peminjaman", f"{stats['mean_borrows']:.2f}")
-            
-            # Visualisasi
-            col1, col2 = st.columns(2)
-            with col1:
-                st.subheader("Trend Peminjaman Bulanan")
-                analytics.plot_borrowing_trend()
-            with col2:
-                st.subheader("Distribusi Kategori Buku")
-                analytics.plot_category_distribution()
-        else:
-            st.info("Belum ada data untuk dianalisis")
-    
-    with tab4:
-        st.subheader("➕ Tambah Buku Baru")
-        
-        with st.form("add_book_form"):
-            title = st.text_input("Judul Buku *")
-            author = st.text_input("Penulis *")
-            year = st.number_input(
-                "Tahun Terbit *", 
-                min_value=1000, 
-                max_value=2100, 
-                value=2024
-            )
-            category = st.selectbox(
-                "Kategori *",
-                ["Programming", "Data Science", "Artificial Intelligence", 
-                 "Web Development", "Database", "Fiction", "Non-Fiction", "Lainnya"]
-            )
-            isbn = st.text_input("ISBN (opsional)")
-            
-            submit = st.form_submit_button("Tambah Buku", type="primary")
-            
-            if submit:
-                if not title or not author:
-                    st.error("Judul dan Penulis wajib diisi!")
-                else:
-                    book_data = {
-                        'title': title,
-                        'author': author,
-                        'year': int(year),
-                        'category': category,
-                        'isbn': isbn
-                    }
-                    
-                    success, message = book_manager.add_book(book_data)
-                    if success:
-                        st.success(message)
-                        st.rerun()
-                    else:
-                        st.error(message)
-    
-    with tab5:
-        st.subheader("⚙️ Admin Tools")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.info("📊 Data Users")
-            users_df = db.get_sheet('users')
-            if not users_df.empty:
-                st.dataframe(
-                    users_df[['username', 'email', 'created_at']],
-                    use_container_width=True
-                )
-            else:
-                st.info("Belum ada user terdaftar")
-        
-        with col2:
-            st.info("🔄 System Info")
-            st.write(f"Total Buku: {len(book_manager.get_all_books())}")
-            st.write(f"Total Users: {len(users_df) if not users_df.empty else 0}")
-            st.write(f"Database File: library_db.xlsx")
-            
-            if st.button("🔄 Refresh Database"):
-                st.rerun()
-
-# ===============================
-# MAIN APPLICATION
-# ===============================
-def main():
-    """Aplikasi utama Streamlit"""
-    st.set_page_config(
-        page_title="E-Library System",
-        page_icon="📚",
-        layout="wide",
-        initial_sidebar_state="expanded"
-    )
-    
-    # Custom CSS
-    st.markdown("""
-    <style>
-    .main-header {
-        font-size: 2.5rem;
-        color: #1f77b4;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    </style>
-    """, unsafe_allow_html=True)
-    
-    # Header
-    st.markdown('<h1 class="main-header">📚 E-Library System</h1>', unsafe_allow_html=True)
-    
-    # Inisialisasi session state
-    if 'logged_in' not in st.session_state:
-        st.session_state.logged_in = False
-    if 'username' not in st.session_state:
-        st.session_state.username = None
-    if 'is_admin' not in st.session_state:
-        st.session_state.is_admin = False
-    
-    # Sidebar untuk navigasi
-    with st.sidebar:
-        st.image("https://cdn-icons-png.flaticon.com/512/2232/2232688.png", width=100)
-        st.title("Navigasi")
-        
-        if not st.session_state.logged_in:
-            menu = st.radio(
-                "Pilih Menu:",
-                ["🔐 Login User", "📝 Register", "👑 Login Admin"],
-                index=0
-            )
-        else:
-            st.success(f"Login sebagai: **{st.session_state.username}**")
-            if st.session_state.is_admin:
-                st.info("👑 Role: Administrator")
-            else:
-                st.info("👤 Role: User")
-            
-            if st.button("🚪 Logout", use_container_width=True):
-                st.session_state.logged_in = False
-                st.session_state.username = None
-                st.session_state.is_admin = False
-                st.rerun()
-            
-            st.divider()
-            st.info("ℹ️ Sistem E-Library")
-            st.caption("Project UAS - Basic Python OOP")
-    
-    # Routing halaman berdasarkan status login
-    if not st.session_state.logged_in:
-        if menu == "🔐 Login User":
-            show_login_page()
-        elif menu == "📝 Register":
-            show_register_page()
-        elif menu == "👑 Login Admin":
-            show_admin_login_page()
-    else:
-        if st.session_state.is_admin:
-            show_admin_dashboard()
-        else:
-            show_user_dashboard()
-    
-    # Footer
-    st.divider()
-    st.caption("🎓 Project UAS - E-Library System | Kelompok 4")
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+import streamlit as st
+import pandas as pd
+import numpy as np
+from scipy import sparse, stats
+import bisect
+import collections
+import contextlib
+import cProfile
+import hashlib
+import hmac
+import io
+import json
+import operator
+import os
+import openpyxl
+import pstats
+import pyarrow as pa
+import re
+import secrets
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import multiprocessing
+from concurrent.futures import (
+    FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor,
+    TimeoutError as FutureTimeoutError, wait as wait_futures
+)
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+import analytics_jobs
+
+try:
+    import fcntl
+except ImportError:  # Windows: kunci antar proses tidak tersedia
+    fcntl = None
+
+# Operator yang didukung untuk predikat get_sheet(filters=...)
+_FILTER_OPS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda cell, values: cell in values,
+    'not in': lambda cell, values: cell not in values,
+}
+
+def _match(cell, op, value):
+    """Evaluasi satu predikat; sel kosong atau tipe yang tidak cocok dianggap tidak lolos"""
+    if cell is None and op not in (_FILTER_OPS['!='], _FILTER_OPS['not in']):
+        return False
+    try:
+        return bool(op(cell, value))
+    except TypeError:
+        return False
+
+def _filter_frame(data, columns, filters):
+    """Proyeksi kolom dan filter predikat pada DataFrame dengan semantik yang sama seperti _match"""
+    columns = list(data.columns if columns is None else columns)
+    missing = [c for c in columns + [f[0] for f in filters] if c not in data.columns]
+    if missing:
+        raise KeyError(f"Kolom tidak ditemukan: {missing}")
+
+    # Semantik predikat sama dengan pembacaan Excel (sel kosong = None)
+    mask = pd.Series(True, index=data.index)
+    for column, op, value in filters:
+        cells = data[column].astype(object).where(data[column].notna(), None)
+        mask &= cells.map(lambda cell: _match(cell, _FILTER_OPS[op], value)).astype(bool)
+    return data.loc[mask, columns].reset_index(drop=True)
+
+def _frame_chunks(data, chunksize):
+    """Memotong DataFrame menjadi potongan chunksize baris (minimal satu potongan)"""
+    if not chunksize:
+        yield data
+        return
+    for start in range(0, max(len(data), 1), chunksize):
+        yield data.iloc[start:start + chunksize]
+
+@contextlib.contextmanager
+def _file_lock(path):
+    """Kunci eksklusif antar proses berbasis file (tanpa efek jika fcntl tidak ada)"""
+    with open(path, 'a') as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+def _write_workbook(path, sheets):
+    """Menulis semua sheet ke file sementara di direktori yang sama lalu menukarnya (os.replace)
+
+    Pembaca selalu melihat workbook lama atau baru secara utuh, tidak pernah
+    file zip yang setengah tertulis.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.xlsx')
+    os.close(handle)
+    try:
+        with pd.ExcelWriter(temp_path, engine='openpyxl') as writer:
+            for sheet_name, sheet_data in sheets.items():
+                sheet_data.to_excel(writer, sheet_name=sheet_name, index=False)
+        if os.path.exists(path):
+            shutil.copymode(path, temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_path)
+        raise
+
+# Tipe data kolom di memori. Sheet Excel tetap menyimpan teks/angka biasa;
+# konversi dilakukan saat membaca (apply_schema) dan saat menyimpan (to_storage).
+DATE_FORMAT = "%Y-%m-%d"
+SHEET_SCHEMAS = {
+    'users': {
+        'active': 'boolean',
+    },
+    'books': {
+        'book_id': 'Int32',
+        'year': 'Int16',
+        'category': 'category',
+        'available': 'boolean',
+        'added_date': 'datetime64[ns]',
+        'copies': 'Int32',
+        'available_copies': 'Int32',
+    },
+    'transactions': {
+        'transaction_id': 'Int32',
+        'username': 'category',
+        'book_id': 'Int32',
+        'borrow_date': 'datetime64[ns]',
+        'due_date': 'datetime64[ns]',
+        'return_date': 'datetime64[ns]',
+        'status': pd.CategoricalDtype(['borrowed', 'returned']),
+        'fine': 'Int32',
+    },
+}
+
+# Lama peminjaman (hari) sebelum jatuh tempo
+LOAN_PERIOD_DAYS = 14
+# Denda keterlambatan per hari (Rp)
+FINE_PER_DAY = 5000
+# Pengingat ditampilkan untuk pinjaman yang jatuh tempo dalam N hari
+REMINDER_DAYS = 3
+
+# Hash password: "pbkdf2_sha256$<iterasi>$<salt>$<hash hex>"
+PASSWORD_ALGORITHM = 'pbkdf2_sha256'
+PASSWORD_ITERATIONS = int(os.environ.get('LIBRARY_PASSWORD_ITERATIONS', 200000))
+# Verifikasi password: jumlah worker, antrean maksimum, dan batas tunggu (detik)
+VERIFY_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+VERIFY_QUEUE = 32
+VERIFY_TIMEOUT = 10
+
+def hash_password(password, iterations=PASSWORD_ITERATIONS):
+    """Hash password bersalt dengan PBKDF2-SHA256"""
+    salt = secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), iterations)
+    return f"{PASSWORD_ALGORITHM}${iterations}${salt}${digest.hex()}"
+
+def verify_password(password, stored):
+    """Mencocokkan password dengan hash tersimpan (PBKDF2 atau SHA-256 lama)"""
+    if not isinstance(stored, str):
+        return False
+    if stored.startswith(PASSWORD_ALGORITHM + '$'):
+        try:
+            _, iterations, salt, expected = stored.split('$')
+            digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), int(iterations))
+        except ValueError:
+            return False
+        return hmac.compare_digest(digest.hex(), expected)
+    # Hash lama: SHA-256 tanpa salt
+    return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), stored)
+
+def needs_rehash(stored, iterations=PASSWORD_ITERATIONS):
+    """True jika hash memakai format lama atau work factor di bawah yang berlaku"""
+    if not isinstance(stored, str) or not stored.startswith(PASSWORD_ALGORITHM + '$'):
+        return True
+    try:
+        return int(stored.split('$')[1]) < iterations
+    except (IndexError, ValueError):
+        return True
+
+# Kolom kunci baris setiap sheet, dipakai event perubahan (change feed)
+SHEET_KEYS = {
+    'admin': 'username',
+    'users': 'username',
+    'books': 'book_id',
+    'transactions': 'transaction_id',
+}
+
+def _json_value(value):
+    """Konversi skalar numpy/pandas ke tipe JSON untuk event perubahan"""
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    return str(value)
+
+# ===============================
+# CLASS: SHARED SNAPSHOT
+# ===============================
+SNAPSHOT_SHEETS = ('books', 'transactions')
+
+class SharedSnapshotStore:
+    """Snapshot read-only sheet books/transactions yang dipakai bersama antar proses
+
+    Setiap versi ditulis sekali sebagai file Arrow IPC di direktori sendiri,
+    lalu file manifest CURRENT diganti secara atomik (os.replace). Proses
+    pembaca me-memory-map file versi terbaru tanpa menyalin data, sehingga
+    halaman memorinya dibagi lewat page cache OS berapa pun jumlah worker.
+    """
+    MANIFEST = 'CURRENT'
+    KEEP_VERSIONS = 3
+
+    def __init__(self, directory, sheets=SNAPSHOT_SHEETS):
+        self.directory = directory
+        self.sheets = tuple(sheets)
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._manifest_key = None
+        self._manifest = None
+        self._tables = {}
+
+    def lock(self):
+        """Kunci antar proses untuk memuat/menerbitkan snapshot"""
+        return _file_lock(os.path.join(self.directory, '.lock'))
+
+    def _path(self, token, sheet_name):
+        return os.path.join(self.directory, token, f'{sheet_name}.arrow')
+
+    def path(self, sheet_name):
+        """Path file Arrow versi terbaru (isinya tidak pernah diubah setelah diterbitkan)"""
+        return self._path(self.manifest()['token'], sheet_name)
+
+    def manifest(self):
+        """Manifest terbaru {'token', 'source_mtime'}; file hanya dibaca ulang jika berganti"""
+        path = os.path.join(self.directory, self.MANIFEST)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if key != self._manifest_key:
+                with open(path) as f:
+                    self._manifest = json.load(f)
+                self._manifest_key = key
+            return self._manifest
+
+    def table(self, sheet_name):
+        """Tabel Arrow versi terbaru (memory-mapped, zero-copy)"""
+        for _ in range(3):
+            token = self.manifest()['token']
+            with self._lock:
+                tables = self._tables.get(token)
+                if tables is not None:
+                    return tables[sheet_name]
+            try:
+                tables = {
+                    name: pa.ipc.open_file(pa.memory_map(self._path(token, name), 'r')).read_all()
+                    for name in self.sheets
+                }
+            except FileNotFoundError:
+                # Versi ini baru saja dibersihkan penerbit lain; baca manifest lagi
+                continue
+            with self._lock:
+                # Mapping versi lama dilepas begitu tidak ada lagi yang memakainya
+                self._tables = {token: tables}
+            return tables[sheet_name]
+        raise RuntimeError(f"Snapshot {sheet_name} tidak dapat dibuka")
+
+    def read(self, sheet_name, columns=None):
+        """Membaca kolom tertentu dari snapshot sebagai DataFrame"""
+        table = self.table(sheet_name)
+        if columns is not None:
+            table = table.select(list(columns))
+        return table.to_pandas()
+
+    @staticmethod
+    def _to_arrow(data):
+        """DataFrame format penyimpanan -> tabel Arrow; kolom bertipe campuran disimpan sebagai teks"""
+        arrays = []
+        for column in data.columns:
+            try:
+                arrays.append(pa.array(data[column], from_pandas=True))
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                values = data[column].astype(object)
+                arrays.append(pa.array(values.astype(str).where(values.notna(), None), from_pandas=True))
+        return pa.Table.from_arrays(arrays, names=[str(c) for c in data.columns])
+
+    def publish(self, sheets, source_mtime):
+        """Menerbitkan versi baru lalu menukar manifest secara atomik
+
+        sheets: {nama: DataFrame} untuk sheet yang berubah. Sheet lain di-hardlink
+        dari versi sebelumnya sehingga biaya tulis sebanding dengan perubahan.
+        Pemanggil harus memegang lock().
+        """
+        current = self.manifest()
+        token = f"{time.time_ns():020d}-{os.getpid()}"
+        staging = os.path.join(self.directory, f'.staging-{token}')
+        os.makedirs(staging)
+        for name in self.sheets:
+            target = os.path.join(staging, f'{name}.arrow')
+            if name in sheets or current is None:
+                table = self._to_arrow(sheets[name])
+                with pa.OSFile(target, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            else:
+                try:
+                    os.link(self._path(current['token'], name), target)
+                except OSError:
+                    shutil.copyfile(self._path(current['token'], name), target)
+        os.rename(staging, os.path.join(self.directory, token))
+
+        manifest_tmp = os.path.join(self.directory, f'.{self.MANIFEST}-{token}')
+        with open(manifest_tmp, 'w') as f:
+            json.dump({'token': token, 'source_mtime': source_mtime}, f)
+        os.replace(manifest_tmp, os.path.join(self.directory, self.MANIFEST))
+        self._cleanup()
+
+    def _cleanup(self):
+        """Menghapus versi lama; beberapa versi terakhir disisakan untuk pembaca yang masih memakainya"""
+        versions = sorted(
+            name for name in os.listdir(self.directory)
+            if not name.startswith('.') and os.path.isdir(os.path.join(self.directory, name))
+        )
+        for name in versions[:-self.KEEP_VERSIONS]:
+            # Di POSIX file yang masih di-map proses lain tetap valid sampai mapping ditutup
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+# ===============================
+# CLASS: CHANGE FEED
+# ===============================
+class ChangeFeed:
+    """Log perubahan baris (JSON Lines, append-only) yang dibagi antar proses
+
+    Setiap commit menambahkan event {seq, origin, mtime, sheet, op, key, changes}
+    di bawah kunci file. Proses lain membaca hanya bagian log yang baru
+    (tail), sehingga tidak perlu membaca ulang seluruh database.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        open(path, 'a').close()
+        # Proses baru memuat keadaan awal dari database, jadi mulai dari ujung log
+        self._offset = os.path.getsize(path)
+
+    def lock(self):
+        return _file_lock(self.path + '.lock')
+
+    @staticmethod
+    def _last_seq(handle):
+        """Nomor urut event terakhir, dibaca dari ekor file"""
+        handle.seek(0, os.SEEK_END)
+        size = handle.tell()
+        window = 4096
+        while True:
+            start = max(0, size - window)
+            handle.seek(start)
+            lines = handle.read(size - start).rstrip(b'\n').split(b'\n')
+            if len(lines) > 1 or start == 0:
+                return json.loads(lines[-1])['seq'] if lines[-1] else 0
+            window *= 4
+
+    def append(self, events):
+        """Menambahkan event satu commit secara berurutan; seq diisi ke setiap event"""
+        if not events:
+            return
+        with self.lock(), open(self.path, 'a+b') as handle:
+            seq = self._last_seq(handle)
+            lines = []
+            for event in events:
+                seq += 1
+                event['seq'] = seq
+                lines.append(json.dumps(event, default=_json_value))
+            handle.seek(0, os.SEEK_END)
+            handle.write(('\n'.join(lines) + '\n').encode('utf-8'))
+
+    def position(self):
+        """(seq terakhir, ukuran file); di bawah write_lock database posisi ini cocok dengan isi file"""
+        with self.lock(), open(self.path, 'rb') as handle:
+            seq = self._last_seq(handle)
+            return seq, handle.seek(0, os.SEEK_END)
+
+    def read_from(self, offset):
+        """Event lengkap mulai dari offset byte; mengembalikan (events, offset berikutnya)"""
+        try:
+            if os.path.getsize(self.path) <= offset:
+                return [], offset
+        except OSError:
+            return [], offset
+        with open(self.path, 'rb') as handle:
+            handle.seek(offset)
+            data = handle.read()
+        # Baris terakhir yang belum lengkap dibaca pada pembacaan berikutnya
+        end = data.rfind(b'\n') + 1
+        return [json.loads(line) for line in data[:end].splitlines() if line.strip()], offset + end
+
+    def read_new(self):
+        """Event yang ditambahkan sejak pembacaan terakhir objek ini"""
+        with self._lock:
+            events, self._offset = self.read_from(self._offset)
+        return events
+
+# ===============================
+# CLASS: LIBRARY DATABASE MANAGER
+# ===============================
+class LibraryDatabase:
+    # Work factor hash password baru; bisa dinaikkan per instance atau lewat env
+    password_iterations = PASSWORD_ITERATIONS
+
+    def __init__(self, file_path=None, snapshot_dir=None, change_feed=None):
+        """snapshot_dir: jika diisi, sheet books/transactions dibaca dari snapshot bersama
+        change_feed: path log perubahan baris yang dibagi dengan proses lain
+        """
+        if file_path is None:
+            file_path = os.path.join(os.path.dirname(__file__), 'library_db.xlsx')
+        self.file_path = file_path
+        self._versions = {}
+        self._generation = 0
+        self._write_lock = threading.RLock()
+        self._write_depth = 0
+        # Commit (tulis file, naikkan versi, teruskan event) terlihat atomik di dalam proses
+        self._change_lock = threading.RLock()
+        self._strict = threading.local()
+        self._subscribers = []
+        self._origin = f"{os.getpid()}-{os.urandom(4).hex()}"
+        self.snapshot = SharedSnapshotStore(snapshot_dir) if snapshot_dir else None
+        self.feed = ChangeFeed(change_feed) if change_feed else None
+        self._initialize_database()
+        self._migrate_database()
+        self._known_mtime = self._file_mtime()
+        if self.snapshot is not None:
+            self._refresh_snapshot()
+    
+    def _initialize_database(self):
+        """Membuat database Excel otomatis jika belum ada"""
+        if not os.path.exists(self.file_path):
+            # Simpan semua sheet ke Excel
+            _write_workbook(self.file_path, self._seed_sheets())
+
+    def _seed_sheets(self):
+        """Data awal database baru: admin default, contoh buku, sheet kosong lainnya"""
+        # 1. DATA ADMIN (default)
+        admin_data = pd.DataFrame({
+            'username': ['admin'],
+            'password': [self._hash_password('12345')],
+            'created_at': [datetime.now().strftime("%Y-%m-%d %H:%M:%S")]
+        })
+
+        # 2. DATA USER (struktur kosong)
+        user_data = pd.DataFrame(columns=[
+            'username', 'password', 'email', 'created_at', 'active'
+        ])
+
+        # 3. DATA BUKU (sample data)
+        book_data = pd.DataFrame({
+            'book_id': [1, 2, 3, 4, 5],
+            'title': [
+                'Python Programming for Beginners',
+                'Data Science Handbook',
+                'Machine Learning Basics',
+                'Web Development with Streamlit',
+                'Database System Concepts'
+            ],
+            'author': [
+                'John Smith',
+                'Jane Doe',
+                'Robert Johnson',
+                'Sarah Wilson',
+                'Michael Brown'
+            ],
+            'year': [2023, 2022, 2023, 2024, 2021],
+            'category': [
+                'Programming',
+                'Data Science',
+                'Artificial Intelligence',
+                'Web Development',
+                'Database'
+            ],
+            'isbn': [
+                '978-1234567890',
+                '978-0987654321',
+                '978-1122334455',
+                '978-5566778899',
+                '978-9988776655'
+            ],
+            'available': [True, True, True, True, True],
+            'added_date': [
+                '2024-01-15', '2024-01-10', '2024-01-20',
+                '2024-01-25', '2024-01-05'
+            ],
+            'copies': [1, 1, 1, 1, 1],
+            'available_copies': [1, 1, 1, 1, 1]
+        })
+
+        # 4. DATA TRANSAKSI (struktur kosong)
+        transaction_data = pd.DataFrame(columns=[
+            'transaction_id', 'username', 'book_id', 'book_title',
+            'borrow_date', 'due_date', 'return_date', 'status', 'fine'
+        ])
+
+        return {
+            'admin': admin_data,
+            'users': user_data,
+            'books': book_data,
+            'transactions': transaction_data,
+        }
+    
+    def _read_headers(self):
+        """Nama kolom setiap sheet (hanya baris pertama yang dibaca)"""
+        workbook = openpyxl.load_workbook(self.file_path, read_only=True)
+        try:
+            return {
+                ws.title: [c for c in next(ws.iter_rows(max_row=1, values_only=True), ()) if c is not None]
+                for ws in workbook.worksheets
+            }
+        finally:
+            workbook.close()
+
+    def _migrate_database(self):
+        """Menambahkan kolom baru ke database yang dibuat versi lama"""
+        with self.write_lock():
+            headers = self._read_headers()
+            if 'active' not in headers.get('users', ['active']):
+                users_df = self.get_sheet('users')
+                users_df['active'] = True
+                self.save_sheet('users', users_df)
+            if 'copies' not in headers.get('books', ['copies']):
+                # Data lama: satu baris = satu eksemplar
+                books_df = self.get_sheet('books')
+                books_df['copies'] = 1
+                books_df['available_copies'] = books_df['available'].fillna(True).astype(int)
+                self.save_sheet('books', books_df)
+
+    def write_lock(self):
+        """Kunci tulis eksklusif antar thread dan antar proses (bisa bersarang)
+
+        Dipakai untuk read-modify-write yang harus atomik, misalnya cek dan
+        pengurangan available_copies saat meminjam.
+        """
+        return self._locked()
+
+    @contextlib.contextmanager
+    def _locked(self):
+        with self._write_lock:
+            outer = self._write_depth == 0
+            self._write_depth += 1
+            try:
+                # Kunci file hanya diambil di level terluar; flock tidak reentrant
+                with self._process_lock() if outer else contextlib.nullcontext():
+                    yield
+            finally:
+                self._write_depth -= 1
+
+    def change_lock(self):
+        """Kunci (dalam proses) yang dipegang selama commit diterbitkan
+
+        save_sheets memegangnya dari menulis file sampai event diteruskan ke
+        listener, poll_changes dari membaca feed sampai event diteruskan.
+        Pembaca yang memegangnya (misalnya LoanIndex saat membangun ulang)
+        tidak pernah melihat data yang event-nya belum diteruskan, sehingga
+        event tidak diterapkan dua kali. Urutan kunci: write_lock lalu
+        change_lock, jangan sebaliknya.
+        """
+        return self._change_lock
+
+    def _process_lock(self):
+        """Kunci antar proses untuk file database"""
+        return _file_lock(self.file_path + '.lock')
+
+    def _hash_password(self, password):
+        """Hash password (PBKDF2-SHA256 bersalt, work factor password_iterations)"""
+        return hash_password(password, self.password_iterations)
+    
+    def _file_mtime(self):
+        """Waktu modifikasi file database (ns), None jika belum ada"""
+        try:
+            return os.stat(self.file_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def get_version(self, *sheet_names):
+        """Versi tulis data untuk sheet tertentu, dipakai sebagai kunci cache
+
+        Versi sheet naik setiap kali sheet itu disimpan lewat objek ini atau
+        muncul event perubahannya di change feed. Jika file diubah proses lain
+        tanpa event, semua sheet dianggap berubah.
+        """
+        with self._change_lock:
+            self.poll_changes()
+            mtime = self._file_mtime()
+            if mtime != self._known_mtime:
+                self._known_mtime = mtime
+                self._generation += 1
+            return (self._generation,) + tuple(self._versions.get(name, 0) for name in sheet_names)
+
+    def subscribe(self, listener):
+        """Mendaftarkan listener(change) untuk setiap event perubahan baris
+
+        change berisi sheet, op ('insert'/'update'/'delete'), key (nilai kolom
+        SHEET_KEYS) dan changes (kolom yang berubah, format penyimpanan).
+        Event dari commit lokal langsung diteruskan; event proses lain
+        diteruskan saat poll_changes().
+        """
+        self._subscribers.append(listener)
+
+    def _dispatch(self, changes):
+        for change in changes:
+            for listener in self._subscribers:
+                listener(change)
+
+    def poll_changes(self):
+        """Menerapkan event baru dari proses lain: naikkan versi sheet terkait lalu teruskan ke listener"""
+        if self.feed is None:
+            return []
+        with self._change_lock:
+            events = self.feed.read_new()
+            if not events:
+                return []
+            changes = [e for e in events if e.get('origin') != self._origin]
+            for sheet_name in {c['sheet'] for c in changes}:
+                self._versions[sheet_name] = self._versions.get(sheet_name, 0) + 1
+            mtime = self._file_mtime()
+            if events[-1].get('mtime') == mtime:
+                # Feed sudah menjelaskan seluruh perubahan file: tidak perlu invalidasi total
+                self._known_mtime = mtime
+            self._dispatch(changes)
+            return changes
+
+    def _normalize(self, sheet_name, data):
+        """Format penyimpanan dengan sel kosong sebagai None, agar data lama/baru bisa dibandingkan"""
+        data = self.to_storage(sheet_name, self.apply_schema(sheet_name, data)).astype(object)
+        return data.where(data.notna(), None)
+
+    def diff_rows(self, sheet_name, previous, data):
+        """Event perubahan baris antara isi sheet lama dan baru (format penyimpanan)"""
+        key = SHEET_KEYS.get(sheet_name)
+        if key is None or key not in data.columns:
+            return []
+        new = self._normalize(sheet_name, data)
+        new = new[new[key].notna()].drop_duplicates(key, keep='last').set_index(key)
+        if previous is None or key not in previous.columns:
+            old = pd.DataFrame(columns=new.columns, index=pd.Index([], name=key))
+        else:
+            old = self._normalize(sheet_name, previous)
+            old = old[old[key].notna()].drop_duplicates(key, keep='last').set_index(key)
+
+        changes = []
+        for row_key in new.index.difference(old.index, sort=False):
+            changes.append({'sheet': sheet_name, 'op': 'insert', 'key': row_key,
+                            'changes': new.loc[row_key].to_dict()})
+        for row_key in old.index.difference(new.index, sort=False):
+            changes.append({'sheet': sheet_name, 'op': 'delete', 'key': row_key, 'changes': {}})
+
+        # Perbandingan sel sekaligus untuk semua baris yang ada di kedua versi
+        common = new.index.intersection(old.index, sort=False)
+        before = old.reindex(index=common, columns=new.columns)
+        after = new.loc[common]
+        differs = (before != after) & ~(before.isna() & after.isna())
+        for row_key in common[differs.any(axis=1).to_numpy()]:
+            columns = differs.columns[differs.loc[row_key].to_numpy()]
+            changes.append({'sheet': sheet_name, 'op': 'update', 'key': row_key,
+                            'changes': after.loc[row_key, columns].to_dict()})
+        return changes
+
+    def apply_changes(self, sheet_name, data, changes):
+        """Menerapkan event perubahan baris ke DataFrame bertipe, tanpa membaca ulang sheet"""
+        key = SHEET_KEYS[sheet_name]
+        data = self.to_storage(sheet_name, data).astype(object)
+        for change in changes:
+            if change['sheet'] != sheet_name:
+                continue
+            match = (data[key] == change['key']).to_numpy()
+            if change['op'] == 'delete':
+                data = data[~match]
+            elif change['op'] == 'insert':
+                row = pd.DataFrame([{key: change['key'], **change['changes']}], dtype=object)
+                data = pd.concat([data[~match], row], ignore_index=True)
+            else:
+                for column, value in change['changes'].items():
+                    if column not in data.columns:
+                        data[column] = None
+                    data.loc[match, column] = value
+        return self.apply_schema(sheet_name, data.reset_index(drop=True))
+
+    def get_sheet(self, sheet_name, columns=None, filters=None):
+        """Membaca data dari sheet Excel
+
+        columns: daftar kolom yang dibaca (None = semua kolom)
+        filters: daftar predikat (kolom, operator, nilai) yang diterapkan
+                 saat membaca, misalnya [('available', '==', True)]
+        """
+        try:
+            if columns is None and not filters:
+                data = self._read_raw_sheet(sheet_name)
+            else:
+                data = self._read_sheet_filtered(sheet_name, columns, filters or [])
+            return self.apply_schema(sheet_name, data)
+        except Exception as e:
+            if getattr(self._strict, 'active', False):
+                raise
+            st.error(f"Error membaca sheet {sheet_name}: {e}")
+            return pd.DataFrame()
+
+    @contextlib.contextmanager
+    def strict_reads(self):
+        """Selama blok ini (di thread pemanggil), get_sheet melempar error baca alih-alih DataFrame kosong
+
+        Dipakai jalur yang menyimpan hasil per versi data (cache query, indeks,
+        credential store) agar hasil kosong akibat gagal baca tidak ikut di-cache.
+        """
+        previous = getattr(self._strict, 'active', False)
+        self._strict.active = True
+        try:
+            yield
+        finally:
+            self._strict.active = previous
+
+    def _read_raw_sheet(self, sheet_name):
+        """Membaca satu sheet utuh apa adanya (tanpa schema)"""
+        if self._uses_snapshot(sheet_name):
+            return self.snapshot.read(sheet_name)
+        return pd.read_excel(self.file_path, sheet_name=sheet_name, engine='openpyxl')
+
+    def _uses_snapshot(self, sheet_name):
+        """True jika sheet dibaca dari snapshot bersama (snapshot disegarkan dulu bila basi)"""
+        if self.snapshot is None or sheet_name not in self.snapshot.sheets:
+            return False
+        self._refresh_snapshot()
+        return True
+
+    def snapshot_path(self, sheet_name):
+        """Path file Arrow read-only untuk sheet, None jika sheet tidak dibaca dari snapshot"""
+        if not self._uses_snapshot(sheet_name):
+            return None
+        return self.snapshot.path(sheet_name)
+
+    def _refresh_snapshot(self):
+        """Menerbitkan ulang snapshot jika file database berubah sejak snapshot terakhir
+
+        Hanya satu proses yang memuat file; proses lain menunggu lock lalu
+        langsung memakai snapshot yang sudah diterbitkan.
+        """
+        mtime = self._file_mtime()
+        manifest = self.snapshot.manifest()
+        if manifest is not None and manifest['source_mtime'] == mtime:
+            return
+        with self.snapshot.lock():
+            mtime = self._file_mtime()
+            manifest = self.snapshot.manifest()
+            if manifest is not None and manifest['source_mtime'] == mtime:
+                return
+            sheets = pd.read_excel(self.file_path, sheet_name=list(self.snapshot.sheets), engine='openpyxl')
+            self.snapshot.publish(sheets, mtime)
+
+    def _read_sheet_filtered(self, sheet_name, columns, filters):
+        """Membaca sheet baris per baris, hanya kolom yang diminta dan baris yang lolos filter"""
+        chunks = self._iter_row_chunks(sheet_name, columns, filters, chunksize=None)
+        try:
+            return next(chunks)
+        finally:
+            chunks.close()
+
+    def iter_sheet(self, sheet_name, columns=None, filters=None, chunksize=5000):
+        """Membaca sheet sebagai potongan DataFrame berukuran chunksize (memori terbatas)"""
+        for chunk in self._iter_row_chunks(sheet_name, columns, filters or [], chunksize):
+            yield self.apply_schema(sheet_name, chunk)
+
+    def _iter_row_chunks(self, sheet_name, columns, filters, chunksize):
+        """Generator potongan baris mentah; chunksize=None berarti satu potongan berisi semua baris"""
+        if self._uses_snapshot(sheet_name):
+            # Hanya kolom yang dibutuhkan yang dikonversi dari snapshot
+            table = self.snapshot.table(sheet_name)
+            needed = [c for c in table.column_names
+                      if columns is None or c in columns or c in [f[0] for f in filters]]
+            data = self.snapshot.read(sheet_name, needed)
+            yield from _frame_chunks(_filter_frame(data, columns, filters), chunksize)
+            return
+
+        workbook = openpyxl.load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook[sheet_name].iter_rows(values_only=True)
+            header = [str(name) for name in next(rows, ()) if name is not None]
+            position = {name: i for i, name in enumerate(header)}
+
+            columns = list(header if columns is None else columns)
+            missing = [c for c in columns + [f[0] for f in filters] if c not in position]
+            if missing:
+                raise KeyError(f"Kolom tidak ditemukan: {missing}")
+
+            # Predikat dievaluasi langsung pada nilai sel, sebelum baris disimpan
+            predicates = [(position[col], _FILTER_OPS[op], value) for col, op, value in filters]
+            selected = [position[c] for c in columns]
+
+            data = []
+            emitted = False
+            for row in rows:
+                if not any(cell is not None for cell in row):
+                    continue
+                if all(_match(row[i] if i < len(row) else None, op, value)
+                       for i, op, value in predicates):
+                    data.append([row[i] if i < len(row) else None for i in selected])
+                    if chunksize and len(data) >= chunksize:
+                        yield pd.DataFrame(data, columns=columns)
+                        data, emitted = [], True
+            if data or not emitted:
+                yield pd.DataFrame(data, columns=columns)
+        finally:
+            workbook.close()
+
+    def apply_schema(self, sheet_name, data):
+        """Mengubah kolom hasil baca Excel ke tipe data ringkas (kategori, int kecil, datetime)"""
+        schema = SHEET_SCHEMAS.get(sheet_name, {})
+        data = data.copy()
+        for column, dtype in schema.items():
+            if column not in data.columns:
+                continue
+            if dtype == 'datetime64[ns]':
+                data[column] = pd.to_datetime(data[column], errors='coerce')
+            elif str(dtype).startswith('Int'):
+                data[column] = pd.to_numeric(data[column], errors='coerce').astype(dtype)
+            else:
+                data[column] = data[column].astype(dtype)
+        return data
+
+    def to_storage(self, sheet_name, data):
+        """Mengembalikan kolom bertipe ke format penyimpanan Excel (teks tanggal, nilai biasa)"""
+        schema = SHEET_SCHEMAS.get(sheet_name, {})
+        data = data.copy()
+        for column, dtype in schema.items():
+            if column not in data.columns:
+                continue
+            if dtype == 'datetime64[ns]':
+                dates = pd.to_datetime(data[column], errors='coerce')
+                data[column] = dates.dt.strftime(DATE_FORMAT).astype(object).where(dates.notna(), "")
+            else:
+                values = data[column].astype(object)
+                data[column] = values.where(data[column].notna(), None)
+        return data
+
+    def save_sheet(self, sheet_name, data):
+        """Menyimpan data ke sheet Excel"""
+        return self.save_sheets({sheet_name: data})
+
+    def save_sheets(self, sheets):
+        """Menyimpan beberapa sheet sekaligus sebagai satu commit (satu kali tulis file)
+
+        sheets: {nama_sheet: DataFrame}
+        """
+        try:
+            sheets = {name: self.to_storage(name, data) for name, data in sheets.items()}
+        except Exception as e:
+            st.error(f"Error menyimpan data: {e}")
+            return False
+        changes = []
+        with self.write_lock(), self._change_lock:
+            try:
+                previous = self._write_sheets(sheets)
+                mtime = self._file_mtime()
+                if self.feed is not None or self._subscribers:
+                    for sheet_name, data in sheets.items():
+                        changes += self.diff_rows(sheet_name, previous.get(sheet_name), data)
+                    if self.feed is not None:
+                        # Masih di dalam kunci tulis: urutan seq = urutan commit ke file,
+                        # sehingga feed bisa diputar ulang (backup inkremental)
+                        for change in changes:
+                            change.update(origin=self._origin, mtime=mtime)
+                        self.feed.append(changes)
+
+                # Hanya cache sheet yang disimpan yang menjadi basi
+                for sheet_name in sheets:
+                    self._versions[sheet_name] = self._versions.get(sheet_name, 0) + 1
+                self._known_mtime = mtime
+            except Exception as e:
+                st.error(f"Error menyimpan data: {e}")
+                return False
+            # Event diteruskan sebelum change_lock dilepas: pembangunan ulang indeks
+            # di thread lain tidak bisa menyisip di antara versi baru dan event-nya
+            self._dispatch(changes)
+        return True
+
+    def _write_sheets(self, sheets):
+        """Menulis sheet (format penyimpanan) ke file Excel; mengembalikan isi lama sheet tersebut"""
+        # Baca semua sheet yang ada
+        existing_sheets = pd.read_excel(self.file_path, sheet_name=None, engine='openpyxl')
+        previous = {name: existing_sheets.get(name) for name in sheets}
+
+        # Update sheet yang diinginkan
+        existing_sheets.update(sheets)
+
+        # Simpan kembali semua sheet (atomik: file baru ditukar setelah selesai ditulis)
+        _write_workbook(self.file_path, existing_sheets)
+
+        if self.snapshot is not None:
+            # Versi baru diterbitkan dari data yang baru ditulis, tanpa membaca file lagi
+            with self.snapshot.lock():
+                changed = {name: data for name, data in sheets.items() if name in self.snapshot.sheets}
+                self.snapshot.publish(changed, self._file_mtime())
+        return previous
+
+# ===============================
+# CLASS: IN-MEMORY DATABASE
+# ===============================
+class MemoryLibraryDatabase(LibraryDatabase):
+    """LibraryDatabase tanpa file: semua sheet disimpan sebagai DataFrame di memori
+
+    API dan data awal sama dengan LibraryDatabase, sehingga manager asli bisa
+    dites cepat, terisolasi, dan paralel tanpa menyentuh library_db.xlsx.
+    """
+
+    def __init__(self, sheets=None):
+        self._sheets_lock = threading.Lock()
+        self._initial_sheets = sheets
+        super().__init__(file_path=':memory:')
+
+    def _initialize_database(self):
+        """Mengisi sheet dari data awal (atau dari argumen sheets)"""
+        sheets = self._initial_sheets if self._initial_sheets is not None else self._seed_sheets()
+        self._sheets = {name: data.copy() for name, data in sheets.items()}
+
+    def _read_headers(self):
+        with self._sheets_lock:
+            return {name: list(data.columns) for name, data in self._sheets.items()}
+
+    def _file_mtime(self):
+        # Tidak ada proses lain yang bisa mengubah data di memori
+        return None
+
+    def _process_lock(self):
+        return contextlib.nullcontext()
+
+    def _read_raw_sheet(self, sheet_name):
+        with self._sheets_lock:
+            return self._sheets[sheet_name].copy()
+
+    def _iter_row_chunks(self, sheet_name, columns, filters, chunksize):
+        data = self._read_raw_sheet(sheet_name)
+        yield from _frame_chunks(_filter_frame(data, columns, filters), chunksize)
+
+    def _write_sheets(self, sheets):
+        with self._sheets_lock:
+            previous = {name: self._sheets.get(name) for name in sheets}
+            for name, data in sheets.items():
+                self._sheets[name] = data.reset_index(drop=True).copy()
+        return previous
+
+# ===============================
+# CLASS: BACKUP STORE
+# ===============================
+class BackupStore:
+    """Backup inkremental: base konsisten + delta baris dari change feed
+
+    Base adalah salinan file database yang diambil di bawah write_lock bersama
+    posisi change feed saat itu, jadi tidak pernah robek oleh save_sheet.
+    Setiap run() berikutnya hanya menyalin event feed baru (perubahan baris
+    per commit) ke satu file delta, sehingga biayanya sebanding dengan jumlah
+    penulisan, bukan ukuran database. Restore memutar ulang delta di atas base
+    terakhir sebelum titik waktu yang diminta. Semua file dicatat beserta
+    checksum SHA-256 di manifest yang diganti secara atomik.
+    """
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def lock(self):
+        """Kunci antar proses agar base/run tidak berjalan bersamaan"""
+        return _file_lock(os.path.join(self.directory, '.lock'))
+
+    def _file(self, name):
+        return os.path.join(self.directory, name)
+
+    def manifest(self):
+        """{'epoch', 'head': {'seq', 'offset'}, 'bases': [...], 'deltas': [...]}"""
+        try:
+            with open(self._file(self.MANIFEST)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'epoch': 0, 'head': None, 'bases': [], 'deltas': []}
+
+    def _write_manifest(self, manifest):
+        path = self._file(self.MANIFEST)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def _checksum(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _feed(db):
+        if db.feed is None:
+            raise ValueError("Backup inkremental membutuhkan change feed (LIBRARY_CHANGE_FEED)")
+        return db.feed
+
+    def take_base(self, db):
+        """Mengambil base baru; mengembalikan entri manifest-nya"""
+        with self.lock():
+            manifest = self.manifest()
+            entry = self._take_base(db, manifest)
+            self._write_manifest(manifest)
+            return entry
+
+    def _take_base(self, db, manifest):
+        feed = self._feed(db)
+        created = datetime.now()
+        name = f"base-{created:%Y%m%d-%H%M%S-%f}.xlsx"
+        with db.write_lock():
+            # Tidak ada commit di antara salinan file dan pembacaan posisi feed
+            shutil.copyfile(db.file_path, self._file(name))
+            seq, offset = feed.position()
+            time_ns = time.time_ns()
+
+        head = manifest['head']
+        if head is None or offset < head['offset']:
+            # Backup pertama, atau feed dirotasi/dipotong: rantai delta baru dimulai dari base ini
+            if head is not None:
+                manifest['epoch'] += 1
+            manifest['head'] = {'seq': seq, 'offset': offset}
+        entry = {
+            'file': name,
+            'epoch': manifest['epoch'],
+            'seq': seq,
+            'time_ns': time_ns,
+            'created_at': created.strftime("%Y-%m-%d %H:%M:%S"),
+            'sha256': self._checksum(self._file(name)),
+        }
+        manifest['bases'].append(entry)
+        return entry
+
+    def run(self, db):
+        """Backup inkremental: event feed baru disalin ke satu file delta (base dibuat jika belum ada)
+
+        Mengembalikan (base baru atau None, delta baru atau None).
+        """
+        with self.lock():
+            manifest = self.manifest()
+            base = self._take_base(db, manifest) if not manifest['bases'] else None
+            feed = self._feed(db)
+            head = manifest['head']
+            if os.path.getsize(feed.path) < head['offset']:
+                raise ValueError("Change feed lebih pendek dari posisi backup terakhir; ambil base baru")
+
+            events, offset = feed.read_from(head['offset'])
+            delta = None
+            if events:
+                if events[0]['seq'] != head['seq'] + 1:
+                    raise ValueError(
+                        f"Seq feed melompat dari {head['seq']} ke {events[0]['seq']}; ambil base baru"
+                    )
+                first, last = events[0]['seq'], events[-1]['seq']
+                name = f"delta-{manifest['epoch']:03d}-{first:010d}-{last:010d}.jsonl"
+                with open(self._file(name), 'w', encoding='utf-8') as f:
+                    for event in events:
+                        f.write(json.dumps(event) + '\n')
+                delta = {
+                    'file': name,
+                    'epoch': manifest['epoch'],
+                    'first_seq': first,
+                    'last_seq': last,
+                    'last_time_ns': events[-1].get('mtime'),
+                    'sha256': self._checksum(self._file(name)),
+                }
+                manifest['deltas'].append(delta)
+                manifest['head'] = {'seq': last, 'offset': offset}
+            self._write_manifest(manifest)
+            return base, delta
+
+    def _read_delta(self, entry):
+        path = self._file(entry['file'])
+        if self._checksum(path) != entry['sha256']:
+            raise ValueError(f"Checksum {entry['file']} tidak cocok")
+        with open(path, encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _choose_base(self, manifest, until_ns=None, seq=None):
+        """Base terakhir yang diambil sebelum titik waktu / seq yang diminta"""
+        candidates = [
+            base for base in manifest['bases']
+            if (until_ns is None or base['time_ns'] <= until_ns)
+            and (seq is None or (base['epoch'] == manifest['epoch'] and base['seq'] <= seq))
+        ]
+        if not candidates:
+            raise ValueError("Tidak ada base sebelum titik restore yang diminta")
+        return candidates[-1]
+
+    def _events_after(self, manifest, base, until_ns=None, seq=None):
+        """Event delta setelah base sampai titik restore, urut seq"""
+        events = []
+        for entry in manifest['deltas']:
+            if entry['epoch'] != base['epoch'] or entry['last_seq'] <= base['seq']:
+                continue
+            events += [
+                event for event in self._read_delta(entry)
+                if event['seq'] > base['seq']
+                and (seq is None or event['seq'] <= seq)
+                and (until_ns is None or event.get('mtime') is None or event['mtime'] <= until_ns)
+            ]
+        return events
+
+    @staticmethod
+    def replay(sheets, events):
+        """Menerapkan event baris (format penyimpanan) ke sheet hasil baca file base
+
+        Baris diindeks per kunci SHEET_KEYS; insert diperlakukan sebagai upsert
+        sehingga pemutaran ulang aman walau event sudah tercermin di base.
+        """
+        tables = {}
+        for name, data in sheets.items():
+            key = SHEET_KEYS.get(name)
+            records = data.astype(object).where(data.notna(), None).to_dict('records')
+            rows = {r[key]: r for r in records} if key in data.columns else None
+            tables[name] = (list(data.columns), rows if rows is not None else records)
+
+        for event in events:
+            name, key = event['sheet'], SHEET_KEYS.get(event['sheet'])
+            columns, rows = tables.setdefault(name, ([key], {}))
+            for column in event['changes']:
+                if column not in columns:
+                    columns.append(column)
+            if event['op'] == 'delete':
+                rows.pop(event['key'], None)
+            elif event['op'] == 'insert':
+                rows[event['key']] = {key: event['key'], **event['changes']}
+            else:
+                rows.setdefault(event['key'], {key: event['key']}).update(event['changes'])
+
+        return {
+            name: pd.DataFrame(list(rows.values()) if isinstance(rows, dict) else rows, columns=columns)
+            for name, (columns, rows) in tables.items()
+        }
+
+    def restore(self, target, until=None, seq=None):
+        """Menulis database pada titik waktu until (datetime) atau seq tertentu ke file target
+
+        Mengembalikan ringkasan {'base', 'events', 'seq'}.
+        """
+        if os.path.exists(target):
+            raise ValueError(f"File tujuan {target} sudah ada")
+        manifest = self.manifest()
+        until_ns = int(until.timestamp() * 1e9) if until is not None else None
+        base = self._choose_base(manifest, until_ns, seq)
+        base_path = self._file(base['file'])
+        if self._checksum(base_path) != base['sha256']:
+            raise ValueError(f"Checksum {base['file']} tidak cocok")
+
+        events = self._events_after(manifest, base, until_ns, seq)
+        sheets = self.replay(pd.read_excel(base_path, sheet_name=None, engine='openpyxl'), events)
+        _write_workbook(target, sheets)
+        return {
+            'base': base['file'],
+            'events': len(events),
+            'seq': events[-1]['seq'] if events else base['seq'],
+        }
+
+    def verify(self, db):
+        """Memeriksa checksum, kesinambungan seq, dan hasil replay terhadap database saat ini
+
+        Replay = base terakhir + semua delta + event feed yang belum dibackup,
+        dibandingkan per baris dengan isi database di bawah write_lock.
+        Mengembalikan {'files', 'gaps', 'sheets', 'pending'}; semua kosong/0
+        kecuali pending berarti backup sah.
+        """
+        manifest = self.manifest()
+        report = {'files': [], 'gaps': [], 'sheets': {}, 'pending': 0}
+        for entry in manifest['bases'] + manifest['deltas']:
+            path = self._file(entry['file'])
+            if not os.path.exists(path):
+                report['files'].append(f"{entry['file']}: hilang")
+            elif self._checksum(path) != entry['sha256']:
+                report['files'].append(f"{entry['file']}: checksum tidak cocok")
+        if report['files'] or not manifest['bases']:
+            return report
+
+        base = manifest['bases'][-1]
+        deltas = [d for d in manifest['deltas'] if d['epoch'] == base['epoch']]
+        for previous, entry in zip(deltas, deltas[1:]):
+            if entry['first_seq'] != previous['last_seq'] + 1:
+                report['gaps'].append((previous['last_seq'], entry['first_seq']))
+
+        with db.write_lock():
+            events = self._events_after(manifest, base)
+            if base['epoch'] == manifest['epoch']:
+                pending, _ = self._feed(db).read_from(manifest['head']['offset'])
+                report['pending'] = len(pending)
+                events += pending
+            restored = self.replay(
+                pd.read_excel(self._file(base['file']), sheet_name=None, engine='openpyxl'), events
+            )
+            live = {name: db.get_sheet(name) for name in restored}
+
+        for name, data in restored.items():
+            key = SHEET_KEYS.get(name)
+            if key is None or key not in data.columns:
+                continue
+            expected, _ = self._keyed(db, name, data)
+            actual, duplicated = self._keyed(db, name, live[name])
+            # Baris dengan kunci ganda tidak bisa diwakili event per baris
+            differs = {k for k in set(expected) | set(actual) if expected.get(k) != actual.get(k)} | duplicated
+            if differs:
+                report['sheets'][name] = sorted(differs, key=str)
+        return report
+
+    @staticmethod
+    def _keyed(db, sheet_name, data):
+        """Baris (format penyimpanan) per kunci, beserta kunci yang muncul lebih dari sekali"""
+        key = SHEET_KEYS[sheet_name]
+        data = db._normalize(sheet_name, data)
+        data = data[data[key].notna()]
+        duplicated = set(data.loc[data[key].duplicated(keep=False), key])
+        rows = data.drop_duplicates(key, keep='last').set_index(key, drop=False).to_dict('index')
+        return rows, duplicated
+
+# ===============================
+# CLASS: CREDENTIAL STORE
+# ===============================
+class CredentialStore:
+    """Hash password per username dalam dict (lookup O(1)), diverifikasi di thread pool terbatas
+
+    Pool dan antreannya dipakai bersama semua store dalam satu proses, sehingga
+    lonjakan login hanya memakai VERIFY_WORKERS core dan permintaan di luar
+    antrean langsung ditolak ('busy') alih-alih menumpuk dan membuat UI macet.
+    """
+    _pool = None
+    _slots = None
+    _pool_lock = threading.Lock()
+
+    def __init__(self, db, sheet_name='users'):
+        self.db = db
+        self.sheet_name = sheet_name
+        self.columns = ['username', 'password'] + (['active'] if sheet_name == 'users' else [])
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._version = None
+        # Username tak dikenal tetap diverifikasi agar waktunya tidak membocorkan keberadaan akun
+        self._dummy_hash = db._hash_password(secrets.token_hex(8))
+
+    @classmethod
+    def _executor(cls):
+        with cls._pool_lock:
+            if cls._pool is None:
+                cls._pool = ThreadPoolExecutor(max_workers=VERIFY_WORKERS, thread_name_prefix='verify')
+                cls._slots = threading.BoundedSemaphore(VERIFY_WORKERS + VERIFY_QUEUE)
+            return cls._pool, cls._slots
+
+    def _refresh(self):
+        """Membangun ulang dict username -> (hash, aktif) jika sheet berubah
+
+        Jika pembacaan gagal, dict dan versi lama dipertahankan sehingga
+        pemanggilan berikutnya mencoba membaca lagi.
+        """
+        version = self.db.get_version(self.sheet_name)
+        with self._lock:
+            if version == self._version:
+                return
+        try:
+            with self.db.strict_reads():
+                data = self.db.get_sheet(self.sheet_name, columns=self.columns)
+        except Exception as e:
+            st.error(f"Error membaca sheet {self.sheet_name}: {e}")
+            return
+        data = data.reindex(columns=self.columns)
+        active = data['active'].fillna(True) if 'active' in data else pd.Series(True, index=data.index)
+        entries = dict(zip(data['username'].astype(str), zip(data['password'], active.astype(bool))))
+        with self._lock:
+            self._entries = entries
+            self._version = version
+
+    def verify(self, username, password, timeout=VERIFY_TIMEOUT):
+        """Memeriksa kredensial; mengembalikan 'ok', 'invalid', 'inactive', atau 'busy'"""
+        self._refresh()
+        with self._lock:
+            entry = self._entries.get(str(username))
+        stored, active = entry if entry is not None else (self._dummy_hash, True)
+
+        pool, slots = self._executor()
+        if not slots.acquire(blocking=False):
+            return 'busy'
+        try:
+            future = pool.submit(verify_password, password, stored)
+        except Exception:
+            slots.release()
+            raise
+        # Slot baru dilepas saat hash selesai dihitung, juga jika pemanggil berhenti menunggu
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            valid = future.result(timeout)
+        except FutureTimeoutError:
+            return 'busy'
+
+        if entry is None or not valid:
+            return 'invalid'
+        if needs_rehash(stored, self.db.password_iterations):
+            self._upgrade(username, password)
+        return 'ok' if active else 'inactive'
+
+    def _upgrade(self, username, password):
+        """Mengganti hash lama/lemah dengan hash baru setelah password terbukti benar"""
+        hashed = self.db._hash_password(password)
+        with self.db.write_lock():
+            data = self.db.get_sheet(self.sheet_name)
+            data.loc[data['username'].astype(str) == str(username), 'password'] = hashed
+            self.db.save_sheet(self.sheet_name, data)
+
+# ===============================
+# CLASS: USER MANAGEMENT
+# ===============================
+class UserManager:
+    def __init__(self, db):
+        self.db = db
+        self.credentials = CredentialStore(db, 'users')
+        self.admin_credentials = CredentialStore(db, 'admin')
+    
+    def register_user(self, username, password, email):
+        """Registrasi user baru"""
+        # Validasi input
+        if not username or not password or not email:
+            return False, "Semua field harus diisi"
+
+        hashed = self.db._hash_password(password)
+        with self.db.write_lock():
+            users_df = self.db.get_sheet('users')
+
+            # Cek jika username sudah ada
+            if not users_df.empty and username in users_df['username'].values:
+                return False, "Username sudah terdaftar"
+
+            # Tambah user baru
+            new_user = pd.DataFrame({
+                'username': [username],
+                'password': [hashed],
+                'email': [email],
+                'created_at': [datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
+                'active': [True]
+            })
+
+            users_df = pd.concat([users_df, new_user], ignore_index=True)
+            saved = self.db.save_sheet('users', users_df)
+
+        if saved:
+            return True, "Registrasi berhasil! Silakan login."
+        else:
+            return False, "Gagal menyimpan data user"
+    
+    def login_user(self, username, password):
+        """Login user biasa"""
+        status = self.credentials.verify(username, password)
+        if status == 'busy':
+            return False, "Server sedang sibuk, silakan coba lagi"
+        if status == 'inactive':
+            return False, "Akun telah dinonaktifkan"
+        if status == 'ok':
+            return True, "Login berhasil!"
+        return False, "Username atau password salah"
+    
+    def login_admin(self, username, password):
+        """Login admin"""
+        status = self.admin_credentials.verify(username, password)
+        if status == 'busy':
+            return False, "Server sedang sibuk, silakan coba lagi"
+        if status == 'ok':
+            return True, "Login admin berhasil!"
+        return False, "Username atau password admin salah"
+
+# ===============================
+# CLASS: BOOK MANAGEMENT
+# ===============================
+class BookManager:
+    def __init__(self, db):
+        self.db = db
+        self._listeners = []
+
+    def subscribe(self, listener):
+        """Mendaftarkan listener(event, transaction) untuk event 'borrow' dan 'return'"""
+        self._listeners.append(listener)
+
+    def _notify(self, event, transaction):
+        """Memberi tahu komponen turunan (indeks, cache) setelah transaksi tersimpan"""
+        for listener in self._listeners:
+            listener(event, transaction)
+    
+    def get_all_books(self):
+        """Mendapatkan semua buku"""
+        return self.db.get_sheet('books')
+    
+    def get_available_books(self, columns=('book_id', 'title', 'author', 'year', 'category',
+                                           'copies', 'available_copies')):
+        """Mendapatkan buku yang masih punya eksemplar tersedia (hanya kolom yang dibutuhkan tampilan)"""
+        return self.db.get_sheet(
+            'books',
+            columns=list(columns),
+            filters=[('available_copies', '>', 0)]
+        )
+    
+    def add_book(self, book_data):
+        """Menambah buku baru (book_data['copies'] = jumlah eksemplar, default 1)"""
+        with self.db.write_lock():
+            books_df = self.db.get_sheet('books')
+
+            # Generate book_id
+            if books_df.empty:
+                new_id = 1
+            else:
+                new_id = books_df['book_id'].max() + 1
+
+            copies = int(book_data.get('copies', 1))
+            book_data['book_id'] = new_id
+            book_data['copies'] = copies
+            book_data['available_copies'] = copies
+            book_data['available'] = copies > 0
+            book_data['added_date'] = datetime.now().strftime("%Y-%m-%d")
+
+            new_book = self.db.apply_schema('books', pd.DataFrame([book_data]))
+            books_df = pd.concat([books_df, new_book], ignore_index=True)
+            saved = self.db.save_sheet('books', books_df)
+
+        if saved:
+            return True, f"Buku berhasil ditambahkan dengan ID: {new_id}"
+        else:
+            return False, "Gagal menambahkan buku"
+    
+    def merge_copies(self, dry_run=False):
+        """Menggabungkan baris duplikat satu judul (ISBN sama, atau judul+penulis) menjadi satu baris
+
+        copies dan available_copies dijumlahkan ke book_id terkecil; transaksi
+        yang merujuk baris duplikat dipindahkan ke book_id tersebut. Semua
+        perubahan disimpan dalam satu commit. Mengembalikan (berhasil, jumlah baris digabung).
+        """
+        with self.db.write_lock():
+            books_df = self.db.get_sheet('books')
+            transactions_df = self.db.get_sheet('transactions')
+            if books_df.empty:
+                return True, 0
+
+            isbn = books_df['isbn'].astype(str).str.strip()
+            has_isbn = books_df['isbn'].notna() & ~isbn.isin(['', 'nan'])
+            title_key = books_df['title'].astype(str).str.strip().str.lower() + '|' + \
+                books_df['author'].astype(str).str.strip().str.lower()
+            group = ('isbn:' + isbn).where(has_isbn, 'title:' + title_key)
+            keep = books_df.groupby(group)['book_id'].transform('min')
+            duplicated = (books_df['book_id'] != keep).to_numpy()
+            if not duplicated.any() or dry_run:
+                return True, int(duplicated.sum())
+
+            totals = books_df.groupby(keep)[['copies', 'available_copies']].sum()
+            merged = books_df[~duplicated].copy()
+            merged['copies'] = totals['copies'].reindex(merged['book_id']).to_numpy()
+            merged['available_copies'] = totals['available_copies'].reindex(merged['book_id']).to_numpy()
+            merged['available'] = merged['available_copies'] > 0
+
+            remap = dict(zip(books_df['book_id'][duplicated], keep[duplicated]))
+            if not transactions_df.empty:
+                transactions_df['book_id'] = transactions_df['book_id'].replace(remap)
+            saved = self.db.save_sheets({'books': merged, 'transactions': transactions_df})
+        return saved, int(duplicated.sum())
+
+    def borrow_book(self, username, book_id):
+        """Meminjam satu eksemplar buku
+
+        Cek ketersediaan, pengurangan available_copies, dan transaksi baru
+        dijalankan di bawah write_lock dan disimpan dalam satu commit.
+        """
+        with self.db.write_lock():
+            books_df = self.db.get_sheet('books')
+            transactions_df = self.db.get_sheet('transactions')
+
+            # Cek ketersediaan buku
+            book = books_df[books_df['book_id'] == book_id]
+            if book.empty:
+                return False, "Buku tidak ditemukan"
+
+            available_copies = book.iloc[0]['available_copies']
+            if pd.isna(available_copies) or available_copies <= 0:
+                return False, "Buku sedang dipinjam"
+
+            # Satu user hanya meminjam satu eksemplar per judul
+            if not transactions_df.empty and (
+                (transactions_df['username'] == username) &
+                (transactions_df['book_id'] == book_id) &
+                (transactions_df['status'] == 'borrowed')
+            ).any():
+                return False, "Anda sedang meminjam buku ini"
+
+            # Kurangi eksemplar tersedia
+            book_mask = books_df['book_id'] == book_id
+            books_df.loc[book_mask, 'available_copies'] = available_copies - 1
+            books_df.loc[book_mask, 'available'] = available_copies - 1 > 0
+
+            # Generate transaction_id
+            if transactions_df.empty:
+                new_transaction_id = 1
+            else:
+                new_transaction_id = transactions_df['transaction_id'].max() + 1
+
+            # Hitung tanggal jatuh tempo (14 hari dari sekarang)
+            borrow_date = datetime.now()
+            due_date = borrow_date + pd.DateOffset(days=LOAN_PERIOD_DAYS)
+
+            # Tambah transaksi
+            new_transaction = pd.DataFrame({
+                'transaction_id': [new_transaction_id],
+                'username': [username],
+                'book_id': [book_id],
+                'book_title': [book.iloc[0]['title']],
+                'borrow_date': [borrow_date.strftime("%Y-%m-%d")],
+                'due_date': [due_date.strftime("%Y-%m-%d")],
+                'return_date': [""],
+                'status': ['borrowed'],
+                'fine': [0]
+            })
+            new_transaction = self.db.apply_schema('transactions', new_transaction)
+
+            transactions_df = pd.concat([transactions_df, new_transaction], ignore_index=True)
+
+            # Simpan perubahan
+            saved = self.db.save_sheets({'books': books_df, 'transactions': transactions_df})
+
+        if saved:
+            self._notify('borrow', new_transaction.iloc[0].to_dict())
+            return True, f"Buku '{book.iloc[0]['title']}' berhasil dipinjam. Jatuh tempo: {due_date.strftime('%Y-%m-%d')}"
+        else:
+            return False, "Gagal memproses peminjaman"
+    
+    def return_book(self, transaction_id):
+        """Mengembalikan buku (available_copies bertambah dalam commit yang sama)"""
+        print(f"DEBUG: return_book called with transaction_id={transaction_id}")
+
+        with self.db.write_lock():
+            transactions_df = self.db.get_sheet('transactions')
+            books_df = self.db.get_sheet('books')
+
+            print(f"DEBUG: Transactions DataFrame shape: {transactions_df.shape}")
+            print(f"DEBUG: Books DataFrame shape: {books_df.shape}")
+
+            # Cek transaksi
+            transaction = transactions_df[transactions_df['transaction_id'] == transaction_id]
+            if transaction.empty:
+                print("DEBUG: Transaction not found")
+                return False, "Transaksi tidak ditemukan"
+
+            if transaction.iloc[0]['status'] == 'returned':
+                print("DEBUG: Book already returned")
+                return False, "Buku sudah dikembalikan"
+
+            book_id = transaction.iloc[0]['book_id']
+            print(f"DEBUG: Book ID to return: {book_id}")
+
+            # Tambah eksemplar tersedia, tidak melebihi jumlah eksemplar
+            book_mask = books_df['book_id'] == book_id
+            available_copies = (books_df.loc[book_mask, 'available_copies'].fillna(0) + 1).clip(
+                upper=books_df.loc[book_mask, 'copies'].fillna(1)
+            )
+            books_df.loc[book_mask, 'available_copies'] = available_copies
+            books_df.loc[book_mask, 'available'] = available_copies > 0
+            print("DEBUG: Book availability updated")
+
+            # Update transaksi
+            return_date = datetime.now()
+            transactions_df.loc[transactions_df['transaction_id'] == transaction_id, 'return_date'] = pd.Timestamp(return_date.date())
+            transactions_df.loc[transactions_df['transaction_id'] == transaction_id, 'status'] = 'returned'
+            print(f"DEBUG: Transaction updated with return_date: {return_date.strftime('%Y-%m-%d')}")
+
+            # Hitung denda jika terlambat
+            due_date = pd.to_datetime(transaction.iloc[0]['due_date'])
+            if return_date > due_date:
+                days_late = (return_date - due_date).days
+                fine = days_late * FINE_PER_DAY
+                transactions_df.loc[transactions_df['transaction_id'] == transaction_id, 'fine'] = fine
+                print(f"DEBUG: Fine calculated: {fine}")
+            else:
+                print("DEBUG: No fine")
+
+            # Simpan perubahan
+            saved = self.db.save_sheets({'books': books_df, 'transactions': transactions_df})
+            print(f"DEBUG: Books and transactions saved: {saved}")
+
+        if saved:
+            print(f"DEBUG: Return successful for transaction {transaction_id}")
+            updated = transactions_df[transactions_df['transaction_id'] == transaction_id]
+            self._notify('return', updated.iloc[0].to_dict())
+            return True, "Buku berhasil dikembalikan"
+        else:
+            print(f"DEBUG: Return failed for transaction {transaction_id}")
+            return False, "Gagal memproses pengembalian"
+
+# ===============================
+# CLASS: INTEGRITY CHECKER
+# ===============================
+# Nama pemeriksaan -> keterangan; id yang dilaporkan adalah book_id atau transaction_id
+INTEGRITY_CHECKS = {
+    'duplicate_book_id': "book_id ganda di sheet books",
+    'duplicate_transaction_id': "transaction_id ganda di sheet transactions",
+    'available_copies_mismatch': "available_copies/available tidak sama dengan copies - pinjaman aktif (book_id)",
+    'over_borrowed': "Pinjaman aktif melebihi jumlah eksemplar (book_id)",
+    'orphan_book_id': "Transaksi dengan book_id yang tidak ada (transaction_id)",
+    'due_before_borrow': "due_date sebelum borrow_date (transaction_id)",
+    'negative_fine': "Denda negatif (transaction_id)",
+}
+
+# Masalah yang tidak bisa diputuskan otomatis dan harus ditangani admin
+MANUAL_CHECKS = ('over_borrowed', 'orphan_book_id')
+
+class IntegrityChecker:
+    """Pemeriksaan konsistensi lintas sheet books/transactions dalam satu pass vektor"""
+    BOOK_COLUMNS = ['book_id', 'copies', 'available_copies', 'available']
+    TRANSACTION_COLUMNS = ['transaction_id', 'book_id', 'borrow_date', 'due_date', 'status', 'fine']
+
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def _ids(values):
+        return np.unique(pd.Series(values).dropna().to_numpy(dtype='int64')).tolist()
+
+    def check(self, books_df=None, transactions_df=None):
+        """Menjalankan semua pemeriksaan; mengembalikan {nama: daftar id bermasalah}"""
+        if books_df is None:
+            books_df = self.db.get_sheet('books', columns=self.BOOK_COLUMNS)
+        if transactions_df is None:
+            transactions_df = self.db.get_sheet('transactions', columns=self.TRANSACTION_COLUMNS)
+        books = self.db.apply_schema('books', books_df.reindex(columns=self.BOOK_COLUMNS))
+        loans = self.db.apply_schema('transactions', transactions_df.reindex(columns=self.TRANSACTION_COLUMNS))
+
+        book_ids = books['book_id']
+        transaction_ids = loans['transaction_id']
+        open_loans = loans.loc[(loans['status'] == 'borrowed').fillna(False).to_numpy(bool), 'book_id']
+        open_counts = open_loans.value_counts()
+        copies, expected, open_per_book = self._expected_copies(books, open_counts)
+        available_copies = books['available_copies'].fillna(-1).to_numpy(dtype='int64')
+        available = books['available'].fillna(False).to_numpy(dtype=bool)
+
+        return {
+            'duplicate_book_id': self._ids(book_ids[book_ids.duplicated(keep=False)]),
+            'duplicate_transaction_id': self._ids(transaction_ids[transaction_ids.duplicated(keep=False)]),
+            'available_copies_mismatch': self._ids(
+                book_ids[(available_copies != expected) | (available != (expected > 0))]
+            ),
+            'over_borrowed': self._ids(book_ids[open_per_book > copies]),
+            'orphan_book_id': self._ids(transaction_ids[~loans['book_id'].isin(book_ids).to_numpy()]),
+            'due_before_borrow': self._ids(
+                transaction_ids[(loans['due_date'] < loans['borrow_date']).fillna(False).to_numpy(bool)]
+            ),
+            'negative_fine': self._ids(transaction_ids[(loans['fine'] < 0).fillna(False).to_numpy(bool)]),
+        }
+
+    @staticmethod
+    def _expected_copies(books, open_counts):
+        """(copies, available_copies seharusnya, pinjaman aktif) per baris buku"""
+        copies = books['copies'].fillna(1).to_numpy(dtype='int64')
+        open_per_book = open_counts.reindex(books['book_id']).fillna(0).to_numpy(dtype='int64')
+        return copies, np.maximum(copies - open_per_book, 0), open_per_book
+
+    @staticmethod
+    def _renumber(data, key):
+        """Baris dengan id ganda (selain yang pertama) diberi id baru setelah id terbesar"""
+        duplicated = (data[key].duplicated(keep='first') & data[key].notna()).to_numpy()
+        if duplicated.any():
+            start = int(data[key].max()) + 1
+            data.loc[duplicated, key] = np.arange(start, start + duplicated.sum())
+
+    def repair(self, dry_run=False):
+        """Memperbaiki semua masalah yang bisa diperbaiki otomatis dalam satu commit
+
+        Mengembalikan (berhasil, masalah sebelum, masalah sesudah). Masalah di
+        MANUAL_CHECKS tetap dilaporkan dan tidak diubah.
+        """
+        with self.db.write_lock():
+            return self._repair(dry_run)
+
+    def _repair(self, dry_run):
+        books_df = self.db.get_sheet('books')
+        transactions_df = self.db.get_sheet('transactions')
+        before = self.check(books_df, transactions_df)
+        if not any(ids for name, ids in before.items() if name not in MANUAL_CHECKS):
+            return True, before, before
+
+        books_df = books_df.copy()
+        transactions_df = transactions_df.copy()
+        self._renumber(books_df, 'book_id')
+        self._renumber(transactions_df, 'transaction_id')
+
+        loan_period = pd.Timedelta(days=LOAN_PERIOD_DAYS)
+        bad_due = (transactions_df['due_date'] < transactions_df['borrow_date']).fillna(False).to_numpy(bool)
+        transactions_df.loc[bad_due, 'due_date'] = transactions_df.loc[bad_due, 'borrow_date'] + loan_period
+        transactions_df.loc[(transactions_df['fine'] < 0).fillna(False).to_numpy(bool), 'fine'] = 0
+
+        # Eksemplar tersedia diturunkan ulang dari jumlah eksemplar dan pinjaman aktif
+        open_counts = transactions_df.loc[transactions_df['status'] == 'borrowed', 'book_id'].value_counts()
+        books_df['copies'] = books_df['copies'].fillna(1)
+        _, expected, _ = self._expected_copies(books_df, open_counts)
+        books_df['available_copies'] = pd.array(expected, dtype='Int32')
+        books_df['available'] = pd.array(expected > 0, dtype='boolean')
+
+        after = self.check(books_df, transactions_df)
+        if dry_run:
+            return True, before, after
+        saved = self.db.save_sheets({'books': books_df, 'transactions': transactions_df})
+        return saved, before, after
+
+# ===============================
+# CLASS: LOAN INDEX (basis indeks turunan)
+# ===============================
+class LoanIndex:
+    """Basis struktur data turunan sheet transactions yang diperbarui per event
+
+    Subclass mengisi rebuild() (bangun ulang penuh) dan apply() (perubahan
+    inkremental untuk satu peminjaman/pengembalian). Event datang dari change
+    feed LibraryDatabase (on_change), baik commit lokal maupun proses lain;
+    jika file diubah tanpa event, indeks dibangun ulang saat berikutnya dipakai.
+    """
+    sheets = ('transactions',)
+
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.RLock()
+        self._version = None
+
+    def rebuild(self):
+        raise NotImplementedError
+
+    def apply(self, event, transaction):
+        raise NotImplementedError
+
+    def ensure_fresh(self):
+        """Membangun ulang indeks jika versi data berbeda dari versi indeks"""
+        # change_lock lebih dulu (urutan yang sama dengan commit yang meneruskan event):
+        # data yang dibaca rebuild tidak mungkin berisi commit yang event-nya belum diterapkan
+        with self.db.change_lock(), self._lock:
+            version = self.db.get_version(*self.sheets)
+            if self._version != version:
+                # Gagal baca dilempar: indeks kosong tidak boleh tercatat sebagai versi ini
+                with self.db.strict_reads():
+                    self.rebuild()
+                self._version = version
+
+    def on_change(self, change):
+        """Listener change feed LibraryDatabase: event baris transactions -> event peminjaman"""
+        if change['sheet'] not in self.sheets:
+            return
+        values = change['changes']
+        if change['op'] == 'insert' and values.get('status') == 'borrowed':
+            row = self.db.apply_schema('transactions', pd.DataFrame([{'transaction_id': change['key'], **values}]))
+            self.on_loan('borrow', row.iloc[0].to_dict())
+        elif change['op'] == 'update' and values.get('status') == 'returned':
+            self.on_loan('return', {'transaction_id': change['key'], **values})
+        else:
+            # Hapus/koreksi data tidak punya bentuk inkremental: bangun ulang saat dibutuhkan
+            with self._lock:
+                self._version = None
+
+    @contextlib.contextmanager
+    def fresh(self):
+        """Memegang kunci indeks dalam keadaan mutakhir (untuk query)"""
+        with self.db.change_lock(), self._lock:
+            self.ensure_fresh()
+            yield
+
+    def on_loan(self, event, transaction):
+        """Menerapkan event peminjaman secara inkremental"""
+        with self.db.change_lock(), self._lock:
+            version = self.db.get_version(*self.sheets)
+            if self._version is None or version[0] != self._version[0]:
+                # File diubah proses lain sejak terakhir dibangun: bangun ulang saat dibutuhkan
+                self._version = None
+                return
+            self.apply(event, transaction)
+            self._version = version
+
+# ===============================
+# CLASS: BORROWING CUBE
+# ===============================
+# Granularitas waktu cube -> frekuensi pandas Period
+CUBE_GRAINS = {
+    'day': 'D',
+    'week': 'W',
+    'month': 'M',
+    'year': 'Y',
+}
+
+TREND_LABELS = {'day': 'Harian', 'week': 'Mingguan', 'month': 'Bulanan', 'year': 'Tahunan'}
+TREND_AXIS = {'day': 'Tanggal', 'week': 'Minggu', 'month': 'Bulan', 'year': 'Tahun'}
+
+class BorrowingCube(LoanIndex):
+    """Agregat jumlah peminjaman per periode x kategori x buku
+
+    Untuk setiap granularitas disimpan rollup per periode (total), per kategori
+    dan per buku. Query tren hanya membaca rollup sehingga biayanya sebanding
+    dengan jumlah periode, bukan jumlah transaksi. Peminjaman baru menambah
+    satu ke sel yang relevan.
+    """
+
+    def rebuild(self):
+        """Membangun ulang semua rollup dari transactions dan books (vectorized)"""
+        transactions_df = self.db.get_sheet('transactions', columns=['book_id', 'borrow_date'])
+        books_df = self.db.get_sheet('books', columns=['book_id', 'category'])
+
+        self._categories = {
+            int(b): str(c) for b, c in zip(books_df['book_id'], books_df['category'])
+            if pd.notna(b)
+        }
+        loans = transactions_df.dropna()
+        book_ids = loans['book_id'].astype(int)
+        categories = book_ids.map(self._categories).fillna('Lainnya')
+
+        self._totals, self._by_category, self._by_book = {}, {}, {}
+        for grain, freq in CUBE_GRAINS.items():
+            periods = loans['borrow_date'].dt.to_period(freq)
+            counts = pd.DataFrame({
+                'period': periods, 'category': categories, 'book_id': book_ids
+            }).groupby(['period', 'category', 'book_id']).size()
+
+            self._totals[grain] = counts.groupby(level='period').sum().to_dict()
+            self._by_category[grain] = self._nested(counts.groupby(level=['category', 'period']).sum())
+            self._by_book[grain] = self._nested(counts.groupby(level=['book_id', 'period']).sum())
+
+    @staticmethod
+    def _nested(counts):
+        """Series ber-index (kunci, periode) -> {kunci: {periode: jumlah}}"""
+        nested = {}
+        for (key, period), count in counts.items():
+            nested.setdefault(key, {})[period] = int(count)
+        return nested
+
+    def _category_of(self, book_id):
+        """Kategori buku; buku yang ditambahkan setelah rebuild dicari langsung ke sheet"""
+        if book_id not in self._categories:
+            book = self.db.get_sheet(
+                'books', columns=['category'], filters=[('book_id', '==', book_id)]
+            )
+            self._categories[book_id] = str(book.iloc[0]['category']) if not book.empty else 'Lainnya'
+        return self._categories[book_id]
+
+    def apply(self, event, transaction):
+        """Menambah satu peminjaman ke setiap granularitas"""
+        if event != 'borrow':
+            return
+        book_id = int(transaction['book_id'])
+        category = self._category_of(book_id)
+        borrow_date = pd.Timestamp(transaction['borrow_date'])
+        for grain, freq in CUBE_GRAINS.items():
+            period = borrow_date.to_period(freq)
+            for cells in (self._totals[grain],
+                          self._by_category[grain].setdefault(category, {}),
+                          self._by_book[grain].setdefault(book_id, {})):
+                cells[period] = cells.get(period, 0) + 1
+
+    def series(self, grain='month', category=None, book_id=None):
+        """Jumlah peminjaman per periode, opsional difilter kategori atau buku"""
+        with self.fresh():
+            if book_id is not None:
+                cells = self._by_book[grain].get(int(book_id), {})
+            elif category is not None:
+                cells = self._by_category[grain].get(category, {})
+            else:
+                cells = self._totals[grain]
+            return pd.Series(cells, dtype='int64').sort_index()
+
+    def categories(self):
+        """Daftar kategori yang memiliki data peminjaman"""
+        with self.fresh():
+            return sorted(self._by_category['month'].keys())
+
+# ===============================
+# CLASS: DEMAND FORECASTER
+# ===============================
+# Jumlah bulan lengkap terakhir yang dipakai untuk fitting model permintaan
+FORECAST_MONTHS = 12
+# Kuantil permintaan bulan depan yang ditampilkan (skenario ramai)
+FORECAST_QUANTILE = 0.9
+# Berapa kali satu eksemplar bisa dipinjam dalam sebulan
+LOANS_PER_COPY = max(1, 30 // LOAN_PERIOD_DAYS)
+
+FORECAST_LEVELS = {'book': 'Per Buku', 'category': 'Per Kategori'}
+
+class DemandForecaster(LoanIndex):
+    """Perkiraan jumlah peminjaman bulan depan per buku dan per kategori
+
+    Per buku disimpan jumlah peminjaman tiap bulan pada FORECAST_MONTHS bulan
+    lengkap terakhir beserta statistik cukupnya (jumlah dan jumlah kuadrat).
+    Model di-fit sekaligus untuk semua deret: Poisson (laju = rata-rata), atau
+    binomial negatif (method of moments) jika varians melebihi rata-rata.
+    Peminjaman baru menambah hitungan bulan berjalan; saat bulan berganti
+    jendela digeser satu kolom tanpa membaca ulang transaksi. Hasil fit di-cache
+    sampai jendela berubah.
+    """
+
+    def __init__(self, db):
+        super().__init__(db)
+        self._fits = {}
+        self.fit_version = 0
+
+    @staticmethod
+    def _month_number(timestamp):
+        return timestamp.year * 12 + timestamp.month - 1
+
+    def rebuild(self):
+        """Mengisi jendela bulanan semua buku dari transactions (vectorized)"""
+        transactions_df = self.db.get_sheet('transactions', columns=['book_id', 'borrow_date'])
+        loans = transactions_df.dropna()
+        months = (loans['borrow_date'].dt.year * 12 + loans['borrow_date'].dt.month - 1).to_numpy()
+        book_ids = loans['book_id'].astype(int).to_numpy()
+
+        self._current = self._month_number(pd.Timestamp.now())
+        self._first = int(months.min()) if len(months) else None
+        self._rows = {int(b): i for i, b in enumerate(np.unique(book_ids))}
+        self._window = np.zeros((len(self._rows), FORECAST_MONTHS), dtype=np.int64)
+        self._month_to_date = np.zeros(len(self._rows), dtype=np.int64)
+
+        rows = np.array([self._rows[b] for b in book_ids], dtype=np.int64)
+        age = self._current - months
+        in_window = (age >= 1) & (age <= FORECAST_MONTHS)
+        np.add.at(self._window, (rows[in_window], FORECAST_MONTHS - age[in_window]), 1)
+        np.add.at(self._month_to_date, rows[age == 0], 1)
+
+        self._sum = self._window.sum(axis=1)
+        self._sumsq = (self._window ** 2).sum(axis=1)
+        self._invalidate()
+
+    def _invalidate(self):
+        self._fits = {}
+        self.fit_version += 1
+
+    def _roll(self):
+        """Menggeser jendela jika bulan kalender sudah berganti sejak terakhir diperbarui"""
+        current = self._month_number(pd.Timestamp.now())
+        steps = current - self._current
+        if steps <= 0:
+            return
+        for _ in range(min(steps, FORECAST_MONTHS + 1)):
+            new, old = self._month_to_date, self._window[:, 0]
+            self._sum += new - old
+            self._sumsq += new ** 2 - old ** 2
+            self._window = np.column_stack([self._window[:, 1:], new])
+            self._month_to_date = np.zeros_like(new)
+        self._current = current
+        self._invalidate()
+
+    def _row(self, book_id):
+        """Baris jendela untuk buku; buku tanpa riwayat mendapat baris nol baru"""
+        if book_id not in self._rows:
+            self._rows[book_id] = len(self._rows)
+            self._window = np.vstack([self._window, np.zeros((1, FORECAST_MONTHS), dtype=np.int64)])
+            self._month_to_date = np.append(self._month_to_date, 0)
+            self._sum = np.append(self._sum, 0)
+            self._sumsq = np.append(self._sumsq, 0)
+        return self._rows[book_id]
+
+    def apply(self, event, transaction):
+        """Menambah satu peminjaman ke bulan berjalan (atau ke jendela untuk data mundur)"""
+        if event != 'borrow':
+            return
+        self._roll()
+        month = self._month_number(pd.Timestamp(transaction['borrow_date']))
+        age = self._current - month
+        if age < 0 or age > FORECAST_MONTHS:
+            return
+        row = self._row(int(transaction['book_id']))
+        self._first = month if self._first is None else min(self._first, month)
+        if age == 0:
+            # Bulan berjalan belum masuk fit; parameter tetap berlaku
+            self._month_to_date[row] += 1
+            return
+        column = FORECAST_MONTHS - age
+        count = self._window[row, column]
+        self._window[row, column] = count + 1
+        self._sum[row] += 1
+        self._sumsq[row] += 2 * count + 1
+        self._invalidate()
+
+    def months_observed(self):
+        """Jumlah bulan lengkap dalam jendela sejak peminjaman pertama"""
+        if self._first is None:
+            return 0
+        return int(np.clip(self._current - self._first, 0, FORECAST_MONTHS))
+
+    @staticmethod
+    def fit(total, total_sq, months):
+        """Parameter model untuk banyak deret sekaligus dari statistik cukupnya
+
+        Mengembalikan (mean, negbin, r, p): negbin menandai deret over-dispersed
+        yang dimodelkan binomial negatif nbinom(r, p); sisanya Poisson(mean).
+        """
+        total = np.asarray(total, dtype=float)
+        mean = total / months
+        var = (np.asarray(total_sq, dtype=float) - months * mean ** 2) / max(months - 1, 1)
+        negbin = (months > 1) & (var > mean) & (mean > 0)
+        # Method of moments: mean = r(1-p)/p, var = mean/p
+        p = np.where(negbin, mean / np.where(negbin, var, 1.0), 1.0)
+        r = np.where(negbin, mean ** 2 / np.where(negbin, var - mean, 1.0), 1.0)
+        return mean, negbin, r, p
+
+    @staticmethod
+    def predict(mean, negbin, r, p, capacity):
+        """(kuantil permintaan, peluang permintaan > kapasitas) untuk semua deret"""
+        quantile = np.where(
+            negbin,
+            stats.nbinom.ppf(FORECAST_QUANTILE, r, p),
+            stats.poisson.ppf(FORECAST_QUANTILE, mean)
+        )
+        shortage = np.where(
+            negbin,
+            stats.nbinom.sf(capacity, r, p),
+            stats.poisson.sf(capacity, mean)
+        )
+        return quantile, shortage
+
+    def _forecast(self, level):
+        """Fit + prediksi untuk semua buku/kategori pada sheet books saat ini
+
+        Mengembalikan (tabel terurut, baris jendela anggota, posisi grup anggota)
+        agar kolom bulan berjalan bisa diisi ulang tanpa fit ulang.
+        """
+        books_df = self.db.get_sheet('books', columns=['book_id', 'title', 'category', 'copies'])
+        books_df = books_df.dropna(subset=['book_id']).drop_duplicates('book_id').reset_index(drop=True)
+        rows = np.array([self._rows.get(int(b), -1) for b in books_df['book_id']], dtype=np.int64)
+        known = rows >= 0
+        copies = books_df['copies'].fillna(1).astype(int).to_numpy()
+
+        if level == 'category':
+            category = books_df['category'].astype(object).fillna('Lainnya').astype(str)
+            codes, categories = pd.factorize(category, sort=True)
+            window = np.zeros((len(categories), FORECAST_MONTHS), dtype=np.int64)
+            np.add.at(window, codes[known], self._window[rows[known]])
+            total, total_sq = window.sum(axis=1), (window ** 2).sum(axis=1)
+            copies = np.bincount(codes, weights=copies, minlength=len(categories)).astype(int)
+            labels = pd.DataFrame({'category': categories})
+        else:
+            codes = np.arange(len(books_df))
+            total = np.zeros(len(books_df), dtype=np.int64)
+            total_sq = np.zeros(len(books_df), dtype=np.int64)
+            total[known] = self._sum[rows[known]]
+            total_sq[known] = self._sumsq[rows[known]]
+            labels = books_df[['book_id', 'title', 'category']].assign(book_id=books_df['book_id'].astype(int))
+
+        mean, negbin, r, p = self.fit(total, total_sq, self.months_observed())
+        capacity = copies * LOANS_PER_COPY
+        quantile, shortage = self.predict(mean, negbin, r, p, capacity)
+
+        result = labels.assign(
+            copies=copies,
+            capacity=capacity,
+            expected=mean.round(2),
+            quantile=quantile.astype(int),
+            model=np.where(negbin, 'Binomial negatif', 'Poisson'),
+            shortage_prob=shortage.round(3)
+        )
+        order = np.lexsort((-result['expected'].to_numpy(), -result['shortage_prob'].to_numpy()))
+        position = np.empty_like(order)
+        position[order] = np.arange(len(order))
+        return result.iloc[order].reset_index(drop=True), rows[known], position[codes[known]]
+
+    def forecast(self, level='book'):
+        """Perkiraan peminjaman bulan depan dan peluang kekurangan eksemplar
+
+        Kolom: expected (rata-rata), quantile (kuantil FORECAST_QUANTILE),
+        capacity (eksemplar x LOANS_PER_COPY), shortage_prob (P(permintaan >
+        kapasitas)), month_to_date (peminjaman bulan berjalan). Kosong jika
+        belum ada satu bulan lengkap data.
+        """
+        with self.fresh():
+            self._roll()
+            if self.months_observed() == 0:
+                return pd.DataFrame()
+            key = (level, self.db.get_version('books'))
+            if key not in self._fits:
+                with self.db.strict_reads():
+                    self._fits[key] = self._forecast(level)
+            result, members, groups = self._fits[key]
+            # Bulan berjalan berubah tiap peminjaman tanpa mengubah parameter model
+            month_to_date = np.bincount(
+                groups, weights=self._month_to_date[members], minlength=len(result)
+            ).astype(np.int64)
+        return result.assign(month_to_date=month_to_date)
+
+# ===============================
+# CLASS: LIBRARY ANALYTICS
+# ===============================
+# Jumlah proses worker analitik; 0 = job dijalankan langsung di thread pemanggil
+ANALYTICS_WORKERS = int(os.environ.get('LIBRARY_ANALYTICS_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+# Lama UI menunggu job sebelum rerun untuk mengecek lagi (detik)
+ANALYTICS_POLL_INTERVAL = 0.5
+
+class LibraryAnalytics:
+    """Statistik, tren, dan perkiraan peminjaman
+
+    Perhitungan berat (statistik, render grafik) bisa dijalankan di process
+    pool lewat *_job(): input dikirim sebagai snapshot read-only dan hasilnya
+    berupa Future yang di-cache per versi data, sehingga rerun berikutnya
+    memakai hasil yang sama sampai ada commit baru.
+    """
+    _pool = None
+    _pool_lock = threading.Lock()
+
+    def __init__(self, db):
+        self.db = db
+        self.cube = BorrowingCube(db)
+        self.forecaster = DemandForecaster(db)
+        self._jobs = {}  # kunci job -> (versi data, Future)
+        self._jobs_lock = threading.Lock()
+
+    @classmethod
+    def _executor(cls):
+        with cls._pool_lock:
+            if cls._pool is None:
+                # spawn: worker tidak mewarisi thread/lock server Streamlit hasil fork
+                cls._pool = ProcessPoolExecutor(
+                    max_workers=ANALYTICS_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return cls._pool
+
+    @classmethod
+    def _reset_executor(cls, pool):
+        with cls._pool_lock:
+            if cls._pool is pool:
+                cls._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, key, version, fn, make_args):
+        """Future fn(*make_args()), dipakai ulang selama versi data sama dan job tidak gagal
+
+        make_args baru dipanggil saat job perlu dikirim, sehingga rerun yang
+        memakai hasil cache tidak membaca data sama sekali.
+        """
+        with self._jobs_lock:
+            cached = self._jobs.get(key)
+            if cached is not None and cached[0] == version:
+                future = cached[1]
+                if not future.done() or (not future.cancelled() and future.exception() is None):
+                    return future
+            elif cached is not None:
+                cached[1].cancel()
+
+            args = make_args()
+            if ANALYTICS_WORKERS == 0:
+                future = Future()
+                try:
+                    future.set_result(fn(*args))
+                except Exception as e:
+                    future.set_exception(e)
+            else:
+                pool = self._executor()
+                try:
+                    future = pool.submit(fn, *args)
+                except (BrokenProcessPool, RuntimeError):
+                    # Worker mati (mis. kehabisan memori): buat pool baru sekali
+                    self._reset_executor(pool)
+                    future = self._executor().submit(fn, *args)
+                future.add_done_callback(self._drop_broken_pool(pool))
+            self._jobs[key] = (version, future)
+            return future
+
+    def _drop_broken_pool(self, pool):
+        def callback(future):
+            if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+                self._reset_executor(pool)
+        return callback
+
+    def _source(self, sheet_name, columns):
+        """Snapshot read-only untuk job: path Arrow bersama jika ada, selain itu salinan kolom"""
+        return self.db.snapshot_path(sheet_name) or self.db.get_sheet(sheet_name, columns=columns)
+
+    def stats_job(self):
+        """Future statistik peminjaman (lihat get_borrowing_stats)"""
+        return self._submit(
+            ('stats',), self.db.get_version('transactions'), analytics_jobs.borrowing_stats,
+            lambda: (self._source('transactions', ['book_id', 'status']),)
+        )
+
+    def trend_chart_job(self, grain='month', category=None):
+        """Future PNG grafik tren (None jika tidak ada data); deret dibaca dari BorrowingCube"""
+        return self._submit(
+            ('trend', grain, category), self.db.get_version('transactions', 'books'),
+            analytics_jobs.trend_chart, lambda: self._trend_args(grain, category)
+        )
+
+    def category_chart_job(self):
+        """Future PNG distribusi kategori buku (None jika tidak ada buku)"""
+        return self._submit(
+            ('category',), self.db.get_version('books'), analytics_jobs.category_chart,
+            lambda: (self._source('books', ['category']),)
+        )
+
+    def _trend_args(self, grain, category):
+        title = f"Trend Peminjaman {TREND_LABELS[grain]}" + (f" - {category}" if category else "")
+        return self.cube.series(grain, category=category), title, TREND_AXIS[grain]
+
+    def get_borrowing_stats(self):
+        """Analisis statistik peminjaman (langsung di thread pemanggil)"""
+        return analytics_jobs.borrowing_stats(self.db.get_sheet('transactions', columns=['book_id', 'status']))
+
+    def plot_borrowing_trend(self, grain='month', category=None):
+        """Visualisasi trend peminjaman (dibaca dari BorrowingCube)"""
+        chart = analytics_jobs.trend_chart(*self._trend_args(grain, category))
+        if chart is None:
+            st.warning("Tidak ada data transaksi untuk dianalisis")
+            return
+        st.image(chart)
+
+    def plot_category_distribution(self):
+        """Visualisasi distribusi kategori buku"""
+        chart = analytics_jobs.category_chart(self.db.get_sheet('books', columns=['category']))
+        if chart is None:
+            st.warning("Tidak ada data buku untuk dianalisis")
+            return
+        st.image(chart)
+
+    def forecast_demand(self, level='book'):
+        """Perkiraan permintaan bulan depan (parameter model di-cache di DemandForecaster)"""
+        return self.forecaster.forecast(level)
+
+# ===============================
+# CLASS: BOOK RECOMMENDER
+# ===============================
+class BookRecommender(LoanIndex):
+    """Rekomendasi "yang meminjam buku ini juga meminjam" dari matriks user x buku
+
+    Matriks peminjaman X (biner, sparse) dan matriks co-borrowing C = X^T X
+    disimpan di memori. Kemiripan dua buku adalah cosine:
+    C[i, j] / sqrt(C[i, i] * C[j, j]). Peminjaman baru hanya memperbarui baris
+    dan kolom buku yang terlibat; top-K tetangga dihitung ulang hanya untuk buku
+    yang skornya berubah.
+    """
+
+    def __init__(self, db, top_k=5):
+        super().__init__(db)
+        self.top_k = top_k
+
+    def rebuild(self):
+        """Membangun ulang matriks dari sheet transactions (vectorized)"""
+        transactions_df = self.db.get_sheet('transactions', columns=['username', 'book_id'])
+        transactions_df = transactions_df.dropna()
+
+        users = pd.Categorical(transactions_df['username'].astype(str))
+        books = pd.Categorical(transactions_df['book_id'].astype(int))
+        n_users, n_books = len(users.categories), len(books.categories)
+
+        borrowed = sparse.csr_matrix(
+            (np.ones(len(transactions_df), dtype=np.float64), (users.codes, books.codes)),
+            shape=(n_users, n_books)
+        )
+        borrowed.data[:] = 1.0  # duplikat (pinjam ulang) dihitung satu kali
+        cooc = (borrowed.T @ borrowed).tocsr()
+
+        self._user_index = {u: i for i, u in enumerate(users.categories)}
+        self._book_ids = [int(b) for b in books.categories]
+        self._book_index = {b: i for i, b in enumerate(self._book_ids)}
+        self._borrowed = borrowed.tolil()
+        self._cooc = cooc.tolil()
+        self._popularity = cooc.diagonal().astype(np.float64)
+        self._neighbours = self._all_top_k(cooc)
+
+    def _all_top_k(self, cooc):
+        """Top-K tetangga setiap buku dari matriks co-borrowing (csr)"""
+        n_books = cooc.shape[0]
+        if n_books == 0:
+            return {}
+        with np.errstate(divide='ignore'):
+            scale = np.where(self._popularity > 0, 1.0 / np.sqrt(self._popularity), 0.0)
+        similarity = (sparse.diags(scale) @ cooc @ sparse.diags(scale)).tocsr()
+        similarity.setdiag(0)
+        similarity.eliminate_zeros()
+
+        neighbours = {}
+        for i in range(n_books):
+            start, end = similarity.indptr[i], similarity.indptr[i + 1]
+            neighbours[i] = self._select_top_k(similarity.indices[start:end], similarity.data[start:end])
+        return neighbours
+
+    def _select_top_k(self, columns, scores):
+        """Memilih K skor terbesar tanpa mengurutkan seluruh baris"""
+        columns, scores = np.asarray(columns), np.asarray(scores)
+        if len(scores) > self.top_k:
+            keep = np.argpartition(-scores, self.top_k)[:self.top_k]
+            columns, scores = columns[keep], scores[keep]
+        order = np.argsort(-scores, kind='stable')
+        return [(self._book_ids[c], float(s)) for c, s in zip(columns[order], scores[order])]
+
+    def _row_top_k(self, i):
+        """Top-K untuk satu buku langsung dari baris lil matriks co-borrowing"""
+        columns = np.array(self._cooc.rows[i], dtype=np.int64)
+        counts = np.array(self._cooc.data[i], dtype=np.float64)
+        mask = columns != i
+        columns, counts = columns[mask], counts[mask]
+        if len(columns) == 0:
+            return []
+        scores = counts / np.sqrt(self._popularity[i] * self._popularity[columns])
+        return self._select_top_k(columns, scores)
+
+    def _ensure_capacity(self, n_users, n_books):
+        """Memperbesar matriks (kapasitas berlipat) saat ada user/buku baru"""
+        rows, cols = self._borrowed.shape
+        if n_users > rows or n_books > cols:
+            new_shape = (max(n_users, rows * 2), max(n_books, cols * 2))
+            self._borrowed.resize(new_shape)
+        size = self._cooc.shape[0]
+        if n_books > size:
+            new_size = max(n_books, size * 2)
+            self._cooc.resize((new_size, new_size))
+            self._popularity = np.concatenate([self._popularity, np.zeros(new_size - size)])
+
+    def apply(self, event, transaction):
+        """Menambah pasangan (user, buku) dari peminjaman baru dan memperbarui co-borrowing"""
+        if event != 'borrow':
+            return
+        username, book_id = str(transaction['username']), int(transaction['book_id'])
+        u = self._user_index.setdefault(username, len(self._user_index))
+        if book_id not in self._book_index:
+            self._book_index[book_id] = len(self._book_ids)
+            self._book_ids.append(book_id)
+        b = self._book_index[book_id]
+        self._ensure_capacity(len(self._user_index), len(self._book_ids))
+        if self._borrowed[u, b] != 0:
+            return
+
+        others = list(self._borrowed.rows[u])
+        self._borrowed[u, b] = 1
+        for j in others:
+            self._cooc[b, j] += 1
+            self._cooc[j, b] += 1
+        self._cooc[b, b] += 1
+        self._popularity[b] += 1
+        # Popularitas b berubah: skor b terhadap semua tetangganya ikut berubah
+        for j in [b] + list(self._cooc.rows[b]):
+            self._neighbours.pop(j, None)
+
+    def recommend(self, book_id, k=None):
+        """Daftar (book_id, skor) buku yang sering dipinjam bersama book_id"""
+        with self.fresh():
+            i = self._book_index.get(int(book_id))
+            if i is None:
+                return []
+            if i not in self._neighbours:
+                self._neighbours[i] = self._row_top_k(i)
+            return self._neighbours[i][:k or self.top_k]
+
+# ===============================
+# CLASS: DUE DATE INDEX
+# ===============================
+class DueDateIndex(LoanIndex):
+    """Pinjaman aktif terurut menurut (due_date, transaction_id)
+
+    Daftar kunci terurut dijaga dengan bisect saat pinjam/kembali, sehingga
+    "jatuh tempo dalam N hari" dan "terlambat" dijawab dalam O(log n + k)
+    tanpa memindai dan mem-parse ulang semua due_date.
+    """
+    COLUMNS = ['transaction_id', 'username', 'book_id', 'book_title', 'due_date']
+
+    def __init__(self, db):
+        super().__init__(db)
+        self._keys = []   # (ordinal due_date, transaction_id), terurut naik
+        self._loans = {}  # transaction_id -> (due_date, username, book_id, book_title)
+
+    def rebuild(self):
+        """Membaca ulang hanya pinjaman berstatus borrowed"""
+        loans = self.db.get_sheet(
+            'transactions',
+            columns=self.COLUMNS,
+            filters=[('status', '==', 'borrowed')]
+        ).reindex(columns=self.COLUMNS)
+        loans = loans[loans['transaction_id'].notna() & loans['due_date'].notna()]
+        self._loans = {
+            int(row.transaction_id): (
+                row.due_date.normalize(),
+                str(row.username),
+                None if pd.isna(row.book_id) else int(row.book_id),
+                str(row.book_title)
+            )
+            for row in loans.itertuples(index=False)
+        }
+        self._keys = sorted((loan[0].toordinal(), tid) for tid, loan in self._loans.items())
+
+    def apply(self, event, transaction):
+        """Menyisipkan pinjaman baru / menghapus pinjaman yang dikembalikan (bisect)"""
+        transaction_id = int(transaction['transaction_id'])
+        if event == 'return':
+            loan = self._loans.pop(transaction_id, None)
+            if loan is not None:
+                key = (loan[0].toordinal(), transaction_id)
+                i = bisect.bisect_left(self._keys, key)
+                if i < len(self._keys) and self._keys[i] == key:
+                    del self._keys[i]
+            return
+        due_date = pd.Timestamp(transaction['due_date'])
+        if event != 'borrow' or pd.isna(due_date) or transaction_id in self._loans:
+            return
+        due_date = due_date.normalize()
+        self._loans[transaction_id] = (
+            due_date,
+            str(transaction['username']),
+            int(transaction['book_id']),
+            str(transaction['book_title'])
+        )
+        bisect.insort(self._keys, (due_date.toordinal(), transaction_id))
+
+    def _range(self, start, stop):
+        """Pinjaman dengan start <= ordinal due_date < stop, urut jatuh tempo"""
+        with self.fresh():
+            lo = bisect.bisect_left(self._keys, (start,))
+            hi = bisect.bisect_left(self._keys, (stop,))
+            rows = [(tid,) + self._loans[tid] for _, tid in self._keys[lo:hi]]
+        loans = pd.DataFrame(rows, columns=['transaction_id', 'due_date', 'username', 'book_id', 'book_title'])
+        loans['due_date'] = pd.to_datetime(loans['due_date'])
+        return loans
+
+    @staticmethod
+    def _today(today):
+        return pd.Timestamp(today if today is not None else datetime.now()).normalize()
+
+    def due_within(self, days, today=None):
+        """Pinjaman aktif yang jatuh tempo mulai hari ini sampai `days` hari ke depan"""
+        today = self._today(today)
+        loans = self._range(today.toordinal(), today.toordinal() + days + 1)
+        loans['days_left'] = (loans['due_date'] - today).dt.days
+        return loans
+
+    def overdue(self, today=None):
+        """Pinjaman aktif yang sudah lewat jatuh tempo, beserta denda berjalan"""
+        today = self._today(today)
+        loans = self._range(0, today.toordinal())
+        loans['days_overdue'] = (today - loans['due_date']).dt.days
+        loans['fine'] = loans['days_overdue'] * FINE_PER_DAY
+        return loans
+
+    def reminders(self, days=REMINDER_DAYS, today=None, username=None):
+        """Gabungan pinjaman terlambat dan yang segera jatuh tempo (opsional untuk satu user)"""
+        overdue = self.overdue(today).assign(status='terlambat')
+        due_soon = self.due_within(days, today).assign(status='segera jatuh tempo')
+        loans = pd.concat([overdue, due_soon], ignore_index=True)
+        loans[['days_overdue', 'fine', 'days_left']] = loans[['days_overdue', 'fine', 'days_left']].astype('Int64')
+        if username is not None:
+            loans = loans[loans['username'] == username].reset_index(drop=True)
+        return loans
+
+# ===============================
+# CLASS: DATA EXPORT
+# ===============================
+# Kolom tanggal dan arti filter status untuk setiap data yang bisa diekspor
+EXPORT_SOURCES = {
+    'transactions': {
+        'date_column': 'borrow_date',
+        'statuses': {'borrowed': ('status', '==', 'borrowed'),
+                     'returned': ('status', '==', 'returned')},
+    },
+    'books': {
+        'date_column': 'added_date',
+        'statuses': {'available': ('available_copies', '>', 0),
+                     'borrowed': ('available_copies', '==', 0)},
+    },
+}
+
+class LibraryExporter:
+    """Ekspor sheet ke CSV/XLSX secara streaming per potongan baris
+
+    Baris dibaca dari workbook mode read-only dan ditulis per chunk, sehingga
+    memori yang dipakai sebanding dengan chunksize, bukan ukuran sheet.
+    """
+
+    def __init__(self, db, chunksize=5000):
+        self.db = db
+        self.chunksize = chunksize
+
+    def _filters(self, sheet_name, start=None, end=None, status=None):
+        """Filter rentang tanggal (YYYY-MM-DD, inklusif) dan status untuk get_sheet/iter_sheet"""
+        source = EXPORT_SOURCES[sheet_name]
+        filters = []
+        if start is not None:
+            filters.append((source['date_column'], '>=', pd.Timestamp(start).strftime(DATE_FORMAT)))
+        if end is not None:
+            filters.append((source['date_column'], '<=', pd.Timestamp(end).strftime(DATE_FORMAT)))
+        if status is not None:
+            filters.append(source['statuses'][status])
+        return filters
+
+    def _chunks(self, sheet_name, start=None, end=None, status=None):
+        filters = self._filters(sheet_name, start, end, status)
+        for chunk in self.db.iter_sheet(sheet_name, filters=filters, chunksize=self.chunksize):
+            yield self.db.to_storage(sheet_name, chunk)
+
+    def iter_csv(self, sheet_name, start=None, end=None, status=None):
+        """Generator potongan CSV (bytes UTF-8); header hanya di potongan pertama"""
+        header = True
+        for chunk in self._chunks(sheet_name, start, end, status):
+            yield chunk.to_csv(index=False, header=header).encode('utf-8')
+            header = False
+
+    def write_xlsx(self, sheet_name, target, start=None, end=None, status=None):
+        """Menulis XLSX ke path/file object dengan workbook write-only openpyxl"""
+        workbook = openpyxl.Workbook(write_only=True)
+        worksheet = workbook.create_sheet(sheet_name)
+        header = True
+        for chunk in self._chunks(sheet_name, start, end, status):
+            if header:
+                worksheet.append(list(chunk.columns))
+                header = False
+            for row in chunk.itertuples(index=False, name=None):
+                worksheet.append([None if pd.isna(v) else v for v in row])
+        workbook.save(target)
+
+    def export_to_file(self, sheet_name, fmt, start=None, end=None, status=None):
+        """Menulis ekspor ke file sementara di disk dan mengembalikan path-nya"""
+        suffix = '.csv' if fmt == 'csv' else '.xlsx'
+        handle, path = tempfile.mkstemp(prefix=f'{sheet_name}_', suffix=suffix)
+        with os.fdopen(handle, 'wb') as output:
+            if fmt == 'csv':
+                for part in self.iter_csv(sheet_name, start, end, status):
+                    output.write(part)
+            else:
+                self.write_xlsx(sheet_name, output, start, end, status)
+        return path
+
+# ===============================
+# CLASS: RERUN PROFILER
+# ===============================
+# Direktori hasil profiling (satu .prof + satu .folded per rerun)
+PROFILE_DIR = os.environ.get('LIBRARY_PROFILE_DIR', 'profiles')
+# Jeda antar sampel stack (detik) dan jumlah capture terbaru yang disimpan
+PROFILE_SAMPLE_INTERVAL = 0.005
+PROFILE_KEEP = 50
+
+class RerunProfiler:
+    """Profiling rerun Streamlit untuk user tertentu, diaktifkan admin
+
+    Saat aktif, satu rerun dibungkus cProfile (disimpan sebagai .prof untuk
+    pstats/snakeviz) dan thread sampling yang mengumpulkan stack thread script
+    dalam format collapsed/folded (bahan flamegraph). Saat tidak ada target
+    aktif, capture() hanya melakukan satu lookup dict.
+    """
+    # cProfile (sys.monitoring di Python 3.12+) hanya bisa aktif satu per proses
+    _cprofile_lock = threading.Lock()
+
+    def __init__(self, directory=PROFILE_DIR):
+        self.directory = directory
+        self._targets = {}
+        self._lock = threading.Lock()
+
+    def enable(self, username):
+        with self._lock:
+            self._targets[username] = datetime.now()
+
+    def disable(self, username):
+        with self._lock:
+            self._targets.pop(username, None)
+
+    def targets(self):
+        """Username yang sedang diprofil -> waktu diaktifkan"""
+        with self._lock:
+            return dict(self._targets)
+
+    def capture(self, username):
+        """Context manager untuk satu rerun; nullcontext jika user tidak diprofil"""
+        if username not in self._targets:
+            return contextlib.nullcontext()
+        return self._capture(username)
+
+    @contextlib.contextmanager
+    def _capture(self, username):
+        samples = collections.Counter()
+        stop = threading.Event()
+        sampler = threading.Thread(
+            target=self._sample,
+            args=(threading.get_ident(), samples, stop),
+            daemon=True
+        )
+        profiler = cProfile.Profile() if self._cprofile_lock.acquire(blocking=False) else None
+        started = datetime.now()
+        sampler.start()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            # st.rerun()/st.stop() keluar lewat exception; profil tetap disimpan
+            if profiler is not None:
+                profiler.disable()
+                self._cprofile_lock.release()
+            stop.set()
+            sampler.join()
+            self._save(username, started, profiler, samples)
+
+    @staticmethod
+    def _sample(thread_id, samples, stop):
+        """Mengambil stack thread script secara berkala sampai stop di-set"""
+        while not stop.wait(PROFILE_SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                samples[';'.join(reversed(stack))] += 1
+
+    def _save(self, username, started, profiler, samples):
+        os.makedirs(self.directory, exist_ok=True)
+        safe_name = re.sub(r'[^A-Za-z0-9_-]', '_', str(username))
+        stem = os.path.join(self.directory, f"{started:%Y%m%d-%H%M%S-%f}_{safe_name}")
+        if profiler is not None:
+            profiler.dump_stats(stem + '.prof')
+        with open(stem + '.folded', 'w', encoding='utf-8') as folded:
+            for stack, count in samples.most_common():
+                folded.write(f"{stack} {count}\n")
+        self._prune()
+
+    def _prune(self):
+        """Menghapus capture lama di luar PROFILE_KEEP terbaru"""
+        for stem in self.list_profiles()[PROFILE_KEEP:]:
+            for extension in ('.prof', '.folded'):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(os.path.join(self.directory, stem + extension))
+
+    def list_profiles(self):
+        """Nama capture (tanpa ekstensi), terbaru dulu"""
+        if not os.path.isdir(self.directory):
+            return []
+        stems = {os.path.splitext(name)[0] for name in os.listdir(self.directory)
+                 if name.endswith(('.prof', '.folded'))}
+        return sorted(stems, reverse=True)
+
+    def summary(self, stem, limit=25):
+        """Ringkasan pstats (fungsi teratas menurut waktu kumulatif) sebagai teks"""
+        path = os.path.join(self.directory, stem + '.prof')
+        if not os.path.exists(path):
+            return None
+        stream = io.StringIO()
+        pstats.Stats(path, stream=stream).sort_stats('cumulative').print_stats(limit)
+        return stream.getvalue()
+
+# ===============================
+# INISIALISASI SISTEM
+# ===============================
+@st.cache_resource
+def init_system():
+    """Membuat database dan manager sekali per proses, dipakai bersama semua sesi"""
+    # Dengan banyak worker, set LIBRARY_SNAPSHOT_DIR agar data dibagi lewat snapshot bersama
+    # dan LIBRARY_CHANGE_FEED agar indeks worker lain diperbarui per baris, bukan dibaca ulang
+    db = LibraryDatabase(
+        snapshot_dir=os.environ.get('LIBRARY_SNAPSHOT_DIR'),
+        change_feed=os.environ.get('LIBRARY_CHANGE_FEED')
+    )
+    analytics = LibraryAnalytics(db)
+    recommender = BookRecommender(db)
+    # Commit lokal maupun dari worker lain sampai ke indeks lewat satu jalur (change feed)
+    due_index = DueDateIndex(db)
+    db.subscribe(analytics.cube.on_change)
+    db.subscribe(analytics.forecaster.on_change)
+    db.subscribe(recommender.on_change)
+    db.subscribe(due_index.on_change)
+    return db, UserManager(db), BookManager(db), analytics, recommender, due_index
+
+@st.cache_resource
+def get_profiler():
+    """Registry profiling dipakai bersama semua sesi sehingga admin bisa memprofil user lain"""
+    return RerunProfiler()
+
+# Objek global hanya dibuat saat dijalankan lewat `streamlit run app.py`, sehingga
+# modul ini bisa di-import tool lain (API server, CLI admin) tanpa menyentuh database.
+if __name__ == "__main__":
+    db, user_manager, book_manager, analytics, recommender, due_index = init_system()
+    profiler = get_profiler()
+
+# ===============================
+# CACHE HASIL QUERY (per versi data)
+# ===============================
+# Kunci cache adalah versi sheet yang dibaca query, sehingga hasil dipakai
+# ulang lintas rerun dan sesi sampai ada commit ke sheet tersebut.
+# Gagal baca dilempar sebagai exception (tidak di-cache st.cache_data) dan
+# ditampilkan di sini, sehingga hasil kosong tidak tersimpan untuk versi yang sah.
+@st.cache_data(max_entries=4, show_spinner=False)
+def _query_all_books(version):
+    with db.strict_reads():
+        return book_manager.get_all_books()
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _query_available_books(version):
+    with db.strict_reads():
+        return book_manager.get_available_books()
+
+def _load_query(query, label):
+    try:
+        return query(db.get_version('books'))
+    except Exception as e:
+        st.error(f"Error membaca {label}: {e}")
+        return pd.DataFrame()
+
+def load_all_books():
+    """Semua buku (cache sampai sheet books berubah)"""
+    return _load_query(_query_all_books, "katalog buku")
+
+def load_available_books():
+    """Buku tersedia (cache sampai sheet books berubah)"""
+    return _load_query(_query_available_books, "buku tersedia")
+
+# ===============================
+# FUNGSI STREAMLIT - AUTH PAGES
+# ===============================
+def show_login_page():
+    """Halaman login user"""
+    st.header("🔐 Login User")
+    
+    with st.form("login_form"):
+        username = st.text_input("Username")
+        password = st.text_input("Password", type="password")
+        submit = st.form_submit_button("Login")
+        
+        if submit:
+            success, message = user_manager.login_user(username, password)
+            if success:
+                st.session_state.logged_in = True
+                st.session_state.username = username
+                st.session_state.is_admin = False
+                st.success(message)
+                st.rerun()
+            else:
+                st.error(message)
+
+def show_register_page():
+    """Halaman registrasi user"""
+    st.header("📝 Register User")
+    
+    with st.form("register_form"):
+        username = st.text_input("Username")
+        email = st.text_input("Email")
+        password = st.text_input("Password", type="password")
+        confirm_password = st.text_input("Confirm Password", type="password")
+        submit = st.form_submit_button("Register")
+        
+        if submit:
+            if password != confirm_password:
+                st.error("Password tidak cocok")
+            elif len(password) < 6:
+                st.error("Password minimal 6 karakter")
+            else:
+                success, message = user_manager.register_user(username, password, email)
+                if success:
+                    st.success(message)
+                else:
+                    st.error(message)
+
+def show_admin_login_page():
+    """Halaman login admin"""
+    st.header("👑 Login Admin")
+    
+    with st.form("admin_login_form"):
+        username = st.text_input("Username Admin")
+        password = st.text_input("Password Admin", type="password")
+        submit = st.form_submit_button("Login sebagai Admin")
+        
+        if submit:
+            success, message = user_manager.login_admin(username, password)
+            if success:
+                st.session_state.logged_in = True
+                st.session_state.username = username
+                st.session_state.is_admin = True
+                st.success(message)
+                st.rerun()
+            else:
+                st.error(message)
+
+# ===============================
+# FUNGSI STREAMLIT - USER DASHBOARD
+# ===============================
+def show_user_catalog():
+    """Katalog semua buku"""
+    st.subheader("📖 Katalog Semua Buku")
+    books_df = load_all_books()
+    if not books_df.empty:
+        # Tampilkan dengan format yang lebih rapi
+        for _, book in books_df.iterrows():
+            if book['available_copies'] > 0:
+                status = f"✅ Tersedia ({book['available_copies']} dari {book['copies']} eksemplar)"
+            else:
+                status = "❌ Semua eksemplar dipinjam"
+            st.write(f"**{book['title']}**")
+            st.write(f"Penulis: {book['author']} | Tahun: {book['year']} | Kategori: {book['category']} | Status: {status}")
+            st.divider()
+    else:
+        st.info("Belum ada buku dalam sistem")
+
+def show_user_available_books():
+    """Daftar buku yang tersedia"""
+    st.subheader("🔍 Buku yang Tersedia")
+    available_books = load_available_books()
+    if not available_books.empty:
+        st.dataframe(
+            available_books[['title', 'author', 'year', 'category', 'available_copies', 'copies']].rename(
+                columns={'available_copies': 'tersedia', 'copies': 'eksemplar'}
+            ),
+            use_container_width=True,
+            hide_index=True
+        )
+    else:
+        st.info("Tidak ada buku yang tersedia saat ini")
+
+def show_user_borrow():
+    """Form peminjaman buku"""
+    st.subheader("📚 Pinjam Buku")
+    available_books = load_available_books()
+
+    if not available_books.empty:
+        # Buat pilihan buku dengan format yang informatif
+        book_options = {
+            f"{row['title']} oleh {row['author']} (ID: {row['book_id']}, sisa {row['available_copies']})": row['book_id']
+            for _, row in available_books.iterrows()
+        }
+
+        selected_book = st.selectbox(
+            "Pilih buku untuk dipinjam:", 
+            list(book_options.keys())
+        )
+
+        if st.button("📥 Pinjam Buku", type="primary"):
+            book_id = book_options[selected_book]
+            success, message = book_manager.borrow_book(
+                st.session_state.username, 
+                book_id
+            )
+            if success:
+                st.success(message)
+                st.rerun()
+            else:
+                st.error(message)
+
+        # Rekomendasi berdasarkan pola co-borrowing
+        recommendations = recommender.recommend(book_options[selected_book])
+        if recommendations:
+            titles = load_all_books().set_index('book_id')['title']
+            st.caption("Pengguna yang meminjam buku ini juga meminjam:")
+            for book_id, score in recommendations:
+                st.write(f"- {titles.get(book_id, f'Buku ID {book_id}')} (kemiripan {score:.2f})")
+    else:
+        st.info("Tidak ada buku yang tersedia untuk dipinjam")
+
+def show_user_return():
+    """Form pengembalian buku"""
+    st.subheader("🔄 Kembalikan Buku")
+    transactions_df = db.get_sheet('transactions')
+
+    if not transactions_df.empty:
+        # Get user's active loans (borrowed but not returned)
+        user_active_loans = transactions_df[
+            (transactions_df['username'] == st.session_state.username) &
+            (transactions_df['status'] == 'borrowed')
+        ]
+
+        if not user_active_loans.empty:
+            st.info("Berikut adalah buku yang sedang Anda pinjam:")
+
+            # Create options for books to return
+            return_options = {}
+            for _, loan in user_active_loans.iterrows():
+                due_date = pd.to_datetime(loan['due_date'])
+                today = pd.Timestamp.now()
+                days_overdue = (today - due_date).days if today > due_date else 0
+
+                status_text = f"{'⚠️ TERLAMBAT' if days_overdue > 0 else '✅ Masih dalam batas waktu'}"
+                if days_overdue > 0:
+                    status_text += f" ({days_overdue} hari)"
+
+                option_text = f"{loan['book_title']} - Dipinjam: {loan['borrow_date']:%Y-%m-%d} - Jatuh tempo: {loan['due_date']:%Y-%m-%d} - {status_text}"
+                return_options[option_text] = loan['transaction_id']
+
+            selected_return = st.selectbox(
+                "Pilih buku yang ingin dikembalikan:",
+                list(return_options.keys())
+            )
+
+            if st.button("🔄 Kembalikan Buku", type="primary"):
+                print("DEBUG: Return button clicked!")
+                print(f"DEBUG: Current user: {st.session_state.username}")
+                print(f"DEBUG: selected_return: {selected_return}")
+                print(f"DEBUG: return_options: {return_options}")
+
+                if selected_return in return_options:
+                    transaction_id = return_options[selected_return]
+                    print(f"DEBUG: Calling return_book with transaction_id: {transaction_id}")
+                    success, message = book_manager.return_book(transaction_id)
+                    print(f"DEBUG: return_book result - success: {success}, message: {message}")
+                    if success:
+                        st.success(message)
+                        st.rerun()
+                    else:
+                        st.error(message)
+                else:
+                    print("DEBUG: selected_return not in return_options")
+                    st.error("Pilihan tidak valid")
+
+            # Show potential fine calculation
+            if selected_return:
+                transaction_id = return_options[selected_return]
+                loan = user_active_loans[user_active_loans['transaction_id'] == transaction_id].iloc[0]
+                due_date = pd.to_datetime(loan['due_date'])
+                today = pd.Timestamp.now()
+
+                if today > due_date:
+                    days_late = (today - due_date).days
+                    fine = days_late * FINE_PER_DAY
+                    st.warning(f"⚠️ Buku ini terlambat {days_late} hari. Denda yang harus dibayar: Rp {fine:,}")
+                else:
+                    st.success("✅ Buku dapat dikembalikan tanpa denda")
+
+        else:
+            st.info("Anda tidak memiliki buku yang sedang dipinjam")
+    else:
+        st.info("Belum ada transaksi peminjaman")
+
+def show_user_history():
+    """Riwayat peminjaman user"""
+    st.subheader("📋 Riwayat Peminjaman Saya")
+    transactions_df = db.get_sheet('transactions')
+    if not transactions_df.empty:
+        user_transactions = transactions_df[
+            transactions_df['username'] == st.session_state.username
+        ]
+        if not user_transactions.empty:
+            st.dataframe(
+                user_transactions[[
+                    'transaction_id', 'book_title', 'borrow_date',
+                    'due_date', 'return_date', 'status', 'fine'
+                ]],
+                use_container_width=True
+            )
+        else:
+            st.info("Anda belum meminjam buku apapun")
+    else:
+        st.info("Belum ada transaksi peminjaman")
+
+def show_user_reminders():
+    """Pengingat pinjaman user yang terlambat atau segera jatuh tempo"""
+    reminders = due_index.reminders(REMINDER_DAYS, username=st.session_state.username)
+    for loan in reminders.itertuples(index=False):
+        if loan.status == 'terlambat':
+            st.warning(
+                f"⚠️ '{loan.book_title}' terlambat {loan.days_overdue:.0f} hari. "
+                f"Denda berjalan: Rp {loan.fine:,.0f}"
+            )
+        else:
+            when = "hari ini" if loan.days_left == 0 else f"{loan.days_left:.0f} hari lagi"
+            st.info(f"⏰ '{loan.book_title}' jatuh tempo {when} ({loan.due_date:%Y-%m-%d})")
+
+def show_user_dashboard():
+    """Dashboard untuk user biasa"""
+    st.header(f"📚 Selamat datang, {st.session_state.username}!")
+    show_user_reminders()
+
+    # Hanya view yang dipilih yang dijalankan; st.tabs akan mengeksekusi kelima tab
+    views = {
+        "📖 Semua Buku": show_user_catalog,
+        "🔍 Buku Tersedia": show_user_available_books,
+        "📚 Pinjam Buku": show_user_borrow,
+        "🔄 Kembalikan Buku": show_user_return,
+        "📋 Riwayat Saya": show_user_history
+    }
+    selected = st.radio(
+        "Menu",
+        list(views.keys()),
+        horizontal=True,
+        key="user_view",
+        label_visibility="collapsed"
+    )
+    views[selected]()
+
+# ===============================
+# FUNGSI STREAMLIT - ADMIN DASHBOARD
+# ===============================
+def show_admin_books():
+    """Kelola semua buku"""
+    st.subheader("📚 Semua Buku dalam Sistem")
+    books_df = load_all_books()
+    if not books_df.empty:
+        st.dataframe(books_df, use_container_width=True)
+
+        # Statistik cepat
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total Judul", len(books_df))
+        with col2:
+            st.metric("Eksemplar Tersedia", int(books_df['available_copies'].sum()))
+        with col3:
+            st.metric("Eksemplar Dipinjam", int((books_df['copies'] - books_df['available_copies']).sum()))
+    else:
+        st.info("Belum ada buku dalam sistem")
+
+def show_admin_reminders():
+    """Ringkasan pinjaman terlambat dan yang jatuh tempo minggu ini"""
+    st.subheader("⏰ Pengingat Jatuh Tempo")
+    overdue = due_index.overdue()
+    due_soon = due_index.due_within(7)
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Terlambat", len(overdue))
+    col2.metric("Jatuh tempo ≤ 7 hari", len(due_soon))
+    col3.metric("Denda berjalan", f"Rp {int(overdue['fine'].sum()):,}")
+
+    if not overdue.empty:
+        with st.expander(f"Daftar terlambat ({len(overdue)})"):
+            st.dataframe(
+                overdue[['transaction_id', 'username', 'book_title', 'due_date', 'days_overdue', 'fine']],
+                use_container_width=True,
+                hide_index=True
+            )
+    if not due_soon.empty:
+        with st.expander(f"Jatuh tempo 7 hari ke depan ({len(due_soon)})"):
+            st.dataframe(
+                due_soon[['transaction_id', 'username', 'book_title', 'due_date', 'days_left']],
+                use_container_width=True,
+                hide_index=True
+            )
+
+def show_admin_loans():
+    """Daftar buku yang sedang dipinjam"""
+    show_admin_reminders()
+
+    st.subheader("👥 Buku yang Sedang Dipinjam")
+    transactions_df = db.get_sheet('transactions')
+    books_df = db.get_sheet('books')
+
+    if not transactions_df.empty:
+        active_loans = transactions_df[transactions_df['status'] == 'borrowed']
+        if not active_loans.empty:
+            # Gabungkan dengan data buku untuk info lengkap
+            loan_details = pd.merge(
+                active_loans, 
+                books_df, 
+                on='book_id', 
+                how='left'
+            )
+
+            st.dataframe(
+                loan_details[[
+                    'transaction_id', 'username', 'title', 'author', 
+                    'borrow_date', 'due_date'
+                ]],
+                use_container_width=True
+            )
+
+            # Fitur pengembalian buku
+            st.subheader("🔄 Proses Pengembalian Buku")
+            transaction_id = st.number_input(
+                "Masukkan ID Transaksi untuk pengembalian:",
+                min_value=1,
+                step=1
+            )
+
+            if st.button("Proses Pengembalian"):
+                success, message = book_manager.return_book(transaction_id)
+                if success:
+                    st.success(message)
+                    st.rerun()
+                else:
+                    st.error(message)
+        else:
+            st.info("Tidak ada buku yang sedang dipinjam")
+    else:
+        st.info("Belum ada transaksi peminjaman")
+
+def show_job_chart(future, empty_message):
+    """Menampilkan grafik hasil job analitik; True jika job masih berjalan"""
+    if not future.done():
+        st.info("⏳ Grafik sedang dibuat di background...")
+        return True
+    if future.exception() is not None:
+        st.error(f"Gagal membuat grafik: {future.exception()}")
+    elif future.result() is None:
+        st.warning(empty_message)
+    else:
+        st.image(future.result())
+    return False
+
+def wait_for_jobs(futures):
+    """Rerun saat job selesai (atau setelah ANALYTICS_POLL_INTERVAL) agar halaman tidak membeku"""
+    pending = [future for future in futures if not future.done()]
+    if pending:
+        wait_futures(pending, timeout=ANALYTICS_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+        st.rerun()
+
+def show_admin_analytics():
+    """Analisis dan statistik"""
+    st.subheader("📊 Analisis dan Statistik")
+
+    # Statistik dan grafik dihitung di process pool; halaman di-rerun sampai hasilnya siap
+    stats_job = analytics.stats_job()
+    if not stats_job.done():
+        st.info("⏳ Statistik sedang dihitung di background...")
+        wait_for_jobs([stats_job])
+        return
+    stats = stats_job.result()
+    if stats:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total Transaksi", stats['total_transactions'])
+        with col2:
+            st.metric("Sedang Dipinjam", stats['active_borrows'])
+        with col3:
+            st.metric("Rata-rata Peminjaman", f"{stats['mean_borrows']:.2f}")
+
+        # Visualisasi
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader("Trend Peminjaman")
+            grain = st.selectbox(
+                "Periode",
+                list(TREND_LABELS.keys()),
+                index=2,
+                format_func=TREND_LABELS.get
+            )
+            category = st.selectbox("Kategori", ["Semua"] + analytics.cube.categories())
+            trend_job = analytics.trend_chart_job(grain, None if category == "Semua" else category)
+            show_job_chart(trend_job, "Tidak ada data transaksi untuk dianalisis")
+        with col2:
+            st.subheader("Distribusi Kategori Buku")
+            category_job = analytics.category_chart_job()
+            show_job_chart(category_job, "Tidak ada data buku untuk dianalisis")
+
+        show_demand_forecast()
+        wait_for_jobs([trend_job, category_job])
+    else:
+        st.info("Belum ada data untuk dianalisis")
+
+def show_demand_forecast():
+    """Perkiraan permintaan bulan depan dan judul yang berisiko kekurangan eksemplar"""
+    st.subheader("🔮 Perkiraan Permintaan Bulan Depan")
+    level = st.radio(
+        "Tingkat",
+        list(FORECAST_LEVELS.keys()),
+        format_func=FORECAST_LEVELS.get,
+        horizontal=True
+    )
+    forecast = analytics.forecast_demand(level)
+    if forecast.empty:
+        st.info("Belum ada cukup data (minimal satu bulan lengkap peminjaman)")
+        return
+
+    labels = ['title', 'category'] if level == 'book' else ['category']
+    at_risk = forecast[forecast['shortage_prob'] >= 0.5]
+    col1, col2 = st.columns(2)
+    col1.metric("Perkiraan Peminjaman", f"{forecast['expected'].sum():.0f}")
+    col2.metric("Berisiko Kekurangan", len(at_risk))
+    if not at_risk.empty:
+        st.warning(
+            "Kemungkinan besar kekurangan eksemplar: "
+            + ", ".join(str(name) for name in at_risk[labels[0]].head(5))
+        )
+
+    st.dataframe(
+        forecast[labels + ['copies', 'expected', 'quantile', 'shortage_prob', 'model', 'month_to_date']].rename(columns={
+            'title': 'Judul',
+            'category': 'Kategori',
+            'copies': 'Eksemplar',
+            'expected': 'Perkiraan',
+            'quantile': f'P{int(FORECAST_QUANTILE * 100)}',
+            'shortage_prob': 'Peluang Kurang',
+            'model': 'Model',
+            'month_to_date': 'Bulan Ini'
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
+    st.caption(
+        f"Model di-fit dari {analytics.forecaster.months_observed()} bulan lengkap terakhir; "
+        f"kapasitas = eksemplar x {LOANS_PER_COPY} peminjaman per bulan."
+    )
+
+def show_admin_add_book():
+    """Form tambah buku"""
+    st.subheader("➕ Tambah Buku Baru")
+
+    with st.form("add_book_form"):
+        title = st.text_input("Judul Buku *")
+        author = st.text_input("Penulis *")
+        year = st.number_input(
+            "Tahun Terbit *", 
+            min_value=1000, 
+            max_value=2100, 
+            value=2024
+        )
+        category = st.selectbox(
+            "Kategori *",
+            ["Programming", "Data Science", "Artificial Intelligence", 
+             "Web Development", "Database", "Fiction", "Non-Fiction", "Lainnya"]
+        )
+        isbn = st.text_input("ISBN (opsional)")
+        copies = st.number_input("Jumlah Eksemplar *", min_value=1, max_value=1000, value=1)
+
+        submit = st.form_submit_button("Tambah Buku", type="primary")
+
+        if submit:
+            if not title or not author:
+                st.error("Judul dan Penulis wajib diisi!")
+            else:
+                book_data = {
+                    'title': title,
+                    'author': author,
+                    'year': int(year),
+                    'category': category,
+                    'isbn': isbn,
+                    'copies': int(copies)
+                }
+
+                success, message = book_manager.add_book(book_data)
+                if success:
+                    st.success(message)
+                    st.rerun()
+                else:
+                    st.error(message)
+
+def show_admin_tools():
+    """Admin tools"""
+    st.subheader("⚙️ Admin Tools")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.info("📊 Data Users")
+        users_df = db.get_sheet('users')
+        if not users_df.empty:
+            st.dataframe(
+                users_df[['username', 'email', 'created_at', 'active']],
+                use_container_width=True
+            )
+        else:
+            st.info("Belum ada user terdaftar")
+
+    with col2:
+        st.info("🔄 System Info")
+        st.write(f"Total Buku: {len(load_all_books())}")
+        st.write(f"Total Users: {len(users_df) if not users_df.empty else 0}")
+        st.write(f"Database File: library_db.xlsx")
+
+        if st.button("🔄 Refresh Database"):
+            st.rerun()
+
+    show_integrity_panel()
+    show_profiler_panel()
+    show_export_panel()
+
+def show_integrity_panel():
+    """Panel cek konsistensi books/transactions dan perbaikan otomatis"""
+    st.divider()
+    st.subheader("🩺 Integritas Data")
+
+    checker = IntegrityChecker(db)
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Cek Integritas"):
+            st.session_state.integrity = checker.check()
+    with col2:
+        if st.button("Perbaiki Otomatis"):
+            saved, before, after = checker.repair()
+            fixed = sum(len(ids) for ids in before.values()) - sum(len(ids) for ids in after.values())
+            if not saved:
+                st.error("Gagal menyimpan perbaikan")
+            elif fixed:
+                st.success(f"{fixed} masalah diperbaiki dalam satu commit")
+            else:
+                st.info("Tidak ada masalah yang bisa diperbaiki otomatis")
+            st.session_state.integrity = after
+
+    issues = st.session_state.get('integrity')
+    if issues is None:
+        return
+    if not any(issues.values()):
+        st.success("Tidak ada masalah integritas data")
+        return
+    st.dataframe(pd.DataFrame([
+        {
+            'Pemeriksaan': INTEGRITY_CHECKS[name],
+            'Jumlah': len(ids),
+            'Contoh ID': ', '.join(str(i) for i in ids[:10]),
+            'Perbaikan': "Manual" if name in MANUAL_CHECKS else "Otomatis",
+        }
+        for name, ids in issues.items() if ids
+    ]), use_container_width=True, hide_index=True)
+
+def show_profiler_panel():
+    """Panel mengaktifkan profiling rerun per user dan mengunduh hasilnya"""
+    st.divider()
+    st.subheader("⏱️ Profiling")
+
+    targets = profiler.targets()
+    users_df = db.get_sheet('users', columns=['username'])
+    usernames = sorted(set(users_df['username'].astype(str)) | {st.session_state.username} | set(targets))
+    col1, col2 = st.columns(2)
+    with col1:
+        username = st.selectbox("User yang diprofil", usernames)
+        if username in targets:
+            if st.button("Matikan Profiling"):
+                profiler.disable(username)
+                st.rerun()
+        elif st.button("Aktifkan Profiling"):
+            profiler.enable(username)
+            st.rerun()
+    with col2:
+        if targets:
+            for name, since in targets.items():
+                st.write(f"🔴 {name} (sejak {since:%H:%M:%S})")
+        else:
+            st.caption("Profiling nonaktif untuk semua user")
+
+    profiles = profiler.list_profiles()
+    if not profiles:
+        return
+    stem = st.selectbox("Hasil profiling (per rerun)", profiles)
+    col1, col2 = st.columns(2)
+    for column, extension, mime in ((col1, '.prof', 'application/octet-stream'), (col2, '.folded', 'text/plain')):
+        path = os.path.join(profiler.directory, stem + extension)
+        if os.path.exists(path):
+            with column, open(path, 'rb') as data:
+                st.download_button(f"⬇️ {stem}{extension}", data, file_name=stem + extension, mime=mime)
+    summary = profiler.summary(stem)
+    if summary:
+        with st.expander("Ringkasan pstats"):
+            st.text(summary)
+
+def show_export_panel():
+    """Panel export transaksi/katalog ke CSV atau XLSX"""
+    st.divider()
+    st.subheader("📤 Export Data")
+
+    source = st.selectbox(
+        "Data",
+        list(EXPORT_SOURCES.keys()),
+        format_func={'transactions': "Riwayat Transaksi", 'books': "Katalog Buku"}.get
+    )
+    fmt = st.radio("Format", ['csv', 'xlsx'], horizontal=True, format_func=str.upper)
+    status = st.selectbox("Status", ["Semua"] + list(EXPORT_SOURCES[source]['statuses'].keys()))
+
+    start = end = None
+    if st.checkbox("Filter rentang tanggal"):
+        col1, col2 = st.columns(2)
+        with col1:
+            start = st.date_input("Dari tanggal", value=datetime.now().replace(day=1))
+        with col2:
+            end = st.date_input("Sampai tanggal", value=datetime.now())
+
+    if st.button("Siapkan File Export"):
+        # File lama dihapus; data ditulis per chunk ke disk, bukan ke memori
+        previous = st.session_state.get('export_file')
+        if previous and os.path.exists(previous[0]):
+            os.remove(previous[0])
+        path = LibraryExporter(db).export_to_file(
+            source, fmt, start, end, None if status == "Semua" else status
+        )
+        st.session_state.export_file = (path, f"{source}_{datetime.now():%Y%m%d_%H%M%S}.{fmt}", fmt)
+
+    export_file = st.session_state.get('export_file')
+    if export_file and os.path.exists(export_file[0]):
+        path, file_name, fmt = export_file
+        mime = 'text/csv' if fmt == 'csv' else (
+            'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+        with open(path, 'rb') as data:
+            st.download_button("⬇️ Download " + file_name, data, file_name=file_name, mime=mime)
+
+def show_admin_dashboard():
+    """Dashboard untuk admin"""
+    st.header(f"👑 Dashboard Admin - {st.session_state.username}")
+
+    # Hanya view yang dipilih yang dijalankan; st.tabs akan mengeksekusi kelima tab
+    views = {
+        "📚 Kelola Buku": show_admin_books,
+        "👥 Buku Terpinjam": show_admin_loans,
+        "📊 Analisis": show_admin_analytics,
+        "➕ Tambah Buku": show_admin_add_book,
+        "⚙️ Admin Tools": show_admin_tools
+    }
+    selected = st.radio(
+        "Menu",
+        list(views.keys()),
+        horizontal=True,
+        key="admin_view",
+        label_visibility="collapsed"
+    )
+    views[selected]()
+
+# ===============================
+# MAIN APPLICATION
+# ===============================
+def main():
+    """Aplikasi utama Streamlit"""
+    st.set_page_config(
+        page_title="E-Library System",
+        page_icon="📚",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    
+    # Custom CSS
+    st.markdown("""
+    <style>
+    .main-header {
+        font-size: 2.5rem;
+        color: #1f77b4;
+        text-align: center;
+        margin-bottom: 2rem;
+    }
+    </style>
+    """, unsafe_allow_html=True)
+    
+    # Header
+    st.markdown('<h1 class="main-header">📚 E-Library System</h1>', unsafe_allow_html=True)
+    
+    # Inisialisasi session state
+    if 'logged_in' not in st.session_state:
+        st.session_state.logged_in = False
+    if 'username' not in st.session_state:
+        st.session_state.username = None
+    if 'is_admin' not in st.session_state:
+        st.session_state.is_admin = False
+    
+    # Sidebar untuk navigasi
+    with st.sidebar:
+        st.image("https://cdn-icons-png.flaticon.com/512/2232/2232688.png", width=100)
+        st.title("Navigasi")
+        
+        if not st.session_state.logged_in:
+            menu = st.radio(
+                "Pilih Menu:",
+                ["🔐 Login User", "📝 Register", "👑 Login Admin"],
+                index=0
+            )
+        else:
+            st.success(f"Login sebagai: **{st.session_state.username}**")
+            if st.session_state.is_admin:
+                st.info("👑 Role: Administrator")
+            else:
+                st.info("👤 Role: User")
+            
+            if st.button("🚪 Logout", use_container_width=True):
+                st.session_state.logged_in = False
+                st.session_state.username = None
+                st.session_state.is_admin = False
+                st.rerun()
+            
+            st.divider()
+            st.info("ℹ️ Sistem E-Library")
+            st.caption("Project UAS - Basic Python OOP")
+    
+    # Routing halaman berdasarkan status login
+    if not st.session_state.logged_in:
+        if menu == "🔐 Login User":
+            show_login_page()
+        elif menu == "📝 Register":
+            show_register_page()
+        elif menu == "👑 Login Admin":
+            show_admin_login_page()
+    else:
+        if st.session_state.is_admin:
+            show_admin_dashboard()
+        else:
+            show_user_dashboard()
+    
+    # Footer
+    st.divider()
+    st.caption("🎓 Project UAS - E-Library System | Kelompok 4")
+
+if __name__ == "__main__":
+    with profiler.capture(st.session_state.get('username')):
+        main()
\ No newline at end of file
@@ -0,0 +1,43 @@
+"""Fixture bersama untuk test E-Library"""
+import pytest
+
+from app import BookManager, LibraryDatabase, MemoryLibraryDatabase, UserManager
+
+
+@pytest.fixture
+def memory_db():
+    """Database di memori berisi data awal (admin dan 5 buku, tanpa transaksi)"""
+    return MemoryLibraryDatabase()
+
+
+@pytest.fixture
+def book_manager(memory_db):
+    return BookManager(memory_db)
+
+
+@pytest.fixture
+def user_manager(memory_db):
+    """UserManager dengan satu user terdaftar: n / rahasia"""
+    user_manager = UserManager(memory_db)
+    user_manager.register_user('n', 'rahasia', 'n@example.com')
+    return user_manager
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Path workbook sementara; file dibuat saat database pertama kali dibuka"""
+    return str(tmp_path / 'library_db.xlsx')
+
+
+@pytest.fixture
+def feed_databases(db_path, tmp_path):
+    """Dua objek database (seperti dua worker) yang berbagi satu change feed"""
+    feed = str(tmp_path / 'changes.jsonl')
+    return LibraryDatabase(db_path, change_feed=feed), LibraryDatabase(db_path, change_feed=feed)
+
+
+@pytest.fixture
+def snapshot_databases(db_path, tmp_path):
+    """Dua objek database (seperti dua worker) yang berbagi satu snapshot"""
+    snapshot_dir = str(tmp_path / 'snapshot')
+    return LibraryDatabase(db_path, snapshot_dir), LibraryDatabase(db_path, snapshot_dir)
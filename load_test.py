@@ -0,0 +1,269 @@
+"""
+Load test untuk BookManager/UserManager dengan banyak sesi bersamaan.
+
+Setiap user virtual menjalankan campuran login/pinjam/kembali terhadap salinan
+library_db.xlsx di direktori sementara, lalu hasilnya diperiksa:
+throughput, persentil latensi, dan pelanggaran invariant (buku tersedia padahal
+masih dipinjam, transaction_id ganda, transaksi yang hilang/lost update).
+
+Contoh:
+    python load_test.py --users 50 --ops 20 --mode threads
+    python load_test.py --users 8 --ops 10 --mode processes --json
+    python load_test.py --users 8 --ops 10 --mode processes --storage snapshot
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app import IntegrityChecker, LibraryDatabase, MemoryLibraryDatabase, UserManager, BookManager
+
+LOAD_PASSWORD = 'loadtest123'
+STORAGE_MODES = ['xlsx', 'memory', 'snapshot']
+
+
+def make_database(storage, path):
+    """Membuat LibraryDatabase sesuai mode penyimpanan yang diuji"""
+    if storage == 'xlsx':
+        return LibraryDatabase(path)
+    if storage == 'memory':
+        # Data awal diambil dari file scratch yang sudah berisi user virtual
+        return MemoryLibraryDatabase(pd.read_excel(path, sheet_name=None, engine='openpyxl'))
+    if storage == 'snapshot':
+        # Semua thread/proses berbagi satu snapshot Arrow di samping file scratch
+        return LibraryDatabase(path, snapshot_dir=os.path.join(os.path.dirname(path), 'snapshot'))
+    raise ValueError(f"Mode penyimpanan tidak dikenal: {storage}")
+
+
+def load_username(index):
+    return f"loadtest_user_{index}"
+
+
+def prepare_scratch(source, users, directory):
+    """Menyalin database sumber dan mendaftarkan user virtual dalam satu kali simpan"""
+    path = os.path.join(directory, 'library_db.xlsx')
+    if os.path.exists(source):
+        shutil.copy(source, path)
+    db = LibraryDatabase(path)
+
+    users_df = db.get_sheet('users')
+    created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    new_users = pd.DataFrame({
+        'username': [load_username(i) for i in range(users)],
+        'password': [db._hash_password(LOAD_PASSWORD)] * users,
+        'email': [f"{load_username(i)}@example.com" for i in range(users)],
+        'created_at': [created_at] * users
+    })
+    if not users_df.empty:
+        new_users = new_users[~new_users['username'].isin(users_df['username'])]
+    db.save_sheet('users', pd.concat([users_df, new_users], ignore_index=True))
+    return path
+
+
+def parse_mix(text):
+    """'login=0.2,borrow=0.4,return=0.4' -> dict bobot"""
+    mix = {}
+    for part in text.split(','):
+        name, weight = part.split('=')
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - {'login', 'borrow', 'return'}
+    if unknown:
+        raise ValueError(f"Operasi tidak dikenal: {sorted(unknown)}")
+    return mix
+
+
+def run_session(db, user_index, ops, mix, seed):
+    """Menjalankan satu sesi user virtual, mengembalikan daftar hasil operasi"""
+    rng = random.Random(seed)
+    username = load_username(user_index)
+    user_manager = UserManager(db)
+    book_manager = BookManager(db)
+    names, weights = list(mix.keys()), list(mix.values())
+    results = []
+
+    for _ in range(ops):
+        op = rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        ok, error = False, None
+        try:
+            if op == 'login':
+                ok, error = user_manager.login_user(username, LOAD_PASSWORD)
+            elif op == 'borrow':
+                available = book_manager.get_available_books()
+                if available.empty:
+                    error = "tidak ada buku tersedia"
+                else:
+                    book_id = int(rng.choice(list(available['book_id'])))
+                    ok, error = book_manager.borrow_book(username, book_id)
+            else:
+                loans = db.get_sheet(
+                    'transactions',
+                    columns=['transaction_id', 'username', 'status'],
+                    filters=[('username', '==', username), ('status', '==', 'borrowed')]
+                )
+                if loans.empty:
+                    error = "tidak ada pinjaman aktif"
+                else:
+                    transaction_id = int(rng.choice(list(loans['transaction_id'])))
+                    ok, error = book_manager.return_book(transaction_id)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        results.append({
+            'user': username,
+            'op': op,
+            'ok': bool(ok),
+            'latency': time.perf_counter() - start,
+            'error': None if ok else error,
+        })
+    return results
+
+
+def _process_session(storage, path, user_index, ops, mix, seed):
+    """Entry point untuk mode processes: setiap proses punya objek database sendiri"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return run_session(make_database(storage, path), user_index, ops, mix, seed)
+
+
+def run_load(path, users, ops, mix, mode, storage, seed):
+    """Menjalankan semua sesi secara bersamaan
+
+    Mengembalikan (hasil, durasi, db) dengan db objek database yang dipakai
+    bersama pada mode threads (None pada mode processes).
+    """
+    db = None
+    start = time.perf_counter()
+    if mode == 'threads':
+        # Mode threads meniru beberapa sesi Streamlit dalam satu worker
+        db = make_database(storage, path)
+        with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=users) as pool:
+            futures = [
+                pool.submit(run_session, db, i, ops, mix, seed + i)
+                for i in range(users)
+            ]
+            results = [r for f in futures for r in f.result()]
+    else:
+        with ProcessPoolExecutor(max_workers=min(users, os.cpu_count() or 1)) as pool:
+            futures = [
+                pool.submit(_process_session, storage, path, i, ops, mix, seed + i)
+                for i in range(users)
+            ]
+            results = [r for f in futures for r in f.result()]
+    return results, time.perf_counter() - start, db
+
+
+def check_invariants(db, results):
+    """Memeriksa konsistensi data akhir terhadap operasi yang dilaporkan berhasil"""
+    violations = defaultdict(list, IntegrityChecker(db).check())
+    transactions_df = db.get_sheet('transactions', columns=['username', 'status'])
+    if transactions_df.empty:
+        transactions_df = pd.DataFrame(columns=['username', 'status'])
+
+    # Lost update: operasi dilaporkan berhasil tetapi tidak ada di data akhir
+    reported = Counter((r['user'], r['op']) for r in results if r['ok'])
+    rows = Counter(transactions_df['username'].astype(str))
+    returned = Counter(transactions_df.loc[transactions_df['status'] == 'returned', 'username'].astype(str))
+    for user in sorted({r['user'] for r in results}):
+        lost_borrows = reported[(user, 'borrow')] - rows[user]
+        lost_returns = reported[(user, 'return')] - returned[user]
+        if lost_borrows > 0:
+            violations['lost_borrow'].append({'user': user, 'count': lost_borrows})
+        if lost_returns > 0:
+            violations['lost_return'].append({'user': user, 'count': lost_returns})
+
+    return {name: items for name, items in violations.items() if items}
+
+
+def summarize(results, duration):
+    """Throughput dan persentil latensi per operasi (dalam milidetik)"""
+    summary = {
+        'operations': len(results),
+        'duration_s': round(duration, 3),
+        'throughput_ops_s': round(len(results) / duration, 2) if duration else 0.0,
+        'per_op': {},
+    }
+    by_op = defaultdict(list)
+    for r in results:
+        by_op[r['op']].append(r)
+    for op, items in sorted(by_op.items()):
+        latencies = np.array([r['latency'] for r in items]) * 1000
+        errors = Counter(r['error'] for r in items if not r['ok'])
+        summary['per_op'][op] = {
+            'count': len(items),
+            'ok': sum(r['ok'] for r in items),
+            'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+            'p95_ms': round(float(np.percentile(latencies, 95)), 2),
+            'p99_ms': round(float(np.percentile(latencies, 99)), 2),
+            'max_ms': round(float(latencies.max()), 2),
+            'errors': dict(errors.most_common(5)),
+        }
+    return summary
+
+
+def print_report(report):
+    print(f"Mode: {report['mode']} | Storage: {report['storage']} | Users: {report['users']}")
+    print(f"Operasi: {report['operations']} dalam {report['duration_s']} s "
+          f"-> {report['throughput_ops_s']} ops/s")
+    print(f"{'op':<8}{'count':>7}{'ok':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for op, s in report['per_op'].items():
+        print(f"{op:<8}{s['count']:>7}{s['ok']:>6}{s['p50_ms']:>10}{s['p95_ms']:>10}"
+              f"{s['p99_ms']:>10}{s['max_ms']:>10}")
+        for error, count in s['errors'].items():
+            print(f"    {count}x {error}")
+    if report['violations']:
+        print("Pelanggaran invariant:")
+        for name, items in report['violations'].items():
+            print(f"  {name}: {items}")
+    else:
+        print("Tidak ada pelanggaran invariant")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test E-Library")
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--ops', type=int, default=20, help="Operasi per user")
+    parser.add_argument('--mode', choices=['threads', 'processes'], default='threads')
+    parser.add_argument('--storage', choices=STORAGE_MODES, default='xlsx')
+    parser.add_argument('--mix', default='login=0.2,borrow=0.4,return=0.4')
+    parser.add_argument('--source', default=os.path.join(os.path.dirname(__file__), 'library_db.xlsx'))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Cetak laporan sebagai JSON")
+    args = parser.parse_args()
+
+    if args.storage == 'memory' and args.mode == 'processes':
+        parser.error("storage memory hanya bisa dipakai dengan --mode threads")
+
+    mix = parse_mix(args.mix)
+    with tempfile.TemporaryDirectory(prefix='library_load_') as directory:
+        path = prepare_scratch(args.source, args.users, directory)
+        results, duration, db = run_load(
+            path, args.users, args.ops, mix, args.mode, args.storage, args.seed
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            violations = check_invariants(db or make_database(args.storage, path), results)
+
+    report = {
+        'mode': args.mode,
+        'storage': args.storage,
+        'users': args.users,
+        **summarize(results, duration),
+        'violations': violations,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
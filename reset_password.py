@@ -1,44 +1,340 @@
-import pandas as pd
-import hashlib
-import os
-
-def reset_user_password(username, new_password):
-    file_path = os.path.join(os.path.dirname(__file__), 'library_db.xlsx')
-    try:
-        # Read the users sheet
-        users_df = pd.read_excel(file_path, sheet_name='users', engine='openpyxl')
-
-        if users_df.empty:
-            print("No users found in database")
-            return False
-
-        # Find the user
-        user_index = users_df[users_df['username'] == username].index
-        if user_index.empty:
-            print(f"User '{username}' not found")
-            return False
-
-        # Hash the new password
-        hashed_password = hashlib.sha256(new_password.encode()).hexdigest()
-
-        # Update the password
-        users_df.loc[user_index, 'password'] = hashed_password
-
-        # Save back to Excel
-        existing_sheets = pd.read_excel(file_path, sheet_name=None, engine='openpyxl')
-        existing_sheets['users'] = users_df
-
-        with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-            for sheet_name, sheet_data in existing_sheets.items():
-                sheet_data.to_excel(writer, sheet_name=sheet_name, index=False)
-
-        print(f"Password for user '{username}' has been reset to '{new_password}'")
-        return True
-
-    except Exception as e:
-        print(f"Error resetting password: {e}")
-        return False
-
-if __name__ == "__main__":
-    # Reset password for user 'n' to 'n'
-    reset_user_password('n', 'n')
+"""
+CLI administrasi E-Library: user, integritas data, pengingat jatuh tempo, dan backup.
+
+Semua perubahan dalam satu perintah diterapkan ke sheet users dengan satu kali
+simpan (satu commit), lalu dicetak laporan per baris.
+
+Contoh:
+    python reset_password.py reset n passwordbaru
+    python reset_password.py import mahasiswa_baru.csv        # username,password,email
+    python reset_password.py deactivate lulus.csv             # username
+    python reset_password.py --report hasil.csv batch perubahan.csv
+        # kolom: action (import/reset/deactivate/activate),username,password,email
+    python reset_password.py check                            # cek books/transactions
+    python reset_password.py --report masalah.csv check --repair
+    python reset_password.py --report pengingat.csv reminders --days 3   # job harian
+    python reset_password.py merge-copies                     # gabung baris eksemplar ganda
+    python reset_password.py --change-feed feed.jsonl backup run       # job berkala: base + delta
+    python reset_password.py --change-feed feed.jsonl backup verify
+    python reset_password.py --change-feed feed.jsonl backup restore --output pulih.xlsx --until "2024-05-01 08:00"
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from app import (
+    INTEGRITY_CHECKS, MANUAL_CHECKS, REMINDER_DAYS,
+    BackupStore, BookManager, DueDateIndex, IntegrityChecker, LibraryDatabase
+)
+
+ACTIONS = ('import', 'reset', 'deactivate', 'activate')
+BACKUP_ACTIONS = ('base', 'run', 'restore', 'verify')
+MIN_PASSWORD_LENGTH = 6
+
+
+def open_database(db_path=None, change_feed=None):
+    """LibraryDatabase dengan change feed (argumen atau LIBRARY_CHANGE_FEED)
+
+    Commit dari CLI ikut tercatat di feed sehingga worker lain dan backup
+    inkremental melihatnya.
+    """
+    return LibraryDatabase(db_path, change_feed=change_feed or os.environ.get('LIBRARY_CHANGE_FEED'))
+
+
+def _validate_password(password):
+    if len(password) < MIN_PASSWORD_LENGTH:
+        return f"Password minimal {MIN_PASSWORD_LENGTH} karakter"
+    return None
+
+
+def apply_user_batch(db, rows):
+    """Menerapkan daftar perubahan user ke sheet users dalam memori
+
+    rows: iterable dict dengan kunci action, username, password, email.
+    Mengembalikan (users_df baru, laporan per baris). Baris yang gagal tidak
+    mengubah data; baris lain tetap diterapkan.
+    """
+    users_df = db.get_sheet('users').reset_index(drop=True)
+    if 'active' not in users_df.columns:
+        users_df['active'] = True
+    position = {str(u): i for i, u in enumerate(users_df['username'])}
+    new_users = []
+    # Hash PBKDF2 sengaja lambat; dihitung paralel setelah semua baris divalidasi
+    to_hash = []
+    report = []
+    created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    for line, row in enumerate(rows, start=1):
+        action = str(row.get('action', '')).strip().lower()
+        username = str(row.get('username', '')).strip()
+        password = str(row.get('password', ''))
+        email = str(row.get('email', '')).strip()
+        error = None
+
+        if action not in ACTIONS:
+            error = f"Aksi tidak dikenal: '{action}'"
+        elif not username:
+            error = "Username kosong"
+        elif action == 'import':
+            if username in position:
+                error = "Username sudah terdaftar"
+            elif not email:
+                error = "Email kosong"
+            else:
+                error = _validate_password(password)
+            if error is None:
+                position[username] = len(users_df) + len(new_users)
+                to_hash.append((position[username], password))
+                new_users.append({
+                    'username': username,
+                    'password': None,
+                    'email': email,
+                    'created_at': created_at,
+                    'active': True
+                })
+        elif username not in position:
+            error = "User tidak ditemukan"
+        elif position[username] >= len(users_df):
+            error = "User baru diimport di batch yang sama"
+        elif action == 'reset':
+            error = _validate_password(password)
+            if error is None:
+                to_hash.append((position[username], password))
+        else:
+            users_df.loc[position[username], 'active'] = (action == 'activate')
+
+        report.append({
+            'line': line,
+            'action': action,
+            'username': username,
+            'status': 'error' if error else 'ok',
+            'message': error or 'OK'
+        })
+
+    if new_users:
+        users_df = pd.concat([users_df, pd.DataFrame(new_users)], ignore_index=True)
+    if to_hash:
+        with ThreadPoolExecutor() as pool:
+            hashes = list(pool.map(db._hash_password, [password for _, password in to_hash]))
+        for (row, _), hashed in zip(to_hash, hashes):
+            users_df.loc[row, 'password'] = hashed
+    return users_df, report
+
+
+def run_batch(rows, db_path=None, dry_run=False, change_feed=None):
+    """Menerapkan batch dan menyimpan sheet users sekali; mengembalikan (berhasil, laporan)"""
+    db = open_database(db_path, change_feed)
+    with db.write_lock():
+        users_df, report = apply_user_batch(db, rows)
+        changed = any(r['status'] == 'ok' for r in report)
+        if dry_run or not changed:
+            return True, report
+        return db.save_sheet('users', users_df), report
+
+
+def read_rows(csv_path, action=None):
+    """Membaca CSV sebagai list dict; kolom action diisi otomatis untuk subcommand tunggal"""
+    rows = pd.read_csv(csv_path, dtype=str, keep_default_na=False).to_dict('records')
+    if action is not None:
+        for row in rows:
+            row['action'] = action
+    return rows
+
+
+def reset_user_password(username, new_password, db_path=None):
+    """Reset password satu user (dipertahankan untuk pemakaian lama)"""
+    saved, report = run_batch(
+        [{'action': 'reset', 'username': username, 'password': new_password}],
+        db_path
+    )
+    return saved and report[0]['status'] == 'ok'
+
+
+def print_report(report, saved, dry_run):
+    width = max([len(r['username']) for r in report] + [8])
+    for r in report:
+        print(f"{r['line']:>5}  {r['action']:<10} {r['username']:<{width}}  {r['status']:<5}  {r['message']}")
+    ok = sum(r['status'] == 'ok' for r in report)
+    print(f"\n{ok} berhasil, {len(report) - ok} gagal dari {len(report)} baris")
+    if dry_run:
+        print("Dry run: tidak ada perubahan yang disimpan")
+    elif not saved:
+        print("Gagal menyimpan perubahan ke database")
+
+
+def run_check(db_path=None, repair=False, dry_run=False, change_feed=None):
+    """Menjalankan pemeriksaan integritas (dan perbaikan opsional); mengembalikan (berhasil, sebelum, sesudah)"""
+    checker = IntegrityChecker(open_database(db_path, change_feed))
+    if repair:
+        return checker.repair(dry_run=dry_run)
+    issues = checker.check()
+    return True, issues, issues
+
+
+def print_check(before, after, repaired, saved, dry_run):
+    print(f"{'pemeriksaan':<32}{'jumlah':>8}{'sisa':>8}  contoh id")
+    for name, description in INTEGRITY_CHECKS.items():
+        sample = ', '.join(str(i) for i in after[name][:10])
+        print(f"{name:<32}{len(before[name]):>8}{len(after[name]):>8}  {sample}")
+    remaining = sum(len(ids) for ids in after.values())
+    print(f"\n{remaining} masalah tersisa")
+    manual = [name for name in MANUAL_CHECKS if after[name]]
+    if manual:
+        print(f"Perlu ditangani manual: {', '.join(manual)}")
+    if repaired and dry_run:
+        print("Dry run: perbaikan tidak disimpan")
+    elif repaired and not saved:
+        print("Gagal menyimpan perbaikan ke database")
+
+
+def build_reminders(db_path=None, days=REMINDER_DAYS):
+    """Daftar pengingat (terlambat + segera jatuh tempo) beserta email peminjam"""
+    db = open_database(db_path)
+    reminders = DueDateIndex(db).reminders(days)
+    emails = db.get_sheet('users', columns=['username', 'email'])
+    if emails.empty:
+        emails = pd.DataFrame(columns=['username', 'email'])
+    return reminders.merge(emails, on='username', how='left')
+
+
+def print_reminders(reminders):
+    for loan in reminders.itertuples(index=False):
+        if loan.status == 'terlambat':
+            detail = f"terlambat {loan.days_overdue:.0f} hari, denda Rp {loan.fine:,.0f}"
+        else:
+            detail = f"jatuh tempo {loan.days_left:.0f} hari lagi"
+        print(f"{loan.username:<20} {str(loan.email):<30} {loan.due_date:%Y-%m-%d}  {loan.book_title} ({detail})")
+    overdue = (reminders['status'] == 'terlambat').sum()
+    print(f"\n{len(reminders)} pengingat: {overdue} terlambat, {len(reminders) - overdue} segera jatuh tempo")
+
+
+def run_backup(action, db_path=None, directory=None, change_feed=None,
+               output=None, until=None, seq=None):
+    """Menjalankan satu aksi backup; mengembalikan (berhasil, pesan per baris)"""
+    db = open_database(db_path, change_feed)
+    store = BackupStore(directory or os.path.join(os.path.dirname(os.path.abspath(db.file_path)), 'backups'))
+    try:
+        if action == 'base':
+            base = store.take_base(db)
+            return True, [f"Base {base['file']} (seq {base['seq']})"]
+        if action == 'run':
+            base, delta = store.run(db)
+            lines = [f"Base {base['file']} (seq {base['seq']})"] if base else []
+            if delta:
+                lines.append(f"Delta {delta['file']}: seq {delta['first_seq']}-{delta['last_seq']}")
+            return True, lines or ["Tidak ada perubahan sejak backup terakhir"]
+        if action == 'restore':
+            until = datetime.fromisoformat(until) if until else None
+            result = store.restore(output, until=until, seq=seq)
+            return True, [f"{output}: base {result['base']} + {result['events']} event (sampai seq {result['seq']})"]
+        report = store.verify(db)
+    except ValueError as e:
+        return False, [str(e)]
+
+    lines = [f"File rusak: {problem}" for problem in report['files']]
+    lines += [f"Seq terputus: {before} -> {after}" for before, after in report['gaps']]
+    lines += [
+        f"Sheet {name} berbeda pada {len(keys)} baris: {', '.join(str(k) for k in keys[:10])}"
+        for name, keys in report['sheets'].items()
+    ]
+    ok = not lines
+    if ok:
+        lines.append(f"Backup valid ({report['pending']} event feed belum dibackup)")
+    return ok, lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Administrasi user E-Library")
+    parser.add_argument('--db', default=None, help="Path library_db.xlsx")
+    parser.add_argument('--dry-run', action='store_true', help="Validasi tanpa menyimpan")
+    parser.add_argument('--report', default=None, help="Simpan laporan per baris ke CSV")
+    parser.add_argument('--change-feed', default=None,
+                        help="Path change feed (default: LIBRARY_CHANGE_FEED)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    reset = commands.add_parser('reset', help="Reset password satu user")
+    reset.add_argument('username')
+    reset.add_argument('password')
+
+    for name, columns in (('import', 'username,password,email'),
+                          ('deactivate', 'username'),
+                          ('activate', 'username')):
+        command = commands.add_parser(name, help=f"{name} dari CSV ({columns})")
+        command.add_argument('csv')
+
+    batch = commands.add_parser('batch', help="CSV campuran: action,username,password,email")
+    batch.add_argument('csv')
+
+    check = commands.add_parser('check', help="Periksa konsistensi books/transactions")
+    check.add_argument('--repair', action='store_true', help="Perbaiki otomatis dalam satu commit")
+
+    reminders = commands.add_parser('reminders', help="Daftar pengingat jatuh tempo/terlambat")
+    reminders.add_argument('--days', type=int, default=REMINDER_DAYS,
+                           help=f"Jatuh tempo dalam N hari (default {REMINDER_DAYS})")
+
+    commands.add_parser('merge-copies', help="Gabungkan baris duplikat satu judul menjadi jumlah eksemplar")
+
+    backup = commands.add_parser('backup', help="Backup inkremental dari change feed")
+    backup.add_argument('action', choices=BACKUP_ACTIONS)
+    backup.add_argument('--dir', default=os.environ.get('LIBRARY_BACKUP_DIR'),
+                        help="Direktori backup (default: backups/ di samping database)")
+    backup.add_argument('--output', help="File hasil restore (tidak boleh sudah ada)")
+    backup.add_argument('--until', help="Restore ke titik waktu, mis. '2024-05-01 08:00'")
+    backup.add_argument('--seq', type=int, help="Restore sampai seq event tertentu")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'backup':
+        if args.action == 'restore' and not args.output:
+            parser.error("backup restore membutuhkan --output")
+        ok, lines = run_backup(args.action, args.db, args.dir, args.change_feed,
+                               args.output, args.until, args.seq)
+        print('\n'.join(lines))
+        return 0 if ok else 1
+
+    if args.command == 'merge-copies':
+        saved, merged = BookManager(open_database(args.db, args.change_feed)).merge_copies(dry_run=args.dry_run)
+        print(f"{merged} baris duplikat {'akan' if args.dry_run else 'telah'} digabung")
+        if not saved:
+            print("Gagal menyimpan perubahan ke database")
+        return 0 if saved else 1
+
+    if args.command == 'reminders':
+        result = build_reminders(args.db, args.days)
+        print_reminders(result)
+        if args.report:
+            result.to_csv(args.report, index=False, date_format='%Y-%m-%d')
+        return 0
+
+    if args.command == 'check':
+        saved, before, after = run_check(args.db, args.repair, args.dry_run, args.change_feed)
+        print_check(before, after, args.repair, saved, args.dry_run)
+        if args.report:
+            pd.DataFrame(
+                [{'check': name, 'id': i} for name, ids in after.items() for i in ids],
+                columns=['check', 'id']
+            ).to_csv(args.report, index=False)
+        return 1 if not saved or any(after.values()) else 0
+
+    if args.command == 'reset':
+        rows = [{'action': 'reset', 'username': args.username, 'password': args.password}]
+    elif args.command == 'batch':
+        rows = read_rows(args.csv)
+    else:
+        rows = read_rows(args.csv, action=args.command)
+
+    saved, report = run_batch(rows, args.db, args.dry_run, args.change_feed)
+    print_report(report, saved, args.dry_run)
+    if args.report:
+        pd.DataFrame(report).to_csv(args.report, index=False)
+
+    failed = not saved or any(r['status'] == 'error' for r in report)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,18 @@
-import hashlib
-import pandas as pd
-import os
-
-# Test the admin password hashing
-password = '12345'
-hashed = hashlib.sha256(password.encode()).hexdigest()
-print(f"Password: {password}")
-print(f"Hashed: {hashed}")
-
-# Check if database exists and show admin data
-if os.path.exists('library_db.xlsx'):
-    try:
-        admin_df = pd.read_excel('library_db.xlsx', sheet_name='admin', engine='openpyxl')
-        print("\nAdmin data in database:")
-        print(admin_df)
-    except Exception as e:
-        print(f"Error reading database: {e}")
-else:
-    print("Database file does not exist")
+from app import MemoryLibraryDatabase, PASSWORD_ALGORITHM, verify_password
+
+
+def test_default_admin_is_seeded():
+    db = MemoryLibraryDatabase()
+    admin_df = db.get_sheet('admin')
+
+    assert list(admin_df['username']) == ['admin']
+
+
+def test_admin_password_is_hashed():
+    db = MemoryLibraryDatabase()
+    admin_df = db.get_sheet('admin')
+
+    stored = admin_df.iloc[0]['password']
+    assert stored.startswith(PASSWORD_ALGORITHM + '$')
+    assert verify_password('12345', stored)
+    assert stored != '12345'
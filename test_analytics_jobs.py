@@ -0,0 +1,40 @@
+import pytest
+
+from app import LibraryAnalytics
+
+
+@pytest.fixture
+def analytics(memory_db, book_manager):
+    book_manager.borrow_book('a', 1)
+    book_manager.borrow_book('b', 1)
+    book_manager.borrow_book('a', 2)
+    return LibraryAnalytics(memory_db)
+
+
+def test_stats_job_matches_inline_stats(analytics):
+    stats = analytics.stats_job().result(timeout=60)
+
+    assert stats == analytics.get_borrowing_stats()
+    assert stats['most_borrowed_book'] == 1
+    assert stats['active_borrows'] == 2
+
+
+def test_job_reused_until_data_version_changes(book_manager, analytics):
+    first = analytics.stats_job()
+    assert analytics.stats_job() is first
+    first.result(timeout=60)
+
+    book_manager.borrow_book('c', 3)
+    second = analytics.stats_job()
+
+    assert second is not first
+    assert second.result(timeout=60)['total_transactions'] == 3
+
+
+def test_chart_jobs_return_png_bytes(analytics):
+    trend = analytics.trend_chart_job('day').result(timeout=60)
+    categories = analytics.category_chart_job().result(timeout=60)
+
+    assert trend.startswith(b'\x89PNG')
+    assert categories.startswith(b'\x89PNG')
+    assert analytics.trend_chart_job('day', category='Tidak Ada').result(timeout=60) is None
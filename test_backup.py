@@ -0,0 +1,60 @@
+import pytest
+
+from app import BackupStore, BookManager, LibraryDatabase
+
+
+@pytest.fixture
+def backup(feed_databases, tmp_path):
+    """Database dengan change feed dan BackupStore yang sudah berisi base backup"""
+    db, _ = feed_databases
+    store = BackupStore(str(tmp_path / 'backups'))
+    store.run(db)
+    return db, store
+
+
+def test_restore_replays_deltas_to_latest_and_to_seq(tmp_path, backup):
+    db, store = backup
+    book_manager = BookManager(db)
+    book_manager.borrow_book('a', 1)
+    first_borrow = db.feed.position()[0]
+    book_manager.borrow_book('b', 2)
+    book_manager.return_book(1)
+    _, delta = store.run(db)
+
+    assert delta['first_seq'] == 1
+    latest = store.restore(str(tmp_path / 'latest.xlsx'))
+    assert latest['seq'] == delta['last_seq']
+    restored = LibraryDatabase(str(tmp_path / 'latest.xlsx')).get_sheet('transactions')
+    assert list(restored['status']) == ['returned', 'borrowed']
+
+    store.restore(str(tmp_path / 'earlier.xlsx'), seq=first_borrow)
+    earlier = LibraryDatabase(str(tmp_path / 'earlier.xlsx'))
+    assert list(earlier.get_sheet('transactions')['status']) == ['borrowed']
+    assert earlier.get_sheet('books', filters=[('book_id', '==', 2)])['available_copies'].iloc[0] == 1
+
+
+def test_verify_accepts_backup_and_pending_feed_events(tmp_path, backup):
+    db, store = backup
+    BookManager(db).borrow_book('a', 1)
+    store.run(db)
+    BookManager(db).borrow_book('b', 2)
+
+    report = store.verify(db)
+
+    assert report == {'files': [], 'gaps': [], 'sheets': {}, 'pending': 2}
+
+
+def test_verify_detects_tampering_and_unlogged_commits(tmp_path, backup):
+    db, store = backup
+    # Commit lewat objek tanpa change feed tidak tercatat di delta
+    outside = LibraryDatabase(db.file_path)
+    outside.save_sheet('books', outside.get_sheet('books').assign(title='Diubah'))
+    assert sorted(store.verify(db)['sheets']['books']) == [1, 2, 3, 4, 5]
+
+    BookManager(db).borrow_book('a', 1)
+    _, delta = store.run(db)
+    with open(tmp_path / 'backups' / delta['file'], 'a') as f:
+        f.write('{}\n')
+    assert store.verify(db)['files'] == [f"{delta['file']}: checksum tidak cocok"]
+    with pytest.raises(ValueError):
+        store.restore(str(tmp_path / 'restored.xlsx'))
@@ -0,0 +1,77 @@
+import threading
+
+from app import BookManager, BorrowingCube, LibraryDatabase
+
+
+def test_commit_publishes_row_level_changes(feed_databases):
+    writer, reader = feed_databases
+    changes = []
+    reader.subscribe(changes.append)
+
+    BookManager(writer).borrow_book('testuser', 2)
+    reader.poll_changes()
+
+    assert [(c['sheet'], c['op'], c['key']) for c in changes] == [
+        ('books', 'update', 2),
+        ('transactions', 'insert', 1),
+    ]
+    assert changes[0]['changes'] == {'available': False, 'available_copies': 0}
+    assert changes[1]['changes']['status'] == 'borrowed'
+    assert [c['seq'] for c in changes] == [1, 2]
+
+
+def test_remote_commit_bumps_only_changed_sheets(feed_databases):
+    writer, reader = feed_databases
+    before = reader.get_version('users', 'books', 'transactions')
+
+    BookManager(writer).borrow_book('testuser', 2)
+    after = reader.get_version('users', 'books', 'transactions')
+
+    assert after[0] == before[0]
+    assert after[1] == before[1]
+    assert after[2:] != before[2:]
+
+
+def test_index_applies_remote_changes_without_rebuild(feed_databases):
+    writer, reader = feed_databases
+    cube = BorrowingCube(reader)
+    reader.subscribe(cube.on_change)
+    cube.ensure_fresh()
+    rebuilds = []
+    cube.rebuild = lambda: rebuilds.append(True)
+
+    BookManager(writer).borrow_book('testuser', 2)
+    cube.ensure_fresh()
+
+    assert rebuilds == []
+    assert cube.series('month').sum() == 1
+
+
+def test_write_without_feed_invalidates_everything(feed_databases):
+    db, _ = feed_databases
+    before = db.get_version('books')
+
+    BookManager(LibraryDatabase(db.file_path)).borrow_book('testuser', 2)
+
+    assert db.get_version('books')[0] == before[0] + 1
+
+
+def test_rebuild_during_commit_does_not_apply_event_twice(memory_db, book_manager, monkeypatch):
+    cube = BorrowingCube(memory_db)
+    memory_db.subscribe(cube.on_change)
+    book_manager.borrow_book('a', 1)
+    cube.ensure_fresh()
+    dispatch = memory_db._dispatch
+
+    def dispatch_after_rebuild(changes):
+        # Thread lain memakai cube tepat setelah file ditulis, sebelum event diteruskan
+        reader = threading.Thread(target=cube.ensure_fresh)
+        reader.start()
+        reader.join(timeout=0.5)
+        dispatch(changes)
+        reader.join()
+
+    monkeypatch.setattr(memory_db, '_dispatch', dispatch_after_rebuild)
+    book_manager.borrow_book('b', 2)
+
+    assert cube.series('month').sum() == 2
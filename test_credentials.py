@@ -0,0 +1,64 @@
+import hashlib
+import threading
+
+from app import (
+    CredentialStore, UserManager, hash_password, needs_rehash, verify_password
+)
+
+
+def test_hash_is_salted_and_tunable():
+    first, second = hash_password('rahasia', 1000), hash_password('rahasia', 1000)
+
+    assert first != second
+    assert first.split('$')[1] == '1000'
+    assert verify_password('rahasia', first)
+    assert not verify_password('salah', first)
+    assert needs_rehash(first, 2000)
+    assert not needs_rehash(first, 1000)
+
+
+def test_legacy_sha256_hash_is_upgraded_on_login(memory_db):
+    db = memory_db
+    user_manager = UserManager(db)
+    user_manager.register_user('lama', 'password123', 'lama@example.com')
+    users_df = db.get_sheet('users')
+    users_df.loc[users_df['username'] == 'lama', 'password'] = hashlib.sha256(b'password123').hexdigest()
+    db.save_sheet('users', users_df)
+
+    success, _ = user_manager.login_user('lama', 'password123')
+
+    stored = db.get_sheet('users').iloc[0]['password']
+    assert success
+    assert not needs_rehash(stored, db.password_iterations)
+    assert user_manager.login_user('lama', 'password123')[0]
+
+
+def test_unknown_user_is_rejected(user_manager):
+
+    assert user_manager.login_user('tidakada', 'password123') == (False, "Username atau password salah")
+
+
+def test_full_verification_queue_returns_busy(monkeypatch, memory_db):
+    store = CredentialStore(memory_db, 'admin')
+    pool, _ = store._executor()
+    monkeypatch.setattr(CredentialStore, '_slots', threading.BoundedSemaphore(1))
+    CredentialStore._slots.acquire()
+
+    try:
+        assert store.verify('admin', '12345') == 'busy'
+    finally:
+        CredentialStore._slots.release()
+    assert store.verify('admin', '12345') == 'ok'
+
+
+def test_failed_read_is_retried_on_next_login(user_manager, monkeypatch):
+    db = user_manager.db
+
+    def broken_read(*args):
+        raise OSError("file sedang dipakai")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(db, '_iter_row_chunks', broken_read)
+        assert not user_manager.login_user('n', 'rahasia')[0]
+
+    assert user_manager.login_user('n', 'rahasia') == (True, "Login berhasil!")
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import LOAN_PERIOD_DAYS, DueDateIndex
+
+
+@pytest.fixture
+def due_index(memory_db):
+    due_index = DueDateIndex(memory_db)
+    memory_db.subscribe(due_index.on_change)
+    return due_index
+
+
+def test_due_within_and_overdue(book_manager, due_index):
+    book_manager.borrow_book('a', 1)
+    book_manager.borrow_book('b', 2)
+    today = datetime.now()
+
+    assert list(due_index.due_within(LOAN_PERIOD_DAYS, today)['book_id']) == [1, 2]
+    assert due_index.due_within(LOAN_PERIOD_DAYS - 1, today).empty
+    assert due_index.overdue(today).empty
+
+    overdue = due_index.overdue(today + timedelta(days=LOAN_PERIOD_DAYS + 3))
+    assert list(overdue['days_overdue']) == [3, 3]
+    assert list(overdue['fine']) == [15000, 15000]
+
+
+def test_index_follows_borrow_and_return(book_manager, due_index):
+    book_manager.borrow_book('a', 1)
+    due_index.ensure_fresh()
+    rebuilds = []
+    due_index.rebuild = lambda: rebuilds.append(True)
+
+    book_manager.borrow_book('b', 2)
+    book_manager.return_book(1)
+
+    assert list(due_index.due_within(LOAN_PERIOD_DAYS)['transaction_id']) == [2]
+    assert rebuilds == []
+
+
+def test_reminders_for_one_user(book_manager, due_index):
+    book_manager.borrow_book('a', 1)
+    book_manager.borrow_book('b', 2)
+    later = datetime.now() + timedelta(days=LOAN_PERIOD_DAYS - 1)
+
+    reminders = due_index.reminders(days=3, today=later, username='a')
+
+    assert list(reminders['book_id']) == [1]
+    assert list(reminders['status']) == ['segera jatuh tempo']
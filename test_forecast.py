@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+from app import DemandForecaster
+
+
+def make_forecaster(db, monthly):
+    """Isi db dengan riwayat peminjaman returned: monthly = {book_id: [jumlah per bulan, terlama dulu]}"""
+    this_month = pd.Timestamp.now().to_period('M')
+    rows = []
+    for book_id, counts in monthly.items():
+        for age, count in zip(range(len(counts), 0, -1), counts):
+            borrow_date = (this_month - age).to_timestamp() + pd.Timedelta(days=1)
+            rows += [{
+                'username': 'hist',
+                'book_id': book_id,
+                'borrow_date': borrow_date,
+                'due_date': borrow_date + pd.Timedelta(days=14),
+                'return_date': borrow_date + pd.Timedelta(days=7),
+                'status': 'returned',
+                'fine': 0,
+            }] * count
+    transactions = pd.DataFrame(rows)
+    transactions.insert(0, 'transaction_id', range(1, len(rows) + 1))
+    db.save_sheet('transactions', transactions)
+
+    forecaster = DemandForecaster(db)
+    db.subscribe(forecaster.on_change)
+    return forecaster
+
+
+def test_fit_chooses_poisson_or_negative_binomial():
+    series = np.array([[2, 2, 2, 2], [0, 8, 0, 8]])
+    mean, negbin, r, p = DemandForecaster.fit(series.sum(axis=1), (series ** 2).sum(axis=1), 4)
+
+    assert list(mean) == [2, 4]
+    assert list(negbin) == [False, True]
+    # Parameter binomial negatif mereproduksi rata-rata dan varians sampel
+    assert np.isclose(r[1] * (1 - p[1]) / p[1], 4)
+    assert np.isclose(r[1] * (1 - p[1]) / p[1] ** 2, series[1].var(ddof=1))
+
+
+def test_forecast_flags_title_that_will_run_short(memory_db):
+    forecaster = make_forecaster(memory_db, {1: [9, 10, 11], 2: [1, 0, 1]})
+
+    by_book = forecaster.forecast('book').set_index('book_id')
+
+    assert forecaster.months_observed() == 3
+    assert by_book.loc[1, 'expected'] == 10
+    assert by_book.loc[1, 'shortage_prob'] > 0.99
+    assert by_book.loc[2, 'shortage_prob'] < 0.05
+    assert forecaster.forecast('book')['book_id'].iloc[0] == 1
+
+    by_category = forecaster.forecast('category')
+    assert by_category['expected'].sum() == by_book['expected'].sum()
+
+
+def test_new_loan_updates_month_to_date_without_refit(memory_db, book_manager):
+    forecaster = make_forecaster(memory_db, {1: [3, 3]})
+    forecaster.forecast()
+    fit_version = forecaster.fit_version
+    rebuilds = []
+    forecaster.rebuild = lambda: rebuilds.append(True)
+
+    book_manager.borrow_book('a', 1)
+    by_book = forecaster.forecast().set_index('book_id')
+
+    assert by_book.loc[1, 'month_to_date'] == 1
+    assert forecaster.fit_version == fit_version
+    assert rebuilds == []
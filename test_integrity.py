@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+
+from app import IntegrityChecker
+
+
+@pytest.fixture
+def broken_db(memory_db, book_manager):
+    """Database contoh dengan satu masalah untuk setiap jenis pemeriksaan"""
+    db = memory_db
+    book_manager.borrow_book('a', 1)
+    book_manager.borrow_book('b', 2)
+    book_manager.borrow_book('c', 3)
+
+    books_df = db.get_sheet('books')
+    books_df.loc[books_df['book_id'] == 2, ['available', 'available_copies']] = [True, 1]
+    books_df.loc[books_df['book_id'] == 4, ['available', 'available_copies']] = [False, 0]
+
+    transactions_df = db.get_sheet('transactions')
+    extra = transactions_df.iloc[[0, 0, 0]].copy()
+    extra['transaction_id'] = [3, 4, 5]
+    extra['book_id'] = [3, 99, 5]
+    extra['status'] = ['borrowed', 'returned', 'returned']
+    extra['fine'] = [0, 0, -5000]
+    transactions_df = pd.concat([transactions_df, extra], ignore_index=True)
+    transactions_df.loc[transactions_df['transaction_id'] == 1, 'due_date'] = pd.Timestamp('2000-01-01')
+
+    db.save_sheets({'books': books_df, 'transactions': transactions_df})
+    return db
+
+
+def test_check_reports_every_problem(broken_db):
+    issues = IntegrityChecker(broken_db).check()
+
+    assert issues == {
+        'duplicate_book_id': [],
+        'duplicate_transaction_id': [3],
+        'available_copies_mismatch': [2, 4],
+        'over_borrowed': [3],
+        'orphan_book_id': [4],
+        'due_before_borrow': [1],
+        'negative_fine': [5],
+    }
+
+
+def test_check_clean_database(memory_db, book_manager):
+    book_manager.borrow_book('a', 1)
+
+    assert not any(IntegrityChecker(memory_db).check().values())
+
+
+def test_repair_fixes_automatic_problems_in_one_commit(broken_db):
+    db = broken_db
+    changes = []
+    db.subscribe(changes.append)
+    version = db.get_version('books', 'transactions')
+
+    saved, before, after = IntegrityChecker(db).repair()
+
+    assert saved
+    assert after == {**{name: [] for name in before},
+                     'over_borrowed': [3], 'orphan_book_id': [4]}
+    assert db.get_version('books', 'transactions') == (version[0], version[1] + 1, version[2] + 1)
+    assert {(c['sheet'], c['key']) for c in changes} >= {('books', 2), ('books', 4), ('transactions', 6)}
+
+
+def test_repair_dry_run_does_not_save(broken_db):
+    db = broken_db
+    version = db.get_version('books', 'transactions')
+
+    saved, before, after = IntegrityChecker(db).repair(dry_run=True)
+
+    assert saved and before != after
+    assert db.get_version('books', 'transactions') == version
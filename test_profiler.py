@@ -0,0 +1,49 @@
+import os
+import time
+
+import pytest
+
+from app import RerunProfiler
+
+
+def busy_rerun():
+    end = time.perf_counter() + 0.05
+    while time.perf_counter() < end:
+        sum(range(1000))
+
+
+def test_capture_writes_pstats_and_folded_stacks(tmp_path):
+    profiler = RerunProfiler(str(tmp_path))
+    profiler.enable('a')
+
+    with profiler.capture('a'):
+        busy_rerun()
+
+    [stem] = profiler.list_profiles()
+    assert stem.endswith('_a')
+    assert 'busy_rerun' in profiler.summary(stem)
+    with open(os.path.join(tmp_path, stem + '.folded'), encoding='utf-8') as folded:
+        lines = folded.read().splitlines()
+    assert any('busy_rerun' in line for line in lines)
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+
+
+def test_capture_is_noop_for_users_not_profiled(tmp_path):
+    profiler = RerunProfiler(str(tmp_path))
+    profiler.enable('a')
+    profiler.disable('a')
+
+    with profiler.capture('a'), profiler.capture('b'):
+        busy_rerun()
+
+    assert profiler.list_profiles() == []
+
+
+def test_profile_saved_when_rerun_raises(tmp_path):
+    profiler = RerunProfiler(str(tmp_path))
+    profiler.enable('a')
+
+    with pytest.raises(RuntimeError), profiler.capture('a'):
+        raise RuntimeError("st.rerun")
+
+    assert len(profiler.list_profiles()) == 1
@@ -0,0 +1,36 @@
+from app import BookManager, LibraryDatabase
+
+
+def test_snapshot_matches_file(snapshot_databases):
+    db, _ = snapshot_databases
+
+    books_df = db.get_sheet('books')
+    available = db.get_sheet('books', columns=['book_id'], filters=[('book_id', '>', 3)])
+
+    assert list(books_df['book_id']) == [1, 2, 3, 4, 5]
+    assert str(books_df['book_id'].dtype) == 'Int32'
+    assert list(available['book_id']) == [4, 5]
+
+
+def test_commit_is_visible_to_other_worker(snapshot_databases):
+    writer, reader = snapshot_databases
+    reader.get_sheet('books')
+
+    success, _ = BookManager(writer).borrow_book('testuser', 2)
+
+    assert success
+    assert 2 not in set(BookManager(reader).get_available_books()['book_id'])
+    assert list(reader.get_sheet('transactions')['book_id']) == [2]
+
+
+def test_external_write_republishes_snapshot(snapshot_databases):
+    db, _ = snapshot_databases
+    db.get_sheet('books')
+
+    # Penulis tanpa snapshot (misalnya CLI admin) mengubah file secara langsung
+    plain = LibraryDatabase(db.file_path)
+    books_df = plain.get_sheet('books')
+    books_df.loc[books_df['book_id'] == 5, ['available', 'available_copies']] = [False, 0]
+    plain.save_sheet('books', books_df)
+
+    assert 5 not in set(BookManager(db).get_available_books()['book_id'])
@@ -0,0 +1,41 @@
+import os
+import threading
+
+import pytest
+
+from app import BookManager, LibraryDatabase
+
+
+def test_save_replaces_workbook_atomically(tmp_path, db_path):
+    db = LibraryDatabase(db_path)
+    reader = LibraryDatabase(db.file_path)
+    stop = threading.Event()
+    sizes = []
+
+    def read_loop():
+        while not stop.is_set():
+            sizes.append(len(reader.get_sheet('books')))
+
+    thread = threading.Thread(target=read_loop)
+    thread.start()
+    try:
+        book_manager = BookManager(db)
+        for book_id in (1, 2, 3, 4):
+            book_manager.borrow_book('testuser', book_id)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert sizes and set(sizes) == {5}
+    assert not [name for name in os.listdir(tmp_path) if name.startswith('.tmp-')]
+
+
+def test_failed_read_raises_inside_strict_reads(db_path):
+    db = LibraryDatabase(db_path)
+    with open(db.file_path, 'wb') as f:
+        f.write(b'bukan file excel')
+
+    assert db.get_sheet('books').empty
+    with db.strict_reads(), pytest.raises(Exception):
+        db.get_sheet('books')
+    assert db.get_sheet('books').empty